@@ -0,0 +1,108 @@
+"""Answer cache: a query mix with reworded repeats, cache off vs on.
+
+Each of `--topics` questions is asked `--repeats` times with small rewordings
+(case, punctuation, filler words). Exact matching absorbs case and punctuation;
+filler words only match with a semantic embedder. The benchmark runs them through each backend
+against the fakes and reports hit rate, latency of hits vs misses and
+the cost of one lookup at `--entries` cached answers:
+
+    python -m benchmarks.bench_answer_cache --topics 10 --repeats 4 --entries 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+from benchmarks.bench_e2e import BACKENDS, SERVER
+from benchmarks.fakes import FakeConfig, FakeServices, fake_env
+from src.clients.answer_cache import AnswerCache
+from src.core.logger import LoadingAnimation
+
+TOPICS = [
+    "what is the capital of australia", "how do I reverse a linked list in python",
+    "latest news about the james webb telescope", "explain the difference between tcp and udp",
+    "who won the last football world cup", "how does garbage collection work in java",
+    "what are the health benefits of green tea", "summarize the plot of the great gatsby",
+    "how to configure nginx as a reverse proxy", "what is the population of tokyo",
+    "best practices for writing unit tests", "how do vaccines train the immune system",
+]
+VARIANTS = ["{q}", "{q}?", "{Q}", "Please, {q}", "{q} please", "hey, {q}?"]
+
+
+def query_mix(topics: int, repeats: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    queries = [
+        rng.choice(VARIANTS).format(q=topic, Q=topic.capitalize())
+        for topic in (TOPICS * (topics // len(TOPICS) + 1))[:topics]
+        for _ in range(repeats)
+    ]
+    rng.shuffle(queries)
+    return queries
+
+
+async def run(backend: str, queries: list[str], settings: dict) -> dict:
+    from src.clients import providers
+    from src.clients.client import SaqrMCPClient
+
+    with FakeServices(FakeConfig()) as fakes, mock.patch.dict(os.environ, {**fake_env(fakes.base_url), **settings}):
+        providers._instances.clear()
+        client = SaqrMCPClient(backend)
+        client.stream = False
+        hits, misses = [], []
+        try:
+            await client.connect_to_server(args=[SERVER], command=sys.executable, env=dict(os.environ))
+            start = time.perf_counter()
+            for query in queries:
+                conversation = client.fork()
+                query_start = time.perf_counter()
+                await conversation.process_query(query)
+                (hits if conversation.last_stats.cache_hit else misses).append(time.perf_counter() - query_start)
+            elapsed = time.perf_counter() - start
+            stats = client.answer_cache.stats.as_dict()
+        finally:
+            await client.cleanup()
+            await providers.close_providers()
+    return {
+        "seconds": round(elapsed, 3),
+        "miss_p50": round(statistics.median(misses), 4) if misses else None,
+        "hit_p50": round(statistics.median(hits), 6) if hits else None,
+        **{k: stats[k] for k in ("lookups", "hits", "hit_rate", "seconds_saved")},
+    }
+
+
+def lookup_cost(entries: int, lookups: int = 200) -> dict:
+    cache = AnswerCache(enabled=True, maxsize=entries)
+    for i in range(entries):
+        cache.store(f"question number {i} about topic {i % 97}", "scope", f"answer {i}", [], 1.0)
+    start = time.perf_counter()
+    for i in range(lookups):
+        cache.lookup(f"question number {i * 7 % entries} about topic {(i * 7 % entries) % 97}", "scope")
+    return {"entries": entries, "lookup_ms": round((time.perf_counter() - start) / lookups * 1000, 3)}
+
+
+async def main(args) -> None:
+    LoadingAnimation.enabled = False
+    queries = query_mix(args.topics, args.repeats)
+    results = {"queries": len(queries), "distinct_topics": args.topics}
+    for backend in args.backends:
+        results[backend] = {"cache_off": await run(backend, queries, {"SAQR_ANSWER_CACHE": "false"})}
+        with tempfile.TemporaryDirectory() as tmp:
+            results[backend]["cache_on"] = await run(backend, queries, {
+                "SAQR_ANSWER_CACHE": "true", "SAQR_ANSWER_CACHE_PATH": os.path.join(tmp, "answers.sqlite"),
+            })
+    results["lookup"] = lookup_cost(args.entries)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=4)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""word_file_generator rendering: thread pool vs process pool vs cache hits.
+
+Renders a batch of large, table-heavy markdown documents. Each mode reports wall
+time and the worst event-loop stall, which shows how long every other tool call
+would have been blocked:
+
+    python -m benchmarks.bench_documents --docs 8 --tables 40 --rows 40 --workers 4 --stock
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+from src.core.logger import LoadingAnimation
+from src.servers import documents as documents_module
+from src.servers.documents import DocumentRenderer
+
+
+def build_markdown(index: int, tables: int, rows: int) -> str:
+    sections = [f"# Quarterly report {index}\n"]
+    for t in range(tables):
+        sections.append(f"## Section {t}\n\nSummary paragraph for section {t} of report {index}, with **bold** and *italic* text.\n")
+        sections.append("| Region | Product | Units | Revenue | Notes |\n|---|---|---:|---:|---|")
+        sections.extend(f"| R{r % 7} | P{(r * t) % 13} | {r * 17} | {r * 311.5:.2f} | row {r} of table {t} |" for r in range(rows))
+    return "\n".join(sections)
+
+
+async def max_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def measure(renderer: DocumentRenderer, documents: list[tuple[str, str, str]]) -> dict:
+    stop = asyncio.Event()
+    lag = asyncio.create_task(max_loop_lag(stop))
+    start = time.perf_counter()
+    errors = await renderer.render_many(documents)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return {"seconds": round(elapsed, 3), "max_loop_stall_ms": round(await lag * 1000, 1), "errors": sum(e is not None for e in errors)}
+
+
+async def main(args) -> None:
+    LoadingAnimation.enabled = False
+    results = {"docs": args.docs, "tables": args.tables, "rows": args.rows, "workers": args.workers}
+    with tempfile.TemporaryDirectory() as out:
+        documents = [
+            (os.path.join(out, f"report_{i}.docx"), f"Report {i}", build_markdown(i, args.tables, args.rows))
+            for i in range(args.docs)
+        ]
+        results["markdown_kb_per_doc"] = round(len(documents[0][2]) / 1024, 1)
+
+        if args.stock:
+            from htmldocx import HtmlToDocx
+
+            # the original renderer: stock htmldocx in the thread pool
+            stock = DocumentRenderer(workers=0, cache_dir=os.path.join(out, "cache_stock"))
+            with mock.patch.object(documents_module, "_html_parser_class", lambda: HtmlToDocx):
+                results["stock_thread_pool"] = await measure(stock, documents)
+
+        threads = DocumentRenderer(workers=0, cache_dir=os.path.join(out, "cache_threads"))
+        results["thread_pool"] = await measure(threads, documents)
+
+        processes = DocumentRenderer(workers=args.workers, cache_dir=os.path.join(out, "cache_processes"))
+        # start the workers outside the timed run
+        await processes.render_many([(os.path.join(out, "warmup.docx"), "warmup", "warmup")] * args.workers)
+        results["process_pool"] = await measure(processes, documents)
+        results["process_pool_cached"] = await measure(processes, documents)
+        processes.shutdown()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=8)
+    parser.add_argument("--tables", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--stock", action="store_true", help="also time the unpatched htmldocx table renderer")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,171 @@
+"""End-to-end offline benchmark: server + both clients against local fake services.
+
+Measures server startup, raw tool-call round-trips over stdio, end-to-end query
+latency for the Ollama and Groq clients, and peak memory. Results are one JSON
+document, so CI can diff them against a stored baseline:
+
+    python -m benchmarks.bench_e2e --output bench.json
+    python -m benchmarks.bench_e2e --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from benchmarks.fakes import FakeConfig, FakeServices, fake_env
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SERVER = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "servers", "saqr_server.py"))
+# every scenario runs once per backend, through the same SaqrMCPClient loop
+BACKENDS = ["groq", "ollama"]
+# metrics compared against a baseline; all are "lower is better"
+TRACKED = ["startup.list_tools_p50", "stdio.think_p50_ms", "ollama.query_p50", "groq.query_p50"]
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "p50": round(statistics.median(ordered), 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def peak_rss_mb(who) -> float:
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(who).ru_maxrss / scale, 1)
+
+
+async def bench_server(env: dict, runs: int, calls: int) -> dict:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[SERVER], env=env)
+    startup, think = [], []
+    for run in range(runs):
+        start = time.perf_counter()
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.list_tools()
+                startup.append(time.perf_counter() - start)
+                if run == 0:
+                    for i in range(calls):
+                        call_start = time.perf_counter()
+                        await session.call_tool("think", {"thought": f"step {i}"})
+                        think.append((time.perf_counter() - call_start) * 1000)
+
+    return {
+        "startup": {f"list_tools_{k}": v for k, v in summarize(startup).items()},
+        "stdio": {f"think_{k}_ms": v for k, v in summarize(think).items()},
+    }
+
+
+async def bench_client(backend: str, env: dict, queries: int) -> dict:
+    from src.clients.client import SaqrMCPClient
+    from src.clients.providers import close_providers
+    from src.core.logger import LoadingAnimation
+
+    LoadingAnimation.enabled = False
+    client = SaqrMCPClient(backend)
+    client.stream = False
+    latencies, stats = [], []
+    try:
+        await client.connect_to_server(args=[SERVER], command=sys.executable, env=env)
+        for i in range(queries):
+            conversation = client.fork()
+            start = time.perf_counter()
+            await conversation.process_query(f"benchmark question {backend} {i}")
+            latencies.append(time.perf_counter() - start)
+            stats.append(conversation.last_stats)
+    finally:
+        await client.cleanup()
+        await close_providers()
+
+    return {
+        **{f"query_{k}": v for k, v in summarize(latencies).items()},
+        "llm_calls": sum(s.llm_calls for s in stats),
+        "tool_calls": sum(s.tool_calls for s in stats),
+        "errors": sum(1 for s in stats if s.error),
+    }
+
+
+def flatten(results: dict) -> dict:
+    return {
+        f"{section}.{key}": value
+        for section, values in results.items() if isinstance(values, dict)
+        for key, value in values.items()
+    }
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = flatten(json.load(f))
+    current = flatten(results)
+    regressions = []
+    for metric in TRACKED:
+        if metric in baseline and metric in current and baseline[metric] > 0:
+            change = current[metric] / baseline[metric] - 1
+            if change > tolerance:
+                regressions.append(f"{metric}: {baseline[metric]} -> {current[metric]} (+{change:.0%})")
+    return regressions
+
+
+async def main(args) -> int:
+    config = FakeConfig(
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        memory_latency=args.memory_latency,
+        search_payload_bytes=args.search_payload_bytes,
+    )
+    with FakeServices(config) as fakes, tempfile.TemporaryDirectory() as state_dir:
+        env = {**os.environ, **fake_env(fakes.base_url), "SAQR_STATE_DIR": state_dir}
+        os.environ.update(env)
+
+        results = {"config": vars(config)}
+        results.update(await bench_server(env, args.startup_runs, args.stdio_calls))
+        for backend in args.backends:
+            results[backend] = await bench_client(backend, env, args.queries)
+        results["memory"] = {
+            "client_peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF) if resource else 0.0,
+            "server_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else 0.0,
+        }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--stdio-calls", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=FakeConfig.llm_latency)
+    parser.add_argument("--search-latency", type=float, default=FakeConfig.search_latency)
+    parser.add_argument("--memory-latency", type=float, default=FakeConfig.memory_latency)
+    parser.add_argument("--search-payload-bytes", type=int, default=FakeConfig.search_payload_bytes)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="fail when tracked metrics regress against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown vs the baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,74 @@
+"""First-query latency of the client with and without model warm-up.
+
+The fake Ollama takes `--load` seconds to load its model. `cold` connects without
+warm-up, so the first query pays the load. `warm` preloads the model while the
+server starts. The `short_keep_alive` scenario lets the model expire during an
+`--idle` pause, so the second query pays the load again. Only Ollama has a model
+to load; `--backend groq` runs the same scenarios as a baseline:
+
+    python -m benchmarks.bench_first_query --load 2.0 --idle 1.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from unittest import mock
+from benchmarks.bench_e2e import BACKENDS, SERVER
+from benchmarks.fakes import FakeConfig, FakeServices, fake_env
+from src.core.logger import LoadingAnimation
+
+
+async def scenario(backend: str, load: float, idle: float, warm_up: bool, keep_alive: str) -> dict:
+    from src.clients import providers
+    from src.clients.client import SaqrMCPClient
+
+    settings = {f"SAQR_{backend.upper()}_WARMUP": str(warm_up).lower(), "SAQR_OLLAMA_KEEP_ALIVE": keep_alive}
+
+    with FakeServices(FakeConfig(model_load_latency=load, answer_tokens=16)) as fakes, \
+            mock.patch.dict(os.environ, {**fake_env(fakes.base_url), **settings}):
+        providers._instances.clear()
+        client = SaqrMCPClient(backend)
+        client.stream = False
+        try:
+            start = time.perf_counter()
+            await client.connect_to_server(args=[SERVER], command=sys.executable, env=dict(os.environ))
+            connected = time.perf_counter() - start
+            query_start = time.perf_counter()
+            await client.fork().process_query("first question")
+            first = time.perf_counter() - query_start
+            first_answer = time.perf_counter() - start
+            await asyncio.sleep(idle)
+            conversation = client.fork()
+            query_start = time.perf_counter()
+            await conversation.process_query("second question")
+            second = time.perf_counter() - query_start
+        finally:
+            await client.cleanup()
+            await providers.close_providers()
+
+    return {
+        "connect": round(connected, 3),
+        "first_query": round(first, 3),
+        "start_to_first_answer": round(first_answer, 3),
+        "second_query_after_idle": round(second, 3),
+        "second_query_model_load": conversation.last_stats.model_load_seconds,
+    }
+
+
+async def main(args) -> None:
+    LoadingAnimation.enabled = False
+    results = {"backend": args.backend, "load_seconds": args.load, "idle_seconds": args.idle}
+    results["cold"] = await scenario(args.backend, args.load, args.idle, False, "30m")
+    results["warm"] = await scenario(args.backend, args.load, args.idle, True, "30m")
+    results["short_keep_alive"] = await scenario(args.backend, args.load, args.idle, True, "1s")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--load", type=float, default=2.0, help="seconds the fake Ollama takes to load its model")
+    parser.add_argument("--backend", choices=BACKENDS, default="ollama")
+    parser.add_argument("--idle", type=float, default=1.5, help="pause between the first and second query")
+    asyncio.run(main(parser.parse_args()))
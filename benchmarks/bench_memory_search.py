@@ -0,0 +1,71 @@
+"""Search latency of the local memory backend over a synthetic corpus.
+
+    python -m benchmarks.bench_memory_search --size 100000 --queries 200
+"""
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from src.servers.memory_backends import LocalMemoryBackend
+
+WORDS = (
+    "python rust docker deploy meeting budget invoice report bug fix release api "
+    "database index cache latency user customer project deadline design review "
+    "test benchmark memory search vector model prompt token server client"
+).split()
+TYPES = ["code", "note", "task", "preference", "fact"]
+
+
+def synthetic_memory(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main(size: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        backend = LocalMemoryBackend(directory=directory)
+
+        start = time.perf_counter()
+        batch = 10_000
+        for offset in range(0, size, batch):
+            backend.add_many([
+                (synthetic_memory(rng), rng.choice(TYPES)) for _ in range(min(batch, size - offset))
+            ])
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        LocalMemoryBackend(directory=directory)
+        reload_seconds = time.perf_counter() - start
+
+        for memory_type in (None, "task"):
+            samples = []
+            for _ in range(queries):
+                query = synthetic_memory(rng)
+                start = time.perf_counter()
+                backend._search(query, memory_type, 10)
+                samples.append((time.perf_counter() - start) * 1000)
+            print(json.dumps({
+                "corpus": size,
+                "memory_type": memory_type,
+                "build_seconds": round(build_seconds, 2),
+                "reload_seconds": round(reload_seconds, 2),
+                "p50_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+            }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.size, args.queries, args.seed)
@@ -0,0 +1,108 @@
+"""Groq calls against a flaky fake: no retries vs jittered retries vs retries with hedging.
+
+The fake answers `--error-rate` of the requests with a 429 and `--slow-rate` of them
+after `--slow-latency` seconds. Every scenario sends the same requests and reports
+the success rate and latency percentiles. A last scenario makes Groq fail every
+request, so the circuit breaker opens and Ollama answers instead:
+
+    python -m benchmarks.bench_resilience --requests 200 --concurrency 8 --error-rate 0.1 --slow-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from unittest import mock
+from benchmarks.fakes import FakeConfig, FakeServices, fake_env
+from src.core.logger import LoadingAnimation, logger
+
+MESSAGES = [{"role": "user", "content": "What changed in the latest release?"}]
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 4)
+
+
+async def run(requests: int, concurrency: int, settings: dict) -> dict:
+    from src.clients import providers
+    from src.core import resilience
+
+    with mock.patch.dict(os.environ, settings):
+        # fresh providers and limiters for every scenario
+        providers._instances.clear()
+        resilience._instances.clear()
+        provider = providers.get_provider("groq")
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors, fallbacks = [], 0, 0
+        answer_with_fallback = provider._chat_fallback
+
+        async def counted_fallback(*args):
+            nonlocal fallbacks
+            fallbacks += 1
+            return await answer_with_fallback(*args)
+
+        provider._chat_fallback = counted_fallback
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await provider.chat(MESSAGES, [])
+                except Exception:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        stats = provider.resilience.stats.as_dict()
+        await providers.close_providers()
+    return {
+        "success_rate": round(len(latencies) / requests, 4),
+        "seconds": round(elapsed, 3),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "answered_by_fallback": fallbacks,
+        **{k: stats[k] for k in ("retries", "hedges", "hedge_wins", "breaker_opens", "rejected")},
+    }
+
+
+async def main(args) -> None:
+    LoadingAnimation.enabled = False
+    logger.remove()
+    config = FakeConfig(
+        llm_latency=args.llm_latency, answer_tokens=8, token_latency=0.0,
+        error_rate=args.error_rate, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+    )
+    results = {"requests": args.requests, "concurrency": args.concurrency, "error_rate": args.error_rate, "slow_rate": args.slow_rate}
+    base = {"SAQR_GROQ_BACKOFF": "0.05", "SAQR_GROQ_TIMEOUT": "10", "SAQR_GROQ_BREAKER_FAILURES": "0"}
+    with FakeServices(config) as fakes:
+        env = fake_env(fakes.base_url)
+        results["no_retries"] = await run(args.requests, args.concurrency, {**env, **base, "SAQR_GROQ_RETRIES": "0"})
+        results["retries"] = await run(args.requests, args.concurrency, {**env, **base})
+        results["retries_hedged"] = await run(args.requests, args.concurrency, {**env, **base, "SAQR_GROQ_HEDGE_PERCENTILE": "90"})
+
+    with FakeServices(FakeConfig(llm_latency=args.llm_latency, answer_tokens=8, token_latency=0.0, error_rate=1.0)) as fakes:
+        results["groq_down_with_fallback"] = await run(args.requests, args.concurrency, {
+            **fake_env(fakes.base_url), **base,
+            "SAQR_GROQ_BREAKER_FAILURES": "3", "SAQR_GROQ_BREAKER_RESET": "60", "SAQR_GROQ_FALLBACK": "ollama",
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""web_search strategies against two stub providers: single provider vs fallback vs race vs fan-out.
+
+The primary stub answers in about `--latency` seconds, except for `--slow-rate` of the
+searches, which take `--slow-latency` seconds, and `--error-rate` of them, which time
+out. The secondary is steady but slower. Every scenario runs the same queries and
+reports the success rate, latency percentiles, results per search and how often
+each provider supplied the answer:
+
+    python -m benchmarks.bench_search --searches 200 --concurrency 8 --slow-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from unittest import mock
+from benchmarks.bench_resilience import percentile
+from benchmarks.fakes import StubSearchProvider
+from src.core.logger import logger
+
+
+async def run(args, strategy: str, fallback_timeout: float = 0.0, providers: int = 2, deadline: float = None, settings: dict = None) -> dict:
+    from src.core import resilience
+    from src.servers.search_providers import SearchRouter
+
+    env = {"SAQR_PRIMARY_BACKOFF": "0.05", "SAQR_SECONDARY_BACKOFF": "0.05", **(settings or {})}
+    if fallback_timeout:
+        # give up on a slow primary early and let the secondary answer
+        env.update({"SAQR_PRIMARY_TIMEOUT": str(fallback_timeout), "SAQR_PRIMARY_RETRIES": "0"})
+    with mock.patch.dict(os.environ, env):
+        resilience._instances.clear()
+        stubs = [
+            StubSearchProvider(
+                "primary", latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                error_rate=args.error_rate, seed=1,
+            ),
+            StubSearchProvider("secondary", latency=args.latency * 2, offset=2, seed=2),
+        ][:providers]
+        router = SearchRouter(stubs, strategy=strategy, max_results=5, deadline=deadline)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, counts, errors = [], [], 0
+
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    results = await router.search(f"query number {i}")
+                except Exception:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                counts.append(len(results))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.searches)))
+        elapsed = time.perf_counter() - start
+        stats = router.as_dict()
+    return {
+        "success_rate": round(len(latencies) / args.searches, 4),
+        "seconds": round(elapsed, 3),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "results_per_search": round(sum(counts) / len(counts), 2) if counts else 0,
+        "duplicates_merged": stats["duplicates_merged"],
+        "wins": {name: provider["wins"] for name, provider in stats["providers"].items()},
+        "upstream_calls": sum(provider["calls"] for provider in stats["providers"].values()),
+    }
+
+
+async def main(args) -> None:
+    logger.remove()
+    results = {"searches": args.searches, "concurrency": args.concurrency, "slow_rate": args.slow_rate, "error_rate": args.error_rate}
+    results["primary_only"] = await run(args, "fallback", providers=1)
+    results["fallback"] = await run(args, "fallback")
+    results["fallback_with_timeout"] = await run(args, "fallback", fallback_timeout=args.latency * 4)
+    results["fallback_with_deadline"] = await run(args, "fallback", deadline=args.latency * 8)
+    results["race"] = await run(args, "race")
+    results["fanout"] = await run(args, "fanout")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-latency", type=float, default=1.5)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,56 @@
+"""Server cold start: spawn -> initialize -> list_tools over stdio.
+
+API keys are blanked, so any network call made during startup shows up as a
+failure or a hang instead of a slow number.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+SERVER = os.path.join(os.path.dirname(__file__), "..", "src", "servers", "saqr_server.py")
+
+
+async def measure_once(timeout: float) -> dict:
+    env = {**os.environ, "TAVILY_API_KEY": "", "MEM0_API_KEY": "", "GROQ_API_KEY": ""}
+    params = StdioServerParameters(command=sys.executable, args=[os.path.abspath(SERVER)], env=env)
+
+    start = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await asyncio.wait_for(session.initialize(), timeout)
+            initialized = time.perf_counter()
+            tools = await asyncio.wait_for(session.list_tools(), timeout)
+            listed = time.perf_counter()
+
+    return {
+        "initialize_seconds": initialized - start,
+        "list_tools_seconds": listed - start,
+        "tools": len(tools.tools),
+    }
+
+
+async def main(runs: int, timeout: float) -> None:
+    samples = [await measure_once(timeout) for _ in range(runs)]
+    print(json.dumps({
+        "runs": runs,
+        "tools": samples[-1]["tools"],
+        "initialize_p50": round(statistics.median(s["initialize_seconds"] for s in samples), 4),
+        "list_tools_p50": round(statistics.median(s["list_tools_seconds"] for s in samples), 4),
+        "list_tools_max": round(max(s["list_tools_seconds"] for s in samples), 4),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.timeout))
@@ -0,0 +1,88 @@
+"""Throughput of the Saqr server tools under N concurrent call_tool requests.
+
+Tavily and mem0 are replaced by fakes with a fixed latency, so the numbers only
+reflect how well the server overlaps in-flight calls.
+
+    python -m benchmarks.bench_tool_concurrency --latency 0.2 --concurrency 1 4 16 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+
+class FakeTavily:
+    latency = 0.2
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def search(self, query, **kwargs):
+        await asyncio.sleep(self.latency)
+        return {"results": [{"title": query, "url": "https://example.com", "content": "fake"}]}
+
+
+class FakeMem0:
+    latency = 0.2
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def update_project(self, **kwargs):
+        pass
+
+    def add(self, messages, **kwargs):
+        time.sleep(self.latency)
+        return {"results": []}
+
+    def search(self, query, **kwargs):
+        time.sleep(self.latency)
+        return {"results": [{"memory": query}]}
+
+    def get_all(self, **kwargs):
+        time.sleep(self.latency)
+        return {"results": [{"memory": "fake"}]}
+
+
+async def run_round(mcp, tool: str, arguments: dict, n: int) -> dict:
+    # unique queries per call so the web_search cache does not short-circuit the round
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        mcp.call_tool(tool, {**arguments, "query": f"{arguments['query']} {n}-{i}"}) for i in range(n)
+    ))
+    elapsed = time.perf_counter() - start
+    return {"tool": tool, "concurrency": n, "seconds": round(elapsed, 4), "calls_per_sec": round(n / elapsed, 2)}
+
+
+async def main(latency: float, levels: list[int]) -> None:
+    FakeTavily.latency = latency
+    FakeMem0.latency = latency
+    # clients are created lazily on first call, so keep the fakes patched for the whole run
+    with mock.patch("tavily.AsyncTavilyClient", FakeTavily), mock.patch("mem0.MemoryClient", FakeMem0):
+        from src.servers import saqr_server
+
+        scenarios = [
+            ("web_search", {"query": "saqr"}),
+            ("search_memories", {"query": "saqr"}),
+        ]
+        for tool, arguments in scenarios:
+            for n in levels:
+                print(json.dumps(await run_round(saqr_server.mcp, tool, arguments, n)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--tool-limit", type=int, default=None, help="override SAQR_TOOL_CONCURRENCY")
+    parser.add_argument("--workers", type=int, default=None, help="override SAQR_MAX_WORKERS")
+    args = parser.parse_args()
+    os.environ.setdefault("SAQR_STATE_DIR", tempfile.mkdtemp())
+    if args.tool_limit:
+        os.environ["SAQR_TOOL_CONCURRENCY"] = str(args.tool_limit)
+    if args.workers:
+        os.environ["SAQR_MAX_WORKERS"] = str(args.workers)
+    asyncio.run(main(args.latency, args.concurrency))
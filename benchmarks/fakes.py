@@ -0,0 +1,369 @@
+"""Local stand-ins for Ollama, Groq, Tavily and mem0 on a single HTTP port.
+
+The fake LLMs follow a fixed script so runs are reproducible. A user turn answers
+with two parallel tool calls (`web_search` + `search_memories`), and a turn that
+ends with tool results answers with a streamed final text. Latency and payload
+sizes are configurable per service. Groq and Tavily can also be made to fail
+with 429s (`error_rate`) or to answer some requests slowly (`slow_rate`). The fake
+Ollama "loads" its model on the first request and whenever `keep_alive` expired or
+`num_ctx` changed, taking `model_load_latency` seconds. `StubSearchProvider` is
+an in-process search provider for exercising the `web_search` strategies.
+
+    python -m benchmarks.fakes --port 11500 --llm-latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from src.servers.search_providers import SearchProvider
+
+
+@dataclass
+class FakeConfig:
+    llm_latency: float = 0.05
+    token_latency: float = 0.002
+    answer_tokens: int = 64
+    search_latency: float = 0.1
+    search_results: int = 5
+    search_payload_bytes: int = 2000
+    memory_latency: float = 0.05
+    memories: int = 5
+    error_rate: float = 0.0
+    retry_after: float = 0.05
+    slow_rate: float = 0.0
+    slow_latency: float = 1.0
+    model_load_latency: float = 0.0
+    seed: int = 0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def scripted_tool_calls(messages: list[dict]) -> list[dict]:
+    """Tool calls for the next assistant turn; empty means answer with text"""
+    # injected context (e.g. prefetched memories) does not change the script
+    turns = [m for m in messages if m.get("role") != "system"]
+    last = turns[-1] if turns else {}
+    if last.get("role") == "user":
+        query = str(last.get("content", ""))[:200]
+        return [
+            {"name": "web_search", "arguments": {"query": query}},
+            {"name": "search_memories", "arguments": {"query": query}},
+        ]
+    return []
+
+
+def build_app(config: FakeConfig) -> Starlette:
+    rng = random.Random(config.seed)
+    sent = {"requests": 0}
+    model = {"loaded_until": 0.0, "num_ctx": None, "lock": asyncio.Lock()}
+
+    def keep_alive_seconds(value) -> float:
+        if value is None:
+            return 300.0
+        if isinstance(value, str):
+            units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+            unit = next((u for u in ("ms", "s", "m", "h") if value.endswith(u)), "")
+            value = float(value[:len(value) - len(unit)]) * units.get(unit, 1)
+        return float("inf") if value < 0 else float(value)
+
+    async def load_model(body: dict) -> float:
+        """Seconds spent loading the model for this request, like Ollama's load_duration"""
+        num_ctx = (body.get("options") or {}).get("num_ctx")
+        async with model["lock"]:
+            load = 0.0
+            if time.monotonic() >= model["loaded_until"] or num_ctx != model["num_ctx"]:
+                await asyncio.sleep(config.model_load_latency)
+                load = config.model_load_latency
+                model["num_ctx"] = num_ctx
+            model["loaded_until"] = time.monotonic() + keep_alive_seconds(body.get("keep_alive"))
+        return load
+
+    def rate_limit_headers() -> dict:
+        sent["requests"] += 1
+        return {
+            "x-ratelimit-limit-requests": "14400",
+            "x-ratelimit-remaining-requests": str(max(0, 14400 - sent["requests"])),
+            "x-ratelimit-reset-requests": "2m59.56s",
+            "x-ratelimit-limit-tokens": "1000000",
+            "x-ratelimit-remaining-tokens": "999000",
+            "x-ratelimit-reset-tokens": "60ms",
+        }
+
+    async def faulty(latency: float):
+        """A 429 response for `error_rate` of the requests, after a normal or slow delay"""
+        await asyncio.sleep(config.slow_latency if rng.random() < config.slow_rate else latency)
+        if rng.random() < config.error_rate:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"},
+                 "detail": {"error": "Rate limit reached"}},
+                status_code=429,
+                headers={**rate_limit_headers(), "retry-after": str(config.retry_after)},
+            )
+        return None
+
+    async def ollama_generate(request: Request):
+        body = await request.json()
+        load = await load_model(body)
+        return JSONResponse({
+            "model": body["model"],
+            "created_at": "1970-01-01T00:00:00Z",
+            "response": "",
+            "done": True,
+            "done_reason": "load",
+            "load_duration": int(load * 1e9),
+        })
+
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        calls = scripted_tool_calls(body.get("messages", []))
+        load = await load_model(body)
+        await asyncio.sleep(config.llm_latency)
+
+        async def stream():
+            start = time.perf_counter()
+            if calls:
+                message = {"role": "assistant", "content": "", "tool_calls": [{"function": call} for call in calls]}
+                yield json.dumps({"model": body["model"], "created_at": "1970-01-01T00:00:00Z", "message": message, "done": False}) + "\n"
+                eval_count = 16
+            else:
+                for i in range(config.answer_tokens):
+                    await asyncio.sleep(config.token_latency)
+                    message = {"role": "assistant", "content": f"token{i} "}
+                    yield json.dumps({"model": body["model"], "created_at": "1970-01-01T00:00:00Z", "message": message, "done": False}) + "\n"
+                eval_count = config.answer_tokens
+            elapsed = int((time.perf_counter() - start) * 1e9)
+            yield json.dumps({
+                "model": body["model"],
+                "created_at": "1970-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": ""},
+                "done": True,
+                "done_reason": "stop",
+                "total_duration": elapsed + int((config.llm_latency + load) * 1e9),
+                "load_duration": int(load * 1e9),
+                "prompt_eval_count": sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4,
+                "prompt_eval_duration": int(config.llm_latency * 1e9),
+                "eval_count": eval_count,
+                "eval_duration": elapsed,
+            }) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    async def groq_chat(request: Request):
+        body = await request.json()
+        calls = scripted_tool_calls(body.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:8]}"
+        failure = await faulty(config.llm_latency)
+        if failure is not None:
+            return failure
+
+        def chunk(delta: dict, finish: str = None, usage: dict = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if usage:
+                payload["x_groq"] = {"id": completion_id, "usage": usage, "error": None}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+            if calls:
+                yield chunk({"role": "assistant", "tool_calls": [{
+                    "index": i,
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call["arguments"])},
+                } for i, call in enumerate(calls)]})
+                completion_tokens = 16
+                finish = "tool_calls"
+            else:
+                for i in range(config.answer_tokens):
+                    await asyncio.sleep(config.token_latency)
+                    yield chunk({"content": f"token{i} "})
+                completion_tokens = config.answer_tokens
+                finish = "stop"
+            yield chunk({}, finish, usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            })
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers=rate_limit_headers())
+
+    async def tavily_search(request: Request):
+        body = await request.json()
+        failure = await faulty(config.search_latency)
+        if failure is not None:
+            return failure
+        content = ("lorem ipsum " * (config.search_payload_bytes // 12 + 1))[:config.search_payload_bytes]
+        return JSONResponse({
+            "query": body.get("query"),
+            "results": [
+                {"title": f"Result {i}", "url": f"https://example.com/{i}", "content": content, "score": 1 - i / 10}
+                for i in range(config.search_results)
+            ],
+            "response_time": config.search_latency,
+        })
+
+    def memory_results(query: str) -> dict:
+        return {"results": [
+            {"id": str(i), "memory": f"memory {i} about {query}"[:200], "score": 1 - i / 10}
+            for i in range(config.memories)
+        ]}
+
+    async def mem0_ping(request: Request):
+        return JSONResponse({"status": "ok", "org_id": "org", "project_id": "project", "user_email": "bench@example.com"})
+
+    async def mem0_project(request: Request):
+        return JSONResponse({"message": "updated"})
+
+    async def mem0_add(request: Request):
+        await asyncio.sleep(config.memory_latency)
+        return JSONResponse({"results": [{"id": uuid.uuid4().hex, "event": "ADD"}]})
+
+    async def mem0_list(request: Request):
+        await asyncio.sleep(config.memory_latency)
+        return JSONResponse(memory_results("everything"))
+
+    async def mem0_search(request: Request):
+        body = await request.json()
+        await asyncio.sleep(config.memory_latency)
+        return JSONResponse(memory_results(body.get("query", "")))
+
+    return Starlette(routes=[
+        Route("/api/chat", ollama_chat, methods=["POST"]),
+        Route("/api/generate", ollama_generate, methods=["POST"]),
+        Route("/openai/v1/chat/completions", groq_chat, methods=["POST"]),
+        Route("/search", tavily_search, methods=["POST"]),
+        Route("/v1/ping/", mem0_ping, methods=["GET"]),
+        Route("/api/v1/orgs/organizations/{org}/projects/{project}/", mem0_project, methods=["PATCH"]),
+        Route("/v1/memories/", mem0_add, methods=["POST"]),
+        Route("/v1/memories/", mem0_list, methods=["GET"]),
+        Route("/v2/memories/", mem0_list, methods=["POST"]),
+        Route("/v1/memories/search/", mem0_search, methods=["POST"]),
+        Route("/v2/memories/search/", mem0_search, methods=["POST"]),
+    ])
+
+
+def fake_env(base_url: str) -> dict[str, str]:
+    """Environment that points every SDK used by Saqr at the fakes"""
+    return {
+        "OLLAMA_HOST": base_url,
+        "OLLAMA_MODEL_NAME": "fake-ollama",
+        "GROQ_BASE_URL": base_url,
+        "GROQ_API_KEY": "fake",
+        "GROQ_MODEL_NAME": "fake-groq",
+        "TAVILY_BASE_URL": base_url,
+        "TAVILY_API_KEY": "fake",
+        # keep web_search off the real DuckDuckGo when the fake Tavily fails
+        "SAQR_SEARCH_PROVIDERS": "tavily",
+        "MEM0_HOST": base_url,
+        "MEM0_API_KEY": "fake",
+        "MEM0_TELEMETRY": "False",
+    }
+
+
+class FakeServices:
+    """Runs the fake services in a background thread"""
+
+    def __init__(self, config: FakeConfig = None, port: int = None):
+        import uvicorn
+
+        self.config = config or FakeConfig()
+        self.port = port or free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            build_app(self.config), host="127.0.0.1", port=self.port, log_level="warning",
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "FakeServices":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class StubSearchProvider(SearchProvider):
+    """Search provider answering from a fixed URL pool after a random latency.
+
+    `slow_rate` of the searches take `slow_latency` seconds and `error_rate` of them
+    fail with a timeout. Providers built with the same `pool` return overlapping
+    URLs, shifted by `offset`, so merging has duplicates to remove.
+    """
+
+    def __init__(
+        self, name: str, latency: float = 0.05, slow_rate: float = 0.0, slow_latency: float = 1.0,
+        error_rate: float = 0.0, pool: int = 20, offset: int = 0, seed: int = 0, **limits,
+    ):
+        self.name = name
+        super().__init__(**limits)
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.pool = pool
+        self.offset = offset
+        self.random = random.Random(seed)
+
+    async def _search(self, query, limit):
+        slow = self.random.random() < self.slow_rate
+        failed = self.random.random() < self.error_rate
+        await asyncio.sleep(self.slow_latency if slow else self.latency * self.random.uniform(0.5, 1.5))
+        if failed:
+            raise TimeoutError(f"{self.name} stub timed out")
+        start = (sum(map(ord, query)) + self.offset) % self.pool
+        return [
+            {"title": f"Result {n}", "url": f"https://www.example.com/page/{n}?utm_source={self.name}", "content": f"{self.name} snippet {n}"}
+            for n in ((start + i) % self.pool for i in range(limit))
+        ]
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--llm-latency", type=float, default=FakeConfig.llm_latency)
+    parser.add_argument("--search-latency", type=float, default=FakeConfig.search_latency)
+    parser.add_argument("--memory-latency", type=float, default=FakeConfig.memory_latency)
+    parser.add_argument("--search-payload-bytes", type=int, default=FakeConfig.search_payload_bytes)
+    parser.add_argument("--error-rate", type=float, default=FakeConfig.error_rate, help="share of Groq/Tavily requests failing with 429")
+    parser.add_argument("--slow-rate", type=float, default=FakeConfig.slow_rate, help="share of Groq/Tavily requests taking --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=FakeConfig.slow_latency)
+    parser.add_argument("--model-load-latency", type=float, default=FakeConfig.model_load_latency)
+    args = parser.parse_args()
+    config = FakeConfig(
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        memory_latency=args.memory_latency,
+        search_payload_bytes=args.search_payload_bytes,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        model_load_latency=args.model_load_latency,
+    )
+    for key, value in fake_env(f"http://127.0.0.1:{args.port}").items():
+        print(f"{key}={value}")
+    uvicorn.run(build_app(config), host="127.0.0.1", port=args.port, log_level="warning")
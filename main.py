@@ -1,22 +1,19 @@
-from src.clients.ollama_client import SaqrMCPClient
+from src.clients.client import SaqrMCPClient, default_backend
+from src.clients.launcher import connect
+from src.clients.providers import PROVIDERS
+import argparse
 import asyncio
 
-async def main():
-    client = SaqrMCPClient()
+async def main(backend: str):
+    client = SaqrMCPClient(backend)
     try:
-        await client.connect_to_server(
-            args=[
-                "run",
-                "--with",
-                "mcp",
-                "mcp",
-                "run",
-                "src\\servers\\saqr_server.py"
-            ]
-        )
+        await connect(client)
         await client.chat_loop()
     finally:
         await client.cleanup()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chat with the Saqr MCP server")
+    parser.add_argument("--backend", choices=sorted(PROVIDERS), default=default_backend(), help="LLM backend (default: SAQR_BACKEND or ollama)")
+    args = parser.parse_args()
+    asyncio.run(main(args.backend))
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+from src.core.cache import normalize_query
+from src.core.config import env_bool, env_float, env_int, env_str
+from src.core.embedding import Embedder
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+
+def _numbers(text: str) -> list[str]:
+    return re.findall(r"\d+", text)
+
+
+@dataclass
+class AnswerCacheStats:
+    lookups: int = 0
+    hits: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expired: int = 0
+    seconds_saved: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            **self.__dict__,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    tools_used: list[str] = field(default_factory=list)
+    latency: float = 0.0
+    similarity: float = 1.0
+
+
+def cache_scope(*parts: str) -> str:
+    """Answers are only reused within one scope, e.g. the same backend, model and tool set"""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def answer_key(query: str) -> str:
+    """Exact-match form of a question: case, whitespace and trailing punctuation do not count"""
+    return normalize_query(query).rstrip(" ?!.")
+
+
+class AnswerCache:
+    """Cache of whole answers, opt-in with `SAQR_ANSWER_CACHE=true`.
+
+    By default a lookup only hits when the normalized question (`answer_key`) was
+    answered before in the same scope. Fuzzy matching needs an embedder whose
+    vectors reflect meaning (`semantic`) and a `SAQR_ANSWER_CACHE_THRESHOLD`
+    calibrated for it; the lookup then takes the most similar live entry of the
+    scope in one matrix product, and a hit also needs the same numbers in both
+    questions, since embeddings barely tell 2019 from 2024. The offline
+    `HashingEmbedder` only measures word overlap, so it never enables fuzzy hits.
+
+    Answers that needed tools expire after `SAQR_ANSWER_CACHE_TOOL_TTL` seconds,
+    pure model answers after `SAQR_ANSWER_CACHE_TTL`. At most
+    `SAQR_ANSWER_CACHE_SIZE` entries are kept, and the least recently used one is
+    evicted. With `SAQR_ANSWER_CACHE_PATH`, entries are also stored in SQLite and
+    survive restarts.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        path: Optional[str] = None,
+        threshold: Optional[float] = None,
+        ttl: Optional[float] = None,
+        tool_ttl: Optional[float] = None,
+        maxsize: Optional[int] = None,
+        embedder: Optional[Embedder] = None,
+    ):
+        self.enabled = env_bool("SAQR_ANSWER_CACHE", False) if enabled is None else enabled
+        self.threshold = threshold if threshold is not None else env_float("SAQR_ANSWER_CACHE_THRESHOLD")
+        self.ttl = ttl if ttl is not None else env_float("SAQR_ANSWER_CACHE_TTL", 86400.0)
+        self.tool_ttl = tool_ttl if tool_ttl is not None else env_float("SAQR_ANSWER_CACHE_TOOL_TTL", 900.0)
+        self.maxsize = maxsize or env_int("SAQR_ANSWER_CACHE_SIZE", 1024)
+        self.embedder = embedder
+        self.fuzzy = self.threshold is not None and embedder is not None and embedder.semantic
+        if self.enabled and self.threshold is not None and not self.fuzzy:
+            logger.warning("SAQR_ANSWER_CACHE_THRESHOLD needs a semantic embedder; the answer cache only serves exact matches")
+        self.stats = AnswerCacheStats()
+        # one slot per entry; free slots have expires == 0
+        self._vectors = np.zeros((self.maxsize, embedder.dim) if self.fuzzy else (0, 0), dtype=np.float32)
+        self._expires = np.zeros(self.maxsize, dtype=np.float64)
+        self._last_used = np.zeros(self.maxsize, dtype=np.float64)
+        self._scopes = np.zeros(self.maxsize, dtype=np.int64)
+        self._entries: list[Optional[CachedAnswer]] = [None] * self.maxsize
+        self._keys: list[Optional[str]] = [None] * self.maxsize
+        self._slots: dict[str, int] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        path = path or env_str("SAQR_ANSWER_CACHE_PATH")
+        if self.enabled and path:
+            self._open(path)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._expires > time.time()))
+
+    @staticmethod
+    def _scope_id(scope: str) -> int:
+        return zlib.crc32(scope.encode("utf-8"))
+
+    def _embed(self, normalized: str, stored: bytes = b"") -> np.ndarray:
+        if not self.fuzzy:
+            return np.zeros(0, dtype=np.float32)
+        vector = np.frombuffer(stored, dtype=np.float32)
+        return vector if len(vector) == self.embedder.dim else self.embedder.embed(normalized)
+
+    def _open(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, scope TEXT NOT NULL, query TEXT NOT NULL, "
+            "embedding BLOB NOT NULL, answer TEXT NOT NULL, tools TEXT NOT NULL, latency REAL NOT NULL, "
+            "expires REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM answers WHERE expires < ?", (time.time(),))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT key, scope, query, embedding, answer, tools, latency, expires, last_used FROM answers "
+            "ORDER BY last_used DESC LIMIT ?", (self.maxsize,),
+        ).fetchall()
+        for slot, (key, scope, query, embedding, answer, tools, latency, expires, last_used) in enumerate(rows):
+            vector = self._embed(answer_key(query), embedding)
+            self._fill(slot, key, scope, vector, CachedAnswer(query, answer, json.loads(tools), latency), expires, last_used)
+
+    def _fill(self, slot: int, key: str, scope: str, vector: np.ndarray, entry: CachedAnswer, expires: float, last_used: float) -> None:
+        if self.fuzzy:
+            self._vectors[slot] = vector
+        self._expires[slot] = expires
+        self._last_used[slot] = last_used
+        self._scopes[slot] = self._scope_id(scope)
+        self._entries[slot] = entry
+        self._keys[slot] = key
+        self._slots[key] = slot
+
+    def _free(self, slot: int) -> None:
+        key = self._keys[slot]
+        if key is not None:
+            self._slots.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._db.commit()
+        self._expires[slot] = 0.0
+        self._entries[slot] = None
+        self._keys[slot] = None
+
+    def _match(self, query: str, scope: str, now: float) -> tuple[Optional[int], float]:
+        """Slot of the cached question that answers `query`, and its similarity"""
+        normalized = answer_key(query)
+        slot = self._slots.get(cache_scope(scope, normalized))
+        if slot is not None and self._expires[slot] > now:
+            return slot, 1.0
+        if not self.fuzzy:
+            return None, 0.0
+        live = (self._expires > now) & (self._scopes == self._scope_id(scope))
+        if not live.any():
+            return None, 0.0
+        scores = np.where(live, self._vectors @ self.embedder.embed(normalized), -np.inf)
+        slot = int(np.argmax(scores))
+        if scores[slot] < self.threshold or _numbers(self._entries[slot].query) != _numbers(query):
+            return None, 0.0
+        return slot, float(scores[slot])
+
+    def lookup(self, query: str, scope: str) -> Optional[CachedAnswer]:
+        """The cached answer of the same question in `scope` (or, with a semantic embedder, a close enough one)"""
+        if not self.enabled:
+            return None
+        self.stats.lookups += 1
+        metrics.inc("saqr_answer_cache_lookups_total")
+        now = time.time()
+        slot, similarity = self._match(query, scope, now)
+        if slot is None:
+            return None
+        entry = self._entries[slot]
+        self._last_used[slot] = now
+        if self._db is not None:
+            self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, self._keys[slot]))
+            self._db.commit()
+        self.stats.hits += 1
+        self.stats.seconds_saved += entry.latency
+        metrics.inc("saqr_answer_cache_hits_total")
+        metrics.inc("saqr_answer_cache_seconds_saved_total", entry.latency)
+        return CachedAnswer(entry.query, entry.answer, entry.tools_used, entry.latency, similarity)
+
+    def store(self, query: str, scope: str, answer: str, tools_used: list[str], latency: float) -> None:
+        if not self.enabled or not answer:
+            return
+        now = time.time()
+        normalized = answer_key(query)
+        key = cache_scope(scope, normalized)
+        if key in self._slots:
+            slot = self._slots[key]
+        else:
+            expired = np.flatnonzero((self._expires > 0) & (self._expires <= now))
+            self.stats.expired += len(expired)
+            for stale in expired:
+                self._free(int(stale))
+            free = np.flatnonzero(self._expires == 0)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.stats.evictions += 1
+                self._free(slot)
+
+        tools_used = sorted(set(tools_used))
+        expires = now + (self.tool_ttl if tools_used else self.ttl)
+        vector = self._embed(normalized)
+        self._fill(slot, key, scope, vector, CachedAnswer(query, answer, tools_used, latency), expires, now)
+        self.stats.stores += 1
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (key, scope, query, embedding, answer, tools, latency, expires, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, query, vector.astype(np.float32).tobytes(), answer, json.dumps(tools_used), latency, expires, now),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
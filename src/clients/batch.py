@@ -0,0 +1,100 @@
+"""Headless batch runner: many queries through one server session.
+
+Reads queries from a JSONL file (or stdin with `-`), runs each in its own
+conversation context with bounded concurrency, and streams one JSON result per
+line as queries finish.
+
+    python -m src.clients.batch --backend groq --input queries.jsonl --output results.jsonl --concurrency 4
+
+Each input line is either a JSON object with a `query` field (and optional `id`)
+or a bare JSON string.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import IO, Iterable, Iterator
+from src.clients.client import SaqrMCPClient, default_backend
+from src.clients.launcher import connect
+from src.clients.providers import PROVIDERS
+from src.core.config import env_int
+from src.core.logger import LoadingAnimation, logger
+
+def read_queries(stream: IO[str]) -> Iterator[dict]:
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        if isinstance(item, str):
+            item = {"query": item}
+        item.setdefault("id", line_number)
+        yield item
+
+
+async def run_one(client, item: dict) -> dict:
+    conversation = client.fork()
+    start = time.perf_counter()
+    response = await conversation.process_query(item["query"])
+    latency = time.perf_counter() - start
+    stats = conversation.last_stats
+    return {
+        "id": item["id"],
+        "query": item["query"],
+        "response": response,
+        "latency_seconds": round(latency, 4),
+        **(stats.as_dict() if stats else {}),
+    }
+
+
+async def run_batch(client, items: Iterable[dict], output: IO[str], concurrency: int) -> int:
+    """Run every item and write results to `output` as they complete; returns the error count"""
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def bounded(item: dict) -> dict:
+        async with semaphore:
+            try:
+                return await run_one(client, item)
+            except Exception as e:
+                return {"id": item["id"], "query": item["query"], "error": str(e)}
+
+    for finished in asyncio.as_completed([bounded(item) for item in items]):
+        result = await finished
+        if result.get("error"):
+            errors += 1
+        output.write(json.dumps(result, default=str) + "\n")
+        output.flush()
+    return errors
+
+
+async def main(backend: str, input_path: str, output_path: str, concurrency: int) -> int:
+    LoadingAnimation.enabled = False
+    client = SaqrMCPClient(backend)
+    client.stream = False
+
+    input_stream = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    output_stream = sys.stdout if output_path == "-" else open(output_path, "w", encoding="utf-8")
+    try:
+        await connect(client)
+        errors = await run_batch(client, list(read_queries(input_stream)), output_stream, concurrency)
+        logger.info(f"Batch finished with {errors} failed queries")
+        return errors
+    finally:
+        await client.cleanup()
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queries through SaqrMCPClient without the interactive loop")
+    parser.add_argument("--backend", choices=sorted(PROVIDERS), default=default_backend())
+    parser.add_argument("--input", default="-", help="JSONL file of queries, - for stdin")
+    parser.add_argument("--output", default="-", help="JSONL results file, - for stdout")
+    parser.add_argument("--concurrency", type=int, default=env_int("SAQR_BATCH_CONCURRENCY", 4))
+    args = parser.parse_args()
+    failed = asyncio.run(main(args.backend, args.input, args.output, args.concurrency))
+    sys.exit(1 if failed else 0)
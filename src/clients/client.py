@@ -0,0 +1,249 @@
+import asyncio
+import copy
+import time
+from typing import Optional
+from contextlib import AsyncExitStack
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.sse import sse_client
+from dotenv import load_dotenv
+from src.core.logger import logger, loading_animation, streaming_output
+from src.core.config import env_bool, env_str
+from src.clients.tool_dispatch import ToolDispatcher, DispatchStats
+from src.clients.tool_cache import ToolCatalog
+from src.clients.providers import PROVIDERS, assistant_message, get_provider, close_providers
+from src.clients.history import ConversationHistory
+from src.clients.prefetch import MemoryPrefetcher
+from src.clients.result_shaping import ResultShaper
+from src.clients.answer_cache import AnswerCache, CachedAnswer, cache_scope
+from src.core.metrics import metrics
+from src.core.tracing import tracer
+
+_ = load_dotenv()
+
+
+def default_backend() -> str:
+    return env_str("SAQR_BACKEND", "ollama")
+
+
+class SaqrMCPClient:
+    """MCP client running the agent loop against any backend in `providers.PROVIDERS`.
+
+    The backend is picked by name (`SAQR_BACKEND` by default, "ollama" if unset);
+    everything backend-specific lives in its `LLMProvider`.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or default_backend()
+        if self.backend not in PROVIDERS:
+            raise ValueError(f"Unknown backend {self.backend!r}, expected one of: {', '.join(sorted(PROVIDERS))}")
+        self.session: Optional[ClientSession] = None
+        self.exit_stack = AsyncExitStack()
+        self.provider = get_provider(self.backend)
+        self.model = self.provider.model
+        self.stream = env_bool("SAQR_STREAM", True)
+        logger.info(f"Using model: {self.model}")
+        self.history = ConversationHistory()
+        self.dispatcher: Optional[ToolDispatcher] = None
+        self.last_stats: Optional[DispatchStats] = None
+        self.tool_catalog = ToolCatalog(self.backend)
+        self.prefetcher = MemoryPrefetcher()
+        self.shaper = ResultShaper()
+        self.answer_cache = AnswerCache()
+        self.warm_up: Optional[asyncio.Task] = None
+
+    def _start_warm_up(self) -> None:
+        """Load the model in the background while the server starts"""
+        if self.warm_up is None and env_bool(f"SAQR_{self.backend.upper()}_WARMUP", True):
+            self.warm_up = asyncio.create_task(self.provider.warm_up())
+            self.warm_up.add_done_callback(self._warm_up_done)
+
+    def _warm_up_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning(f"Could not preload {self.model}: {task.exception()}")
+        elif task.result() is not None:
+            logger.info(f"Model {self.model} loaded in {task.result():.2f}s")
+
+    async def connect_to_server(self, args: Optional[list[str]] = None, command: str = "uv", env: Optional[dict] = None) -> None:
+        """Connect to an MCP server"""
+        self._start_warm_up()
+
+        server_params = StdioServerParameters(
+            command=command,
+            args=args if args is not None else [],
+            env=env
+        )
+
+        studio_transport = await self.exit_stack.enter_async_context(
+            stdio_client(server_params)
+        )
+        await self._start_session(*studio_transport)
+
+    async def connect_to_sse_server(self, url: str) -> None:
+        """Connect to an already-running Saqr server over HTTP/SSE"""
+        self._start_warm_up()
+
+        # a failed attempt is closed here, so a fallback connection starts from a clean exit stack
+        async with AsyncExitStack() as attempt:
+            sse_transport = await attempt.enter_async_context(
+                sse_client(url)
+            )
+            await self._start_session(*sse_transport, stack=attempt)
+            await self.exit_stack.enter_async_context(attempt.pop_all())
+
+    async def _start_session(self, read_stream, write_stream, stack: Optional[AsyncExitStack] = None) -> None:
+        stack = stack or self.exit_stack
+        self.stdio, self.write = read_stream, write_stream
+        self.session = await stack.enter_async_context(
+            ClientSession(self.stdio, self.write, message_handler=self.tool_catalog.handle_message)
+        )
+
+        with loading_animation("Initializing server"):
+            await self.session.initialize()
+ 
+        logger.info("Connected to server")
+        self.dispatcher = ToolDispatcher(self.session, local_tools=self.shaper.local_tools())
+        await self.tool_catalog.refresh(self.session)
+        logger.info(f"Connected to server with tools: {', '.join(self.tool_catalog.names)}")
+
+    def fork(self) -> "SaqrMCPClient":
+        """A new conversation context sharing this client's server session, provider and tool cache"""
+        forked = copy.copy(self)
+        forked.history = ConversationHistory()
+        forked.last_stats = None
+        return forked
+
+    async def process_query(self, query: str) -> str:
+        """Process a query using the backend and available tools"""
+        with tracer.span("query", backend=self.backend), metrics.timer("saqr_query_seconds", backend=self.backend):
+            return await self._process_query(query)
+
+    def _answer_from_cache(self, query: str, cached: CachedAnswer) -> str:
+        self.history.append({"role": "user", "content": query})
+        self.history.append({"role": "assistant", "content": cached.answer})
+        self.last_stats = DispatchStats(cache_hit=True)
+        logger.info(
+            f"Answered from cache (similarity {cached.similarity:.3f} to {cached.query!r}), "
+            f"saved ~{cached.latency:.2f}s; cache stats: {self.answer_cache.stats.as_dict()}"
+        )
+        if self.stream:
+            with streaming_output("Processing query") as on_token:
+                on_token(cached.answer)
+        return cached.answer
+
+    async def _process_query(self, query: str) -> str:
+        # only standalone questions are cached; a follow-up depends on the conversation
+        standalone = not any(message.get("role") == "user" for message in self.history)
+        scope = cache_scope(self.provider.name, self.model or "", *self.tool_catalog.names)
+        if standalone:
+            cached = self.answer_cache.lookup(query, scope)
+            if cached is not None:
+                return self._answer_from_cache(query, cached)
+        start = time.perf_counter()
+
+        self.history.append({
+            "role": "user",
+            "content": query
+        })
+        prefetch = self.prefetcher.start(self.dispatcher, query)
+        
+        messages = self.history
+
+        available_tools = await self.tool_catalog.get(self.session) + self.shaper.tool_payload()
+        if self.warm_up is not None and not self.warm_up.done():
+            # the first query would queue behind the load anyway
+            with loading_animation(f"Loading {self.model}"):
+                await asyncio.wait({self.warm_up})
+
+        stats = DispatchStats()
+        stop = False
+        while not stop:
+            try:
+                memories = await self.prefetcher.context_message(prefetch, first_turn=stats.llm_calls == 0)
+                if memories:
+                    messages.append(memories)
+
+                saved = messages.compact()
+                if saved:
+                    stats.history_tokens_saved += saved
+                    logger.info(f"History compacted: saved {saved} tokens, prompt is now ~{messages.total_tokens} tokens")
+
+                with streaming_output("Processing query") as on_token:
+                    reply = await self.provider.chat(
+                        messages.render(self.provider),
+                        available_tools,
+                        on_token=on_token if self.stream else None,
+                    )
+
+                stats.record_llm(reply)
+                if not reply.tool_calls:
+                    messages.append({
+                        "role": "assistant",
+                        "content": reply.content,
+                    })
+                    stop = True
+                else:
+                    calls = reply.tool_calls
+                    messages.append(assistant_message(reply.content, calls))
+
+                    stats.record_turn(calls)
+                    names = ", ".join(call.name for call in calls)
+                    with loading_animation(f"Calling {names}"):
+                        outcomes = await self.prefetcher.dispatch(self.dispatcher, calls, prefetch)
+
+                    for outcome in outcomes:
+                        content, saved = self.shaper.shape(outcome)
+                        stats.result_tokens_saved += saved
+                        messages.append({
+                            "role": "tool",
+                            "tool_call_id": outcome.call.id,
+                            "name": outcome.call.name,
+                            "content": content,
+                        })
+
+            except Exception as e:
+                logger.error(f"Error processing query: {str(e)}")
+                stats.error = str(e)
+                stop = True
+
+        self.prefetcher.cancel(prefetch)
+        self.last_stats = stats
+        logger.info(f"Query stats: {stats.as_dict()}")
+        if prefetch is not None:
+            logger.info(f"Memory prefetch stats: {self.prefetcher.stats.as_dict()}")
+        answer = messages[-1]["content"]
+        if standalone and stats.error is None:
+            self.answer_cache.store(query, scope, answer, stats.tools_used, time.perf_counter() - start)
+        return answer
+    
+    async def chat_loop(self):
+        """Run an interactive chat loop"""
+        logger.info("MCP Client Started!")
+        logger.info("Type your queries or 'quit' to exit.")
+
+        while True:
+            try:
+                query = input("\nQuery: ").strip()
+
+                if query.lower() == 'quit':
+                    break
+
+                response = await self.process_query(query)
+                if not self.stream:
+                    print("\n" + response)
+
+            except Exception as e:
+                logger.error(f"\nError: {str(e)}")
+
+    async def cleanup(self):
+        """Clean up resources"""
+        if self.warm_up is not None:
+            self.warm_up.cancel()
+        await self.exit_stack.aclose()
+        await close_providers()
+        self.answer_cache.close()
+        metrics.dump()
+
+        
\ No newline at end of file
@@ -0,0 +1,168 @@
+import json
+from typing import Callable, Iterator, Optional, Protocol
+from src.core.config import env_int
+
+
+def estimate_tokens(message: dict) -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead)"""
+    text = message.get("content") or ""
+    if not isinstance(text, str):
+        text = str(text)
+    tokens = len(text) // 4 + 4
+    if message.get("tool_calls"):
+        tokens += len(json.dumps(message["tool_calls"], default=str)) // 4
+    return tokens
+
+
+class MessageFormat(Protocol):
+    name: str
+
+    def prepare_message(self, message: dict) -> dict: ...
+
+
+class ConversationHistory:
+    """Token-budgeted message list shared with the LLM provider.
+
+    Token counts are kept per message and updated incrementally on append. When the
+    total exceeds the budget, `compact()` first shortens old tool outputs, then folds
+    the oldest whole turns into a running summary message. The system prompt, the
+    summary and the most recent turns are never touched. Settings:
+
+        SAQR_HISTORY_TOKEN_BUDGET     prompt budget in tokens (default 6000)
+        SAQR_HISTORY_PINNED_TURNS     recent user turns kept verbatim (default 2)
+        SAQR_HISTORY_TOOL_CHARS       chars kept from an old tool output (default 400)
+
+    Messages are kept in the shared OpenAI chat format. `render(provider)` returns
+    them in the provider's format, converting only messages added or changed since
+    the last call, so a long tool loop does not rebuild the whole prompt each turn.
+    """
+
+    summary_header = "Summary of earlier conversation:"
+
+    def __init__(
+        self,
+        system_prompt: Optional[str] = None,
+        budget: Optional[int] = None,
+        pinned_turns: Optional[int] = None,
+        tool_chars: Optional[int] = None,
+        counter: Callable[[dict], int] = estimate_tokens,
+    ):
+        self.budget = budget or env_int("SAQR_HISTORY_TOKEN_BUDGET", 6000)
+        self.pinned_turns = max(1, pinned_turns or env_int("SAQR_HISTORY_PINNED_TURNS", 2))
+        self.tool_chars = tool_chars or env_int("SAQR_HISTORY_TOOL_CHARS", 400)
+        self.counter = counter
+        self.messages: list[dict] = []
+        self._tokens: list[int] = []
+        self.total_tokens = 0
+        self.tokens_saved = 0
+        self._prefix = 0
+        self._summary_lines: list[str] = []
+        # provider name -> converted messages, parallel to `messages` (None = not converted yet)
+        self._rendered: dict[str, list[Optional[dict]]] = {}
+        if system_prompt:
+            self.append({"role": "system", "content": system_prompt})
+            self._prefix = 1
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def append(self, message: dict) -> None:
+        tokens = self.counter(message)
+        self.messages.append(message)
+        self._tokens.append(tokens)
+        self.total_tokens += tokens
+        for rendered in self._rendered.values():
+            rendered.append(None)
+
+    def _replace(self, index: int, message: dict) -> None:
+        tokens = self.counter(message)
+        self.total_tokens += tokens - self._tokens[index]
+        self.messages[index] = message
+        self._tokens[index] = tokens
+        for rendered in self._rendered.values():
+            rendered[index] = None
+
+    def _delete(self, start: int, end: int) -> None:
+        self.total_tokens -= sum(self._tokens[start:end])
+        del self.messages[start:end]
+        del self._tokens[start:end]
+        for rendered in self._rendered.values():
+            del rendered[start:end]
+
+    def render(self, provider: MessageFormat) -> list[dict]:
+        """The messages in `provider`'s format; only new or changed messages are converted"""
+        rendered = self._rendered.setdefault(provider.name, [None] * len(self.messages))
+        for i, message in enumerate(rendered):
+            if message is None:
+                rendered[i] = provider.prepare_message(self.messages[i])
+        return list(rendered)
+
+    def _turn_starts(self) -> list[int]:
+        return [
+            i for i in range(self._prefix, len(self.messages))
+            if self.messages[i]["role"] == "user"
+        ]
+
+    def _shrink_tool_outputs(self, end: int) -> None:
+        for i in range(self._prefix, end):
+            if self.total_tokens <= self.budget:
+                return
+            message = self.messages[i]
+            content = str(message.get("content") or "")
+            if message["role"] == "tool" and len(content) > self.tool_chars:
+                shortened = dict(message)
+                shortened["content"] = f"{content[:self.tool_chars]} ...[truncated {len(content) - self.tool_chars} chars]"
+                self._replace(i, shortened)
+
+    def _summarize(self, messages: list[dict]) -> None:
+        for message in messages:
+            content = str(message.get("content") or "").strip().replace("\n", " ")
+            if message["role"] in ("user", "assistant") and content:
+                self._summary_lines.append(f"- {message['role']}: {content[:160]}")
+        self._summary_lines = self._summary_lines[-20:]
+        summary = {"role": "system", "content": "\n".join([self.summary_header, *self._summary_lines])}
+
+        has_summary = self._prefix > 0 and self.messages[self._prefix - 1].get("content", "").startswith(self.summary_header)
+        if has_summary:
+            self._replace(self._prefix - 1, summary)
+        else:
+            tokens = self.counter(summary)
+            self.messages.insert(self._prefix, summary)
+            self._tokens.insert(self._prefix, tokens)
+            for rendered in self._rendered.values():
+                rendered.insert(self._prefix, None)
+            self.total_tokens += tokens
+            self._prefix += 1
+
+    def compact(self) -> int:
+        """Bring the history under budget and return the number of tokens saved"""
+        if self.total_tokens <= self.budget:
+            return 0
+
+        before = self.total_tokens
+        turn_starts = self._turn_starts()
+        if len(turn_starts) <= self.pinned_turns:
+            return 0
+
+        self._shrink_tool_outputs(turn_starts[-self.pinned_turns])
+
+        while self.total_tokens > self.budget:
+            turn_starts = self._turn_starts()
+            if len(turn_starts) <= self.pinned_turns:
+                break
+            start, end = self._prefix, turn_starts[1] if len(turn_starts) > 1 else turn_starts[0]
+            if end <= start:
+                break
+            evicted = self.messages[start:end]
+            self._delete(start, end)
+            self._summarize(evicted)
+
+        saved = max(0, before - self.total_tokens)
+        self.tokens_saved += saved
+        return saved
@@ -0,0 +1,23 @@
+from src.core.config import env_str
+from src.core.logger import logger
+
+SERVER_ARGS = [
+    "run",
+    "--with",
+    "mcp",
+    "mcp",
+    "run",
+    "src\\servers\\saqr_server.py"
+]
+
+
+async def connect(client) -> None:
+    """Reuse a running server when SAQR_SERVER_URL is set, otherwise spawn one over stdio"""
+    server_url = env_str("SAQR_SERVER_URL")
+    if server_url:
+        try:
+            await client.connect_to_sse_server(server_url)
+            return
+        except Exception as e:
+            logger.warning(f"Could not reach {server_url} ({e}), starting a local server")
+    await client.connect_to_server(args=SERVER_ARGS)
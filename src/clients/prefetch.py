@@ -0,0 +1,154 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Optional
+from mcp import types
+from src.clients.tool_dispatch import ToolCall, ToolDispatcher, ToolOutcome
+from src.core.cache import normalize_query
+from src.core.config import env_bool, env_float
+from src.core.logger import logger
+
+MEMORY_TOOL = "search_memories"
+
+
+@dataclass
+class PrefetchStats:
+    """Counters across all queries of one client.
+
+    `model_request_rate` is the share of prefetches where the model still called
+    `search_memories` itself, i.e. how often it would have asked for it anyway.
+    """
+    prefetches: int = 0
+    ready_in_time: int = 0
+    injected: int = 0
+    memories_injected: int = 0
+    below_cutoff: int = 0
+    model_requested: int = 0
+    served_from_prefetch: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            **self.__dict__,
+            "model_request_rate": round(self.model_requested / self.prefetches, 3) if self.prefetches else 0.0,
+        }
+
+
+class Prefetch:
+    """One in-flight `search_memories` call started when the user submitted the query"""
+
+    def __init__(self, query: str, task: "asyncio.Task[ToolOutcome]"):
+        self.query = query
+        self.task = task
+        self.used = False
+        self.requested = False
+
+    def memories(self) -> list[dict]:
+        """Scored memories from the finished call; raises if the call failed"""
+        outcome = self.task.result()
+        if outcome.error is not None or outcome.result is None or outcome.result.isError:
+            raise RuntimeError(outcome.error or "search_memories failed")
+        text = "".join(c.text for c in outcome.result.content if isinstance(c, types.TextContent))
+        memories = json.loads(text)
+        if not isinstance(memories, list):
+            raise RuntimeError(str(memories))
+        return memories
+
+    def matches(self, call: ToolCall) -> bool:
+        """Whether `call` asks for exactly what was prefetched"""
+        return (
+            call.name == MEMORY_TOOL
+            and not call.arguments.get("memory_type")
+            and not call.arguments.get("include_scores")
+            and normalize_query(str(call.arguments.get("query", ""))) == normalize_query(self.query)
+        )
+
+
+class MemoryPrefetcher:
+    """Runs `search_memories` for every query while the first model call is being prepared.
+
+    Results scoring at least `SAQR_MEMORY_PREFETCH_MIN_SCORE` are injected as a system
+    message before the first model call if they arrive within
+    `SAQR_MEMORY_PREFETCH_WAIT` seconds, otherwise before the next one. When the model
+    still calls `search_memories` with the same query, the call is answered from the
+    prefetch instead of going back to the server.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, min_score: Optional[float] = None, wait: Optional[float] = None):
+        self.enabled = env_bool("SAQR_MEMORY_PREFETCH", False) if enabled is None else enabled
+        self.min_score = min_score if min_score is not None else env_float("SAQR_MEMORY_PREFETCH_MIN_SCORE", 0.3)
+        self.wait = wait if wait is not None else env_float("SAQR_MEMORY_PREFETCH_WAIT", 0.25)
+        self.stats = PrefetchStats()
+
+    def start(self, dispatcher: ToolDispatcher, query: str) -> Optional[Prefetch]:
+        if not self.enabled or dispatcher is None:
+            return None
+        self.stats.prefetches += 1
+        call = ToolCall(id="prefetch", name=MEMORY_TOOL, arguments={"query": query, "include_scores": True})
+        return Prefetch(query, asyncio.create_task(self._fetch(dispatcher, call)))
+
+    @staticmethod
+    async def _fetch(dispatcher: ToolDispatcher, call: ToolCall) -> ToolOutcome:
+        outcomes = await dispatcher.dispatch([call])
+        return outcomes[0]
+
+    async def context_message(self, prefetch: Optional[Prefetch], first_turn: bool) -> Optional[dict]:
+        """System message with the relevant prefetched memories, once they are available"""
+        if prefetch is None or prefetch.used:
+            return None
+        if first_turn:
+            await asyncio.wait({prefetch.task}, timeout=self.wait)
+            if prefetch.task.done():
+                self.stats.ready_in_time += 1
+        if not prefetch.task.done():
+            return None
+
+        prefetch.used = True
+        try:
+            memories = prefetch.memories()
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Memory prefetch failed: {e}")
+            return None
+        relevant = [m["memory"] for m in memories if m.get("score") is None or m["score"] >= self.min_score]
+        self.stats.below_cutoff += len(memories) - len(relevant)
+        if not relevant:
+            return None
+        self.stats.injected += 1
+        self.stats.memories_injected += len(relevant)
+        return {
+            "role": "system",
+            "content": "Relevant memories for the user's query:\n" + "\n".join(f"- {m}" for m in relevant),
+        }
+
+    async def dispatch(self, dispatcher: ToolDispatcher, calls: list[ToolCall], prefetch: Optional[Prefetch]) -> list[ToolOutcome]:
+        """Dispatch `calls`, answering a repeated `search_memories` call from the prefetch"""
+        if prefetch is None:
+            return await dispatcher.dispatch(calls)
+        served: dict[int, ToolOutcome] = {}
+        remote = []
+        if not prefetch.requested and any(call.name == MEMORY_TOOL for call in calls):
+            prefetch.requested = True
+            self.stats.model_requested += 1
+        for i, call in enumerate(calls):
+            if prefetch.matches(call) and not served:
+                try:
+                    await prefetch.task
+                    memories = prefetch.memories()
+                except Exception:
+                    remote.append(call)
+                    continue
+                text = json.dumps([m["memory"] for m in memories], indent=2)
+                result = types.CallToolResult(content=[types.TextContent(type="text", text=text)])
+                served[i] = ToolOutcome(call=call, result=result)
+                self.stats.served_from_prefetch += 1
+                prefetch.used = True
+            else:
+                remote.append(call)
+
+        outcomes = iter(await dispatcher.dispatch(remote) if remote else [])
+        return [served[i] if i in served else next(outcomes) for i in range(len(calls))]
+
+    def cancel(self, prefetch: Optional[Prefetch]) -> None:
+        if prefetch is not None and not prefetch.task.done():
+            prefetch.task.cancel()
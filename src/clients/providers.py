@@ -0,0 +1,358 @@
+import json
+import os
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from src.clients.tool_dispatch import ToolCall
+from src.core.config import env_int, env_str
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.core.resilience import CircuitOpenError, Resilience, get_resilience, is_retryable
+from src.core.tracing import tracer
+
+
+TokenCallback = Callable[[str], None]
+
+
+@dataclass
+class ChatResult:
+    """One completed model turn, normalized across providers"""
+    content: str = ""
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    time_to_first_token: Optional[float] = None
+    duration: float = 0.0
+    # server-side timings, when the provider reports them
+    load_duration: float = 0.0
+    prompt_eval_duration: float = 0.0
+    eval_duration: float = 0.0
+
+    @property
+    def tokens_per_sec(self) -> float:
+        generation = self.duration - (self.time_to_first_token or 0.0)
+        return self.completion_tokens / generation if generation > 0 else 0.0
+
+
+def assistant_message(content: str, tool_calls: list[ToolCall]) -> dict:
+    """An assistant turn in the shared (OpenAI chat) format that conversation histories are kept in"""
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {"id": call.id, "type": "function", "function": {"name": call.name, "arguments": json.dumps(call.arguments)}}
+            for call in tool_calls
+        ]
+    return message
+
+
+class LLMProvider:
+    """Async, streaming chat interface implemented once per LLM backend.
+
+    Each provider owns a single SDK client, and therefore a single pooled HTTP
+    connection, for the lifetime of the process. Use `get_provider` to share it.
+
+    Histories are kept in the shared OpenAI chat format; `prepare_message` converts
+    one message to the provider's own format, and `ConversationHistory.render`
+    caches the result so each message is converted once.
+
+    Opening the stream goes through the provider's `Resilience` (rate limit, retry,
+    hedging, circuit breaker) when it has one. Once tokens flow, errors are not
+    retried. When the stream cannot be opened, `SAQR_<NAME>_FALLBACK` names a
+    provider that answers instead.
+    """
+
+    name = "base"
+    model: Optional[str] = None
+    resilience: Optional[Resilience] = None
+
+    @property
+    def fallback(self) -> Optional[str]:
+        return env_str(f"SAQR_{self.name.upper()}_FALLBACK")
+
+    async def _open(self, messages: list[dict], tools: list[dict]):
+        """Send the request and return the response stream"""
+        raise NotImplementedError
+
+    async def _consume(self, stream, on_token: Optional[TokenCallback], result: ChatResult, mark_first: Callable[[], None]) -> None:
+        raise NotImplementedError
+
+    async def _discard(self, stream) -> None:
+        """Close a stream that is not going to be read (the slower of two hedged requests)"""
+
+    def _cost(self, messages: list[dict]) -> float:
+        """Estimated tokens the request draws from the provider's token budget"""
+        return 0
+
+    def assistant_message(self, content: str, tool_calls: list[ToolCall]) -> dict:
+        """An assistant turn in this provider's message format"""
+        return assistant_message(content, tool_calls)
+
+    async def warm_up(self) -> Optional[float]:
+        """Get the model ready before the first query; returns the seconds spent loading it"""
+        return None
+
+    def prepare_message(self, message: dict) -> dict:
+        """Convert one message written for another provider (or in the shared format) to this provider's format"""
+        if not message.get("tool_calls"):
+            return message
+        calls = [
+            ToolCall(id=c.get("id") or f"call_{i}", name=c["function"]["name"], arguments=_arguments(c["function"]["arguments"]))
+            for i, c in enumerate(message["tool_calls"])
+        ]
+        return {**message, **self.assistant_message(message.get("content") or "", calls)}
+
+    def prepare_messages(self, messages: list[dict]) -> list[dict]:
+        return [self.prepare_message(message) for message in messages]
+
+    async def _open_stream(self, messages: list[dict], tools: list[dict]):
+        if self.resilience is None:
+            return await self._open(messages, tools)
+        return await self.resilience.call(
+            lambda: self._open(messages, tools), cost=self._cost(messages), discard=self._discard,
+        )
+
+    async def chat(self, messages: list[dict], tools: list[dict], on_token: Optional[TokenCallback] = None) -> ChatResult:
+        """Stream a completion, forwarding content tokens to `on_token` as they arrive"""
+        result = ChatResult()
+        start = time.perf_counter()
+
+        def mark_first():
+            if result.time_to_first_token is None:
+                result.time_to_first_token = time.perf_counter() - start
+
+        with tracer.span(f"llm.chat {self.name}", kind="client", model=self.model) as span:
+            try:
+                stream = await self._open_stream(messages, tools)
+            except Exception as e:
+                if not self.fallback or not (isinstance(e, CircuitOpenError) or is_retryable(e)):
+                    raise
+                return await self._chat_fallback(messages, tools, on_token, e)
+            await self._consume(stream, on_token, result, mark_first)
+            if span is not None:
+                span.attributes.update(prompt_tokens=result.prompt_tokens, completion_tokens=result.completion_tokens)
+        result.duration = time.perf_counter() - start
+        if metrics.enabled:
+            metrics.observe("saqr_llm_request_seconds", result.duration, provider=self.name)
+            if result.time_to_first_token is not None:
+                metrics.observe("saqr_llm_ttft_seconds", result.time_to_first_token, provider=self.name)
+            metrics.inc("saqr_llm_prompt_tokens_total", result.prompt_tokens, provider=self.name)
+            metrics.inc("saqr_llm_completion_tokens_total", result.completion_tokens, provider=self.name)
+            if result.load_duration:
+                metrics.observe("saqr_llm_load_seconds", result.load_duration, provider=self.name)
+        timings = ""
+        if result.load_duration or result.eval_duration:
+            timings = (
+                f" load={result.load_duration:.3f}s prompt_eval={result.prompt_eval_duration:.3f}s "
+                f"eval={result.eval_duration:.3f}s"
+            )
+        logger.debug(
+            f"{self.name}: ttft={result.time_to_first_token or 0:.3f}s "
+            f"duration={result.duration:.3f}s tokens={result.completion_tokens} "
+            f"tokens/sec={result.tokens_per_sec:.1f}{timings}"
+        )
+        return result
+
+    async def _chat_fallback(self, messages: list[dict], tools: list[dict], on_token: Optional[TokenCallback], error: Exception) -> ChatResult:
+        fallback = get_provider(self.fallback)
+        logger.warning(f"{self.name} unavailable ({type(error).__name__}: {error}), answering with {fallback.name}")
+        metrics.inc("saqr_llm_fallbacks_total", provider=self.name, fallback=fallback.name)
+        # the caller records the reply in the shared history format, so only the request is converted
+        return await fallback.chat(fallback.prepare_messages(messages), tools, on_token)
+
+    async def aclose(self) -> None:
+        pass
+
+
+def _keep_alive(value: str):
+    """Ollama takes a duration string ("30m") or a number of seconds (-1 = forever)"""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def ollama_options() -> dict:
+    """Runtime options sent with every Ollama request.
+
+    The model is reloaded whenever `num_ctx` changes, so the warm-up request
+    and the chat requests must carry the same options.
+    """
+    options = json.loads(env_str("SAQR_OLLAMA_OPTIONS", "{}"))
+    for key in ("num_ctx", "num_thread", "num_batch", "num_gpu"):
+        value = env_int(f"SAQR_OLLAMA_{key.upper()}")
+        if value is not None:
+            options[key] = value
+    return options
+
+
+class OllamaProvider(LLMProvider):
+    name = "ollama"
+
+    def __init__(self, model: Optional[str] = None, host: Optional[str] = None):
+        from ollama import AsyncClient
+
+        self.model = model or os.getenv("OLLAMA_MODEL_NAME")
+        self.client = AsyncClient(host=host or os.getenv("OLLAMA_HOST"))
+        self.keep_alive = _keep_alive(env_str("SAQR_OLLAMA_KEEP_ALIVE", "30m"))
+        self.options = ollama_options() or None
+        self._ids = itertools.count()
+
+    async def _open(self, messages, tools):
+        stream = await self.client.chat(
+            model=self.model, messages=messages, tools=tools, stream=True,
+            keep_alive=self.keep_alive, options=self.options,
+        )
+        # the request is only sent on the first read; do it here so connection errors reach the fallback
+        first = await anext(stream, None)
+        return stream if first is None else _prepend(first, stream)
+
+    async def warm_up(self):
+        # an empty prompt only loads the model and pins it for `keep_alive`
+        response = await self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive, options=self.options)
+        load = (response.get("load_duration") or 0) / 1e9
+        if metrics.enabled:
+            metrics.observe("saqr_llm_load_seconds", load, provider=self.name)
+        return load
+
+    async def _consume(self, stream, on_token, result, mark_first):
+        content = []
+        raw_tool_calls = []
+        async for chunk in stream:
+            message = chunk["message"]
+            if message.get("content"):
+                mark_first()
+                content.append(message["content"])
+                if on_token:
+                    on_token(message["content"])
+            if message.get("tool_calls"):
+                mark_first()
+                raw_tool_calls.extend(message["tool_calls"])
+            if chunk.get("done"):
+                result.prompt_tokens = chunk.get("prompt_eval_count") or 0
+                result.completion_tokens = chunk.get("eval_count") or 0
+                result.load_duration = (chunk.get("load_duration") or 0) / 1e9
+                result.prompt_eval_duration = (chunk.get("prompt_eval_duration") or 0) / 1e9
+                result.eval_duration = (chunk.get("eval_duration") or 0) / 1e9
+
+        result.content = "".join(content)
+        result.tool_calls = [
+            ToolCall(
+                id=f"call_{next(self._ids)}",
+                name=tool_call["function"]["name"],
+                arguments=tool_call["function"]["arguments"],
+            )
+            for tool_call in raw_tool_calls
+        ]
+
+    def assistant_message(self, content, tool_calls):
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            # Ollama ignores the id; it is kept so the turn converts back with matching tool_call_ids
+            message["tool_calls"] = [{"id": call.id, "function": {"name": call.name, "arguments": call.arguments}} for call in tool_calls]
+        return message
+
+    async def aclose(self) -> None:
+        http_client = getattr(self.client, "_client", None)
+        if http_client is not None:
+            await http_client.aclose()
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None, max_tokens: int = 1000):
+        from groq import AsyncGroq
+
+        self.model = model or os.getenv("GROQ_MODEL_NAME")
+        # retries are handled by `self.resilience`, which also sees the rate-limit headers
+        self.client = AsyncGroq(api_key=api_key or os.getenv("GROQ_API_KEY"), max_retries=0)
+        self.max_tokens = max_tokens
+        self.resilience = get_resilience(self.name)
+
+    async def _open(self, messages, tools):
+        response = await self.client.chat.completions.with_raw_response.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            max_tokens=self.max_tokens,
+            tool_choice="auto",
+            stream=True,
+        )
+        self.resilience.update_limits(response.headers)
+        return await response.parse()
+
+    async def _discard(self, stream):
+        await stream.close()
+
+    def _cost(self, messages):
+        return sum(len(str(m.get("content") or "")) for m in messages) // 4 + self.max_tokens
+
+    async def _consume(self, stream, on_token, result, mark_first):
+        content = []
+        partial_calls: dict[int, dict] = {}
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage is not None:
+                result.prompt_tokens = usage.prompt_tokens or 0
+                result.completion_tokens = usage.completion_tokens or 0
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                mark_first()
+                content.append(delta.content)
+                if on_token:
+                    on_token(delta.content)
+            for tool_call in delta.tool_calls or []:
+                mark_first()
+                partial = partial_calls.setdefault(tool_call.index, {"id": None, "name": "", "arguments": ""})
+                if tool_call.id:
+                    partial["id"] = tool_call.id
+                if tool_call.function and tool_call.function.name:
+                    partial["name"] += tool_call.function.name
+                if tool_call.function and tool_call.function.arguments:
+                    partial["arguments"] += tool_call.function.arguments
+
+        result.content = "".join(content)
+        if not result.completion_tokens:
+            result.completion_tokens = len(content)
+        calls = [partial_calls[index] for index in sorted(partial_calls)]
+        result.tool_calls = [
+            ToolCall(id=call["id"], name=call["name"], arguments=json.loads(call["arguments"] or "{}"))
+            for call in calls
+        ]
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+async def _prepend(first, stream):
+    yield first
+    async for chunk in stream:
+        yield chunk
+
+
+def _arguments(arguments) -> dict:
+    return json.loads(arguments or "{}") if isinstance(arguments, str) else dict(arguments or {})
+
+
+PROVIDERS: dict[str, type[LLMProvider]] = {
+    "ollama": OllamaProvider,
+    "groq": GroqProvider,
+}
+
+_instances: dict[str, LLMProvider] = {}
+
+
+def get_provider(name: str) -> LLMProvider:
+    """Return the shared provider instance for `name`, creating it on first use"""
+    if name not in _instances:
+        _instances[name] = PROVIDERS[name]()
+    return _instances[name]
+
+
+async def close_providers() -> None:
+    for provider in list(_instances.values()):
+        await provider.aclose()
+    _instances.clear()
@@ -0,0 +1,141 @@
+import json
+from collections import OrderedDict
+from typing import Any, Optional
+from mcp import types
+from src.clients.tool_dispatch import ToolOutcome
+from src.core.config import env_bool, env_int
+
+FULL_RESULT_TOOL = "get_full_tool_result"
+
+
+def _compact(text: str) -> Any:
+    """Parse JSON payloads so they can be re-encoded without indentation"""
+    stripped = text.strip()
+    if stripped[:1] in ("{", "[", '"'):
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+    return stripped
+
+
+def _drop_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_empty(v) for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_drop_empty(v) for v in value]
+    return value
+
+
+def _shrink(value: Any, ratio: float, floor: int = 80) -> Any:
+    """Cut every long string in `value` to roughly `ratio` of its length"""
+    if isinstance(value, str):
+        keep = max(floor, int(len(value) * ratio))
+        return value if len(value) <= keep else value[:keep] + "…"
+    if isinstance(value, dict):
+        return {k: _shrink(v, ratio, floor) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shrink(v, ratio, floor) for v in value]
+    return value
+
+
+def _encode(value: Any) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def content_parts(result: types.CallToolResult) -> list[Any]:
+    """Text of each content item, with JSON payloads parsed"""
+    parts = []
+    for content in result.content:
+        if isinstance(content, types.TextContent):
+            parts.append(_drop_empty(_compact(content.text)))
+        elif isinstance(content, types.ImageContent):
+            parts.append(f"[image {content.mimeType}]")
+        elif isinstance(content, types.EmbeddedResource):
+            parts.append(getattr(content.resource, "text", None) or f"[resource {content.resource.uri}]")
+    return parts
+
+
+class ResultShaper:
+    """Turns a `CallToolResult` into the compact text that goes into the prompt.
+
+    Text content is extracted and JSON is re-encoded without indentation or empty
+    fields. When a result exceeds its token budget (`SAQR_TOOL_RESULT_TOKENS`, or
+    `SAQR_<TOOL>_RESULT_TOKENS` for one tool, 0 for no limit), long strings are
+    shortened evenly and the text is then cut to size. The full text is kept for
+    the last `SAQR_TOOL_RESULT_STORE` truncated results, and the model can read it
+    page by page through the client-side `get_full_tool_result` tool.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, budget: Optional[int] = None, store_size: Optional[int] = None):
+        self.enabled = env_bool("SAQR_RESULT_SHAPING", True) if enabled is None else enabled
+        self.budget = budget if budget is not None else env_int("SAQR_TOOL_RESULT_TOKENS", 1000)
+        self.store_size = store_size or env_int("SAQR_TOOL_RESULT_STORE", 64)
+        self._full: "OrderedDict[str, str]" = OrderedDict()
+
+    def budget_for(self, tool: str) -> int:
+        return env_int(f"SAQR_{tool.upper()}_RESULT_TOKENS", self.budget)
+
+    def tool_payload(self) -> list[dict]:
+        """Function schema of `get_full_tool_result`, offered next to the server's tools"""
+        if not self.enabled:
+            return []
+        return [{
+            "type": "function",
+            "function": {
+                "name": FULL_RESULT_TOOL,
+                "description": "Read the full output of an earlier tool call whose result was truncated.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "call_id": {"type": "string", "description": "The call_id given in the truncation notice."},
+                        "offset": {"type": "integer", "description": "Character offset to continue from.", "default": 0},
+                    },
+                    "required": ["call_id"],
+                },
+            },
+        }]
+
+    def local_tools(self) -> dict:
+        return {FULL_RESULT_TOOL: self.read_full} if self.enabled else {}
+
+    async def read_full(self, arguments: dict) -> str:
+        text = self._full.get(str(arguments.get("call_id")))
+        if text is None:
+            return "No stored result for this call_id."
+        offset = max(0, int(arguments.get("offset") or 0))
+        size = max(self.budget, 250) * 4
+        chunk = text[offset:offset + size]
+        if offset + size < len(text):
+            chunk += f"\n…[continues at offset={offset + size} of {len(text)}]"
+        return chunk
+
+    def _remember(self, call_id: str, text: str) -> None:
+        self._full[call_id] = text
+        self._full.move_to_end(call_id)
+        while len(self._full) > self.store_size:
+            self._full.popitem(last=False)
+
+    def shape(self, outcome: ToolOutcome) -> tuple[str, int]:
+        """Prompt text for one tool outcome and the estimated tokens saved versus `str(result)`"""
+        if outcome.error is not None:
+            return f"Error: {outcome.error}", 0
+        raw = str(outcome.result)
+        if not self.enabled or not isinstance(outcome.result, types.CallToolResult):
+            return raw, 0
+
+        parts = content_parts(outcome.result)
+        prefix = "Error: " if outcome.result.isError else ""
+        text = prefix + "\n".join(_encode(part) for part in parts)
+        limit = self.budget_for(outcome.call.name) * 4
+        if outcome.call.name != FULL_RESULT_TOOL and limit > 0 and len(text) > limit:
+            full = text
+            text = prefix + "\n".join(_encode(_shrink(part, limit / len(full))) for part in parts)
+            if len(text) > limit:
+                text = text[:limit]
+            self._remember(outcome.call.id, full)
+            text += (
+                f"\n…[truncated {len(full) - len(text)} of {len(full)} chars; "
+                f'call {FULL_RESULT_TOOL} with call_id="{outcome.call.id}" for the rest]'
+            )
+        return text, max(0, (len(raw) - len(text)) // 4)
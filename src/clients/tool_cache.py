@@ -0,0 +1,67 @@
+import asyncio
+from typing import Callable
+from mcp import ClientSession, types
+from src.core.logger import logger
+
+
+def openai_tool_format(tool: types.Tool) -> dict:
+    """Function-calling schema shared by Ollama and Groq"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.inputSchema,
+        },
+    }
+
+
+PROVIDER_FORMATS: dict[str, Callable[[types.Tool], dict]] = {
+    "ollama": openai_tool_format,
+    "groq": openai_tool_format,
+}
+
+
+class ToolCatalog:
+    """Client-side cache of the server's tool list and provider tool payloads.
+
+    The catalog is filled once at connect time and only refetched after the server
+    sends `notifications/tools/list_changed`, so queries never pay a `list_tools`
+    round-trip. Pass `handle_message` as the session's `message_handler`.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._format = PROVIDER_FORMATS[provider]
+        self.tools: list[types.Tool] = []
+        self.payload: list[dict] = []
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    @property
+    def names(self) -> list[str]:
+        return [tool.name for tool in self.tools]
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    async def refresh(self, session: ClientSession) -> None:
+        response = await session.list_tools()
+        self.tools = response.tools
+        self.payload = [self._format(tool) for tool in self.tools]
+        self._stale = False
+
+    async def get(self, session: ClientSession) -> list[dict]:
+        """Return the provider payload, refreshing it only if the server changed its tools"""
+        if self._stale:
+            async with self._lock:
+                if self._stale:
+                    await self.refresh(session)
+        return self.payload
+
+    async def handle_message(self, message) -> None:
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            logger.info("Server tool list changed, invalidating tool cache")
+            self.invalidate()
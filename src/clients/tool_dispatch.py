@@ -0,0 +1,144 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+from mcp import ClientSession, types
+from src.core.config import env_int
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.core.tracing import tracer
+
+
+@dataclass
+class ToolCall:
+    """A single tool call requested by the model, normalized across backends"""
+    id: str
+    name: str
+    arguments: dict
+
+
+@dataclass
+class ToolOutcome:
+    call: ToolCall
+    result: Any = None
+    error: Optional[str] = None
+
+
+@dataclass
+class DispatchStats:
+    """Per-query counters for the tool loop.
+
+    Every tool call beyond the first in a model turn would have cost one more LLM
+    round-trip if calls were executed one at a time, so `round_trips_saved` is the
+    number of tool calls minus the number of turns that requested tools.
+    """
+    llm_calls: int = 0
+    tool_turns: int = 0
+    tool_calls: int = 0
+    per_turn: list[int] = field(default_factory=list)
+    tools_used: list[str] = field(default_factory=list)
+    cache_hit: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    time_to_first_token: list[float] = field(default_factory=list)
+    model_load_seconds: float = 0.0
+    eval_seconds: float = 0.0
+    history_tokens_saved: int = 0
+    result_tokens_saved: int = 0
+    error: Optional[str] = None
+
+    def record_llm(self, reply) -> None:
+        """Count one model call from a `ChatResult`"""
+        self.llm_calls += 1
+        self.prompt_tokens += reply.prompt_tokens
+        self.completion_tokens += reply.completion_tokens
+        if reply.time_to_first_token is not None:
+            self.time_to_first_token.append(reply.time_to_first_token)
+        self.model_load_seconds += reply.load_duration
+        self.eval_seconds += reply.prompt_eval_duration + reply.eval_duration
+
+    def record_turn(self, calls: list["ToolCall"]) -> None:
+        self.tool_turns += 1
+        self.tool_calls += len(calls)
+        self.per_turn.append(len(calls))
+        self.tools_used.extend(call.name for call in calls)
+
+    @property
+    def round_trips_saved(self) -> int:
+        return self.tool_calls - self.tool_turns
+
+    def as_dict(self) -> dict:
+        return {
+            "llm_calls": self.llm_calls,
+            "tool_turns": self.tool_turns,
+            "tool_calls": self.tool_calls,
+            "round_trips_saved": self.round_trips_saved,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "time_to_first_token": [round(ttft, 3) for ttft in self.time_to_first_token],
+            "model_load_seconds": round(self.model_load_seconds, 3),
+            "eval_seconds": round(self.eval_seconds, 3),
+            "history_tokens_saved": self.history_tokens_saved,
+            "result_tokens_saved": self.result_tokens_saved,
+            "cache_hit": self.cache_hit,
+            "error": self.error,
+        }
+
+
+class ToolDispatcher:
+    """Sends every tool call of a model turn through `session.call_tool` concurrently.
+
+    The number of in-flight calls is capped by `SAQR_TOOL_CALL_CONCURRENCY`
+    (default 4); setting it to 1 falls back to sequential dispatch. Tools in
+    `local_tools` are answered in the client and never reach the server.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        concurrency: Optional[int] = None,
+        local_tools: Optional[dict[str, Callable[[dict], Awaitable[str]]]] = None,
+    ):
+        self.session = session
+        self.concurrency = max(1, concurrency or env_int("SAQR_TOOL_CALL_CONCURRENCY", 4))
+        self.local_tools = local_tools or {}
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def _send(self, call: ToolCall) -> types.CallToolResult:
+        if call.name in self.local_tools:
+            text = await self.local_tools[call.name](call.arguments)
+            return types.CallToolResult(content=[types.TextContent(type="text", text=text)])
+        traceparent = tracer.current_traceparent()
+        if traceparent is None:
+            return await self.session.call_tool(call.name, call.arguments)
+        # carry the span context in the request _meta so server spans join this trace
+        request = types.ClientRequest(types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(
+                name=call.name,
+                arguments=call.arguments,
+                _meta={"traceparent": traceparent},
+            ),
+        ))
+        return await self.session.send_request(request, types.CallToolResult)
+
+    async def _call(self, call: ToolCall) -> ToolOutcome:
+        queued = time.perf_counter()
+        async with self._semaphore:
+            metrics.observe("saqr_tool_call_wait_seconds", time.perf_counter() - queued, tool=call.name)
+            logger.info(f"Calling {call.name}")
+            with tracer.span(f"tools/call {call.name}", kind="client", tool=call.name) as span:
+                try:
+                    with metrics.timer("saqr_tool_call_seconds", tool=call.name):
+                        result = await self._send(call)
+                    return ToolOutcome(call=call, result=result)
+                except Exception as e:
+                    metrics.inc("saqr_tool_call_errors_total", tool=call.name)
+                    if span is not None:
+                        span.error = str(e)
+                    logger.error(f"Error calling {call.name}: {str(e)}")
+                    return ToolOutcome(call=call, error=str(e))
+
+    async def dispatch(self, calls: list[ToolCall]) -> list[ToolOutcome]:
+        """Run all calls and return their outcomes in the order they were requested"""
+        return list(await asyncio.gather(*(self._call(call) for call in calls)))
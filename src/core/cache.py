@@ -0,0 +1,165 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for free-text queries"""
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    stale_hits: int = 0
+    upstream_calls: int = 0
+    upstream_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def avg_upstream_latency(self) -> float:
+        return self.upstream_seconds / self.upstream_calls if self.upstream_calls else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hit_rate, 4),
+            "upstream_calls": self.upstream_calls,
+            "avg_upstream_latency": round(self.avg_upstream_latency, 4),
+            "estimated_seconds_saved": round((self.hits + self.coalesced) * self.avg_upstream_latency, 3),
+        }
+
+
+class TTLCache:
+    """In-memory TTL + LRU cache with optional SQLite persistence and request coalescing.
+
+    Values must be JSON-serializable when `path` is set. Concurrent `get_or_fetch`
+    calls for the same key share a single upstream call.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 900.0, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, key: str) -> Optional[tuple[float, Any]]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        self.stats.disk_hits += 1
+        return row[1], json.loads(row[0])
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                self._store(key, entry[1], entry[0], persist=False)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.time():
+            # expired entries stay until evicted, as a fallback for `get_stale`
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Return the last value stored for `key` even if it has expired, e.g. while upstream is down"""
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            entry = (0.0, json.loads(row[0])) if row else None
+        if entry is None:
+            return None
+        self.stats.stale_hits += 1
+        return entry[1]
+
+    def _store(self, key: str, value: Any, expires: float, persist: bool = True) -> None:
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        if persist and self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires),
+            )
+            self._db.commit()
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._store(key, value, time.time() + (ttl if ttl is not None else self.ttl))
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """Return a cached value or run `fetch`, sharing one upstream call per key"""
+        value = self.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.stats.misses += 1
+
+        async def run():
+            start = time.perf_counter()
+            try:
+                result = await fetch()
+            finally:
+                self.stats.upstream_calls += 1
+                self.stats.upstream_seconds += time.perf_counter() - start
+            if should_cache(result):
+                self.set(key, result)
+            return result
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,30 @@
+import os
+from dotenv import load_dotenv
+
+_ = load_dotenv()
+
+
+def env_str(name: str, default: str = None) -> str:
+    """Read a string setting from the environment"""
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name: str, default: int = None) -> int:
+    """Read an integer setting from the environment"""
+    value = env_str(name)
+    return int(value) if value is not None else default
+
+
+def env_float(name: str, default: float = None) -> float:
+    """Read a float setting from the environment"""
+    value = env_str(name)
+    return float(value) if value is not None else default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean setting from the environment"""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,43 @@
+import re
+import zlib
+from typing import Protocol
+import numpy as np
+
+
+class Embedder(Protocol):
+    """Text to a unit vector. `semantic` is True only when close vectors mean close meaning."""
+
+    dim: int
+    semantic: bool
+
+    def embed(self, text: str) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """Offline embedding from hashed word unigrams and bigrams.
+
+    No model download and no network: good enough for keyword-heavy agent memories,
+    and deterministic across processes (crc32, not the salted built-in `hash`).
+    It measures word overlap, not meaning: "dosage of warfarin" and "dosage of
+    paracetamol" are close, so it is not `semantic`.
+    """
+
+    semantic = False
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed(self, text: str) -> np.ndarray:
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+        hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        np.add.at(vector, hashes % self.dim, signs)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_many(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self.embed(text) for text in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+from src.core.config import env_int, env_float
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+
+class ToolExecutor:
+    """Runs tool work off the event loop with per-tool concurrency limits and timeouts.
+
+    Blocking SDK calls go through a bounded thread pool, native coroutines are awaited
+    directly. Limits are read from the environment so they can be tuned per deployment:
+
+        SAQR_MAX_WORKERS                 size of the shared thread pool (default 8)
+        SAQR_TOOL_CONCURRENCY            default in-flight calls per tool (default 4)
+        SAQR_TOOL_TIMEOUT                default timeout per call in seconds (default 30)
+        SAQR_<TOOL>_CONCURRENCY          override for one tool, e.g. SAQR_WEB_SEARCH_CONCURRENCY
+        SAQR_<TOOL>_TIMEOUT              override for one tool, e.g. SAQR_WEB_SEARCH_TIMEOUT
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.max_workers = max_workers or env_int("SAQR_MAX_WORKERS", 8)
+        self.concurrency = concurrency or env_int("SAQR_TOOL_CONCURRENCY", 4)
+        self.timeout = timeout if timeout is not None else env_float("SAQR_TOOL_TIMEOUT", 30.0)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="saqr-tool")
+        return self._pool
+
+    def limit_for(self, tool: str) -> int:
+        return env_int(f"SAQR_{tool.upper()}_CONCURRENCY", self.concurrency)
+
+    def timeout_for(self, tool: str) -> Optional[float]:
+        timeout = env_float(f"SAQR_{tool.upper()}_TIMEOUT", self.timeout)
+        return timeout if timeout and timeout > 0 else None
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        if tool not in self._semaphores:
+            self._semaphores[tool] = asyncio.Semaphore(self.limit_for(tool))
+        return self._semaphores[tool]
+
+    async def run(self, tool: str, coro: Awaitable[Any]) -> Any:
+        """Await a native coroutine under the tool's concurrency limit and timeout"""
+        queued = time.perf_counter()
+        async with self._semaphore(tool):
+            metrics.observe("saqr_executor_wait_seconds", time.perf_counter() - queued, tool=tool)
+            try:
+                return await asyncio.wait_for(coro, timeout=self.timeout_for(tool))
+            except asyncio.TimeoutError:
+                logger.warning(f"{tool} timed out after {self.timeout_for(tool)}s")
+                raise
+
+    async def _in_executor(self, tool: str, pool: Executor, call: Callable[[], Any], queued: Optional[float] = None) -> Any:
+        """Run `call` in `pool` under the tool's limit and timeout.
+
+        A thread (or worker process) cannot be stopped once it has started, so a
+        call that timed out or whose caller was cancelled keeps its slot until it
+        really finishes. Otherwise stuck calls would pile up beyond the tool's limit
+        and fill the pool.
+        """
+        semaphore = self._semaphore(tool)
+        await semaphore.acquire()
+        if queued is not None:
+            metrics.observe("saqr_executor_wait_seconds", time.perf_counter() - queued, tool=tool)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(pool, call)
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(functools.partial(self._finished, semaphore))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_for(tool))
+        except asyncio.TimeoutError:
+            logger.warning(f"{tool} timed out after {self.timeout_for(tool)}s, its slot is held until the call returns")
+            raise
+
+    @staticmethod
+    def _finished(semaphore: asyncio.Semaphore, future: asyncio.Future) -> None:
+        semaphore.release()
+        if not future.cancelled():
+            # nobody awaits a call that timed out; retrieve its error so it is not reported as unhandled
+            future.exception()
+
+    async def run_in_pool(self, tool: str, pool: Executor, fn: Callable[..., Any], *args) -> Any:
+        """Submit a picklable callable to another pool (e.g. worker processes) once the tool's limit is acquired"""
+        return await self._in_executor(tool, pool, functools.partial(fn, *args), queued=time.perf_counter())
+
+    async def run_sync(self, tool: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable in the thread pool under the tool's limit and timeout"""
+        call = functools.partial(fn, *args, **kwargs)
+        if metrics.enabled:
+            call = functools.partial(self._timed, tool, time.perf_counter(), call)
+        return await self._in_executor(tool, self.pool, call)
+
+    @staticmethod
+    def _timed(tool: str, queued: float, call: Callable[[], Any]) -> Any:
+        # wait covers both the per-tool semaphore and the thread pool queue
+        metrics.observe("saqr_executor_wait_seconds", time.perf_counter() - queued, tool=tool)
+        with metrics.timer("saqr_executor_run_seconds", tool=tool):
+            return call()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+executor = ToolExecutor()
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Callable, Generic, Optional, TypeVar
+from src.core.executor import executor
+
+T = TypeVar("T")
+
+
+class LazyResource(Generic[T]):
+    """A client or backend built once, on first use, in the executor's thread pool.
+
+    Keeps heavy imports and network handshakes out of module import so the server
+    starts answering `initialize` and `list_tools` immediately.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    @property
+    def value(self) -> Optional[T]:
+        return self._value
+
+    async def get(self) -> T:
+        if self._value is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._value is None:
+                    self._value = await executor.run_sync(self.name, self.factory)
+        return self._value
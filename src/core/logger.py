@@ -1,29 +1,50 @@
-import sys
-from datetime import datetime
-from loguru import logger as _logger
-import threading
-import time
+import asyncio
 import itertools
+import multiprocessing
+import os
 import sys
 from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+from loguru import logger as _logger
+from src.core.config import env_bool, env_str
 
 
 _print_level = "INFO"
 
 
-def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None):
-    """Adjust the log level to above level"""
+def define_log_level(print_level=None, logfile_level=None, name: str = None):
+    """Adjust the log level to above level.
+
+    Both sinks are enqueued, so a log call only puts the record on a queue and the
+    write happens on loguru's background thread. With `SAQR_LOG_FILE=true`, records
+    also go to a rotating JSON-lines file under `SAQR_LOG_DIR`. Worker processes
+    (e.g. document rendering) re-import this module; they only log to stderr, so
+    they do not open a file each.
+    """
     global _print_level
+    print_level = print_level or env_str("SAQR_LOG_LEVEL", "INFO")
+    logfile_level = logfile_level or env_str("SAQR_LOG_FILE_LEVEL", "DEBUG")
     _print_level = print_level
 
     current_date = datetime.now()
     formatted_date = current_date.strftime("%Y%m%d%H%M%S")
+    name = name or os.path.splitext(os.path.basename(sys.argv[0]))[0]
     log_name = (
         f"{name}_{formatted_date}" if name else formatted_date
     )
 
     _logger.remove()
-    _logger.add(sys.stderr, level=print_level)
+    _logger.add(sys.stderr, level=print_level, enqueue=True)
+    if env_bool("SAQR_LOG_FILE", False) and multiprocessing.current_process().name == "MainProcess":
+        _logger.add(
+            os.path.join(env_str("SAQR_LOG_DIR", "logs"), f"{log_name}.jsonl"),
+            level=logfile_level,
+            serialize=True,
+            enqueue=True,
+            rotation=env_str("SAQR_LOG_ROTATION", "10 MB"),
+            retention=env_str("SAQR_LOG_RETENTION", "7 days"),
+        )
     return _logger
 
 
@@ -31,34 +52,69 @@ logger = define_log_level()
 
 
 class LoadingAnimation:
-    def __init__(self, description="Loading", animation_chars="⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"):
+    """A single terminal spinner shared by every operation in flight.
+
+    Frames are drawn by one task on the running event loop, so starting an
+    animation costs a list append and stopping it never blocks. Concurrent
+    operations share the line, which shows the most recent description.
+    """
+
+    # off when stdout is not a terminal (batch runs, pipes); SAQR_ANIMATIONS overrides
+    enabled = env_bool("SAQR_ANIMATIONS", sys.stdout.isatty())
+    animation_chars = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+    interval = 0.1
+
+    _active: list["LoadingAnimation"] = []
+    _task: Optional[asyncio.Task] = None
+    _width = 0
+
+    def __init__(self, description="Loading"):
         self.description = description
-        self.animation_chars = animation_chars
         self.running = False
-        self.thread = None
-        
-    def _animate(self):
-        for c in itertools.cycle(self.animation_chars):
-            if not self.running:
+
+    @classmethod
+    async def _animate(cls):
+        for c in itertools.cycle(cls.animation_chars):
+            if not cls._active:
                 break
-            sys.stdout.write(f'\r{self.description} {c} ')
+            line = f"\r{cls._active[-1].description} {c} "
+            sys.stdout.write(line.ljust(cls._width))
             sys.stdout.flush()
-            time.sleep(0.1)
-        sys.stdout.write('\r' + ' ' * (len(self.description) + 4) + '\r')
-        sys.stdout.flush()
-        
+            cls._width = max(cls._width, len(line))
+            await asyncio.sleep(cls.interval)
+
+    @classmethod
+    def _clear(cls):
+        if cls._width:
+            sys.stdout.write("\r" + " " * cls._width + "\r")
+            sys.stdout.flush()
+            cls._width = 0
+
     def start(self, description=None):
         if description:
             self.description = description
+        if not LoadingAnimation.enabled or self.running:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # no event loop to drive the frames
+            return
         self.running = True
-        self.thread = threading.Thread(target=self._animate)
-        self.thread.daemon = True
-        self.thread.start()
-        
+        LoadingAnimation._active.append(self)
+        if LoadingAnimation._task is None or LoadingAnimation._task.done():
+            LoadingAnimation._task = loop.create_task(LoadingAnimation._animate())
+
     def stop(self):
+        if not self.running:
+            return
         self.running = False
-        if self.thread:
-            self.thread.join()
+        LoadingAnimation._active.remove(self)
+        if not LoadingAnimation._active and LoadingAnimation._task is not None:
+            LoadingAnimation._task.cancel()
+            LoadingAnimation._task = None
+        # free the line for the caller's output; the next frame redraws any other operation
+        LoadingAnimation._clear()
 
 @contextmanager
 def loading_animation(description="Loading"):
@@ -69,11 +125,38 @@ def loading_animation(description="Loading"):
         yield
     except Exception:
         animation.stop()
-        print(f"{description}: ✖ Failed")
+        if LoadingAnimation.enabled:
+            print(f"{description}: ✖ Failed")
         raise 
     else:
         animation.stop()
-        print(f"{description}: ✔ Done")
+        if LoadingAnimation.enabled:
+            print(f"{description}: ✔ Done")
+
+
+@contextmanager
+def streaming_output(description="Processing query"):
+    """Show a loading animation until the first streamed token, then print tokens as they arrive."""
+    animation = LoadingAnimation(description)
+    animation.start()
+    state = {"streaming": False}
+
+    def on_token(token: str):
+        if not state["streaming"]:
+            animation.stop()
+            state["streaming"] = True
+            sys.stdout.write("\n")
+        sys.stdout.write(token)
+        sys.stdout.flush()
+
+    try:
+        yield on_token
+    finally:
+        if state["streaming"]:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+        else:
+            animation.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from contextlib import nullcontext
+from typing import Optional
+from src.core.config import env_bool, env_str
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> list[int]:
+        total, out = 0, []
+        for count in self.counts:
+            total += count
+            out.append(total)
+        return out
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry: "Metrics", name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: Optional[tuple] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """In-process counters and latency histograms, exportable as Prometheus text or JSON.
+
+    Disabled unless `SAQR_METRICS` is set; when disabled every call returns
+    immediately and `timer()` hands back a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = env_bool("SAQR_METRICS", False) if enabled is None else enabled
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        # observations also arrive from the tool thread pool
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def timer(self, name: str, **labels):
+        """Context manager observing the elapsed seconds into histogram `name`"""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, name, labels)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, series in sorted(self._counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self._histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in series.items():
+                for bound, count in zip(histogram.buckets, histogram.cumulative()):
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', bound))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            },
+            "histograms": {
+                name: [{
+                    "labels": dict(key),
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "avg": round(h.sum / h.count, 6) if h.count else 0.0,
+                } for key, h in series.items()]
+                for name, series in self._histograms.items()
+            },
+        }
+
+    def dump(self, path: Optional[str] = None) -> None:
+        """Write metrics to `path` (or `SAQR_METRICS_FILE`); `.json` selects JSON, anything else Prometheus text"""
+        path = path or env_str("SAQR_METRICS_FILE")
+        if not self.enabled or not path:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.to_json(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+metrics = Metrics()
@@ -0,0 +1,375 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Mapping, Optional, TypeVar
+from src.core.config import env_float, env_int
+from src.core.logger import logger
+from src.core.metrics import metrics
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+# SDK exception names for rate limits, timeouts and dropped connections (groq, tavily, httpx)
+_RETRYABLE_NAMES = ("RateLimit", "UsageLimitExceeded", "Timeout", "Connect", "NetworkError", "RemoteProtocol", "ReadError")
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate-limit header: `"7.66s"`, `"2m59.56s"`, `"120ms"` or plain seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    return sum(float(number) * _UNITS[unit] for number, unit in parts) if parts else None
+
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _headers(error: BaseException) -> Mapping[str, str]:
+    return getattr(getattr(error, "response", None), "headers", None) or {}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, timeouts, dropped connections and 5xx responses"""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(name in type(error).__name__ for name in _RETRYABLE_NAMES)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+
+class TokenBucket:
+    """Async token bucket whose budget follows the provider's rate-limit headers.
+
+    A `rate` of 0 means unlimited until the provider reports its limits. Each
+    `update` re-syncs the bucket: it holds the remaining budget and refills at a
+    pace that spreads that budget evenly until the window resets.
+    """
+
+    def __init__(self, rate: float = 0.0, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` tokens are available"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate <= 0 or self.tokens >= min(amount, self.capacity):
+            return 0.0
+        return (min(amount, self.capacity) - self.tokens) / self.rate
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        if self.delay(amount) > 0:
+            return False
+        if self.rate > 0:
+            self.tokens -= amount
+        return True
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait for `amount` tokens; returns the seconds spent waiting"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                delay = self.delay(amount)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+                waited += delay
+            if self.rate > 0:
+                self.tokens -= amount
+        return waited
+
+    def update(self, remaining: Optional[float], reset: Optional[float]) -> None:
+        if remaining is None:
+            return
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = remaining
+        if remaining <= 0 and reset:
+            self.blocked_until = max(self.blocked_until, now + reset)
+        elif reset:
+            self.rate = remaining / reset
+            self.capacity = max(1.0, remaining)
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class LatencyTracker:
+    """Percentiles over the most recent successful call latencies"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: deque = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive failed calls and lets one trial call through after `reset` seconds"""
+
+    def __init__(self, failures: int = 5, reset: float = 30.0):
+        self.failures = failures
+        self.reset = reset
+        self.consecutive = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def success(self) -> None:
+        self.consecutive = 0
+        self.opened_at = None
+        self._trial = False
+
+    def cancelled(self) -> None:
+        """A call was abandoned before it finished (e.g. it lost a race); free the trial slot"""
+        self._trial = False
+
+    def failure(self) -> bool:
+        """Record a failed call; returns True when this opened the circuit"""
+        self.consecutive += 1
+        self._trial = False
+        if self.failures > 0 and self.consecutive >= self.failures:
+            was_open = self.opened_at is not None
+            self.opened_at = time.monotonic()
+            return not was_open
+        return False
+
+
+@dataclass
+class ResilienceStats:
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    rate_limit_waits: int = 0
+    rate_limit_wait_seconds: float = 0.0
+    hedges: int = 0
+    hedge_wins: int = 0
+    breaker_opens: int = 0
+    rejected: int = 0
+
+    def as_dict(self) -> dict:
+        return {**self.__dict__, "rate_limit_wait_seconds": round(self.rate_limit_wait_seconds, 3)}
+
+
+class Resilience:
+    """Rate limiting, retry, hedging and circuit breaking around calls to one provider.
+
+    Settings are read per provider (`SAQR_GROQ_RETRIES`, `SAQR_TAVILY_TIMEOUT`, ...):
+
+        SAQR_<NAME>_RATE / _BURST           requests per second and burst before headers arrive (0 = unlimited)
+        SAQR_<NAME>_RETRIES                 retries of a failed call, with jittered exponential backoff
+        SAQR_<NAME>_BACKOFF / _BACKOFF_MAX  base and maximum backoff in seconds
+        SAQR_<NAME>_TIMEOUT                 seconds per attempt (0 = no timeout)
+        SAQR_<NAME>_HEDGE_PERCENTILE        send a duplicate request once this latency percentile is exceeded (0 = off)
+        SAQR_<NAME>_BREAKER_FAILURES        consecutive failed calls that open the circuit (0 = never)
+        SAQR_<NAME>_BREAKER_RESET           seconds before a trial call is let through
+    """
+
+    def __init__(self, name: str, timeout: float = 30.0, retries: int = 3):
+        self.name = name
+        prefix = f"SAQR_{name.upper()}_"
+        self.retries = env_int(prefix + "RETRIES", retries)
+        self.backoff = env_float(prefix + "BACKOFF", 0.5)
+        self.backoff_max = env_float(prefix + "BACKOFF_MAX", 20.0)
+        self.timeout = env_float(prefix + "TIMEOUT", timeout)
+        self.hedge_percentile = env_float(prefix + "HEDGE_PERCENTILE", 0.0)
+        rate = env_float(prefix + "RATE", 0.0)
+        self.requests = TokenBucket(rate, env_float(prefix + "BURST", None))
+        self.tokens = TokenBucket()
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(env_int(prefix + "BREAKER_FAILURES", 5), env_float(prefix + "BREAKER_RESET", 30.0))
+        self.stats = ResilienceStats()
+
+    def update_limits(self, headers: Mapping[str, str]) -> None:
+        """Re-sync the buckets from `x-ratelimit-*` and `retry-after` response headers"""
+        if not headers:
+            return
+
+        def number(key: str) -> Optional[float]:
+            try:
+                return float(headers[key])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        self.requests.update(number("x-ratelimit-remaining-requests"), parse_duration(headers.get("x-ratelimit-reset-requests")))
+        self.tokens.update(number("x-ratelimit-remaining-tokens"), parse_duration(headers.get("x-ratelimit-reset-tokens")))
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after:
+            self.requests.block(retry_after)
+
+    async def _throttle(self, cost: float) -> None:
+        waited = await self.requests.acquire()
+        if cost:
+            waited += await self.tokens.acquire(cost)
+        if waited > 0:
+            self.stats.rate_limit_waits += 1
+            self.stats.rate_limit_wait_seconds += waited
+            metrics.inc("saqr_rate_limit_wait_seconds_total", waited, provider=self.name)
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        if self.timeout > 0:
+            result = await asyncio.wait_for(fn(), self.timeout)
+        else:
+            result = await fn()
+        self.latency.record(time.perf_counter() - start)
+        return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]], cost: float, discard: Optional[Callable[[T], Awaitable]]) -> T:
+        await self._throttle(cost)
+        threshold = self.latency.percentile(self.hedge_percentile) if self.hedge_percentile > 0 else None
+        if threshold is None:
+            return await self._attempt(fn)
+        primary = asyncio.ensure_future(self._attempt(fn))
+        try:
+            # only hedge when the duplicate fits in the rate limit; a blocked bucket postpones it
+            wait = threshold
+            while True:
+                done, _ = await asyncio.wait({primary}, timeout=wait)
+                if done:
+                    return primary.result()
+                wait = self.requests.delay()
+                if wait <= 0 and self.requests.try_acquire():
+                    break
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+
+        self.stats.hedges += 1
+        metrics.inc("saqr_hedged_requests_total", provider=self.name)
+        hedge = asyncio.ensure_future(self._attempt(fn))
+        pending = {primary, hedge}
+        winner: Optional[asyncio.Future] = None
+        error: Optional[BaseException] = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = winner or task
+                    else:
+                        error = task.exception()
+            if winner is None:
+                raise error
+            if winner is hedge:
+                self.stats.hedge_wins += 1
+            return winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            # a loser that also finished holds an open response; release it
+            for task in (primary, hedge):
+                if task is not winner and discard is not None and task.done() and not task.cancelled() and task.exception() is None:
+                    try:
+                        await discard(task.result())
+                    except Exception:
+                        pass
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        cost: float = 0,
+        discard: Optional[Callable[[T], Awaitable]] = None,
+    ) -> T:
+        """Run `fn` under the rate limit, retrying retryable errors.
+
+        `cost` is drawn from the token budget (e.g. estimated prompt tokens).
+        `discard` releases the result of a hedged request that lost the race.
+        Raises `CircuitOpenError` while the breaker is open.
+        """
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open after {self.breaker.consecutive} failed calls")
+        self.stats.calls += 1
+        attempt = 0
+        while True:
+            try:
+                result = await self._hedged(fn, cost, discard)
+                self.breaker.success()
+                return result
+            except asyncio.CancelledError:
+                self.breaker.cancelled()
+                raise
+            except Exception as e:
+                self.update_limits(_headers(e))
+                if not is_retryable(e):
+                    # the provider answered, it just rejected this request
+                    self.breaker.success()
+                    raise
+                if attempt >= self.retries:
+                    self.stats.failures += 1
+                    metrics.inc("saqr_provider_failures_total", provider=self.name)
+                    if self.breaker.failure():
+                        self.stats.breaker_opens += 1
+                        logger.warning(f"{self.name} circuit opened for {self.breaker.reset:.0f}s")
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+                retry_after = parse_duration(_headers(e).get("retry-after"))
+                if retry_after:
+                    delay = max(delay, retry_after)
+                attempt += 1
+                self.stats.retries += 1
+                metrics.inc("saqr_provider_retries_total", provider=self.name)
+                logger.warning(f"{self.name} call failed ({type(e).__name__}: {e}), retry {attempt}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+
+_instances: dict[str, Resilience] = {}
+
+
+def get_resilience(name: str, **defaults) -> Resilience:
+    """Return the shared `Resilience` of provider `name`, so every caller draws from one rate limit"""
+    if name not in _instances:
+        _instances[name] = Resilience(name, **defaults)
+    return _instances[name]
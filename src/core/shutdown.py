@@ -0,0 +1,29 @@
+import signal
+import sys
+import threading
+from typing import Callable
+
+
+def on_termination(callback: Callable[[], None], signums: tuple = (signal.SIGTERM,)) -> bool:
+    """Run `callback` when one of `signums` arrives, then hand the signal to the previous handler.
+
+    The default SIGTERM action ends the process without running `atexit` handlers
+    or `finally` blocks, and `mcp run` never reaches `main()`, so anything that
+    must survive a normal client shutdown hooks the signal here. When there was no
+    Python handler before, the process exits with the usual 128 + signal status.
+    Handlers can only be installed from the main thread; returns False elsewhere.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    for signum in signums:
+        previous = signal.getsignal(signum)
+
+        def handler(signum, frame, previous=previous):
+            callback()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                sys.exit(128 + signum)
+
+        signal.signal(signum, handler)
+    return True
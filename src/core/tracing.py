@@ -0,0 +1,123 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Optional
+from src.core.config import env_bool, env_str
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("saqr_span", default=None)
+_NOOP = nullcontext()
+
+
+@dataclass
+class Span:
+    """A finished or in-flight span, shaped after the OpenTelemetry data model"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    kind: str = "internal"
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header value, used to link client and server spans"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> dict:
+        kinds = {"internal": 1, "server": 2, "client": 3}
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": kinds.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str]]:
+    parts = (value or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+class _SpanContext:
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end_ns = time.time_ns()
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self.token)
+        self.tracer.export(self.span)
+
+
+class Tracer:
+    """Minimal tracer emitting OTLP/JSON-shaped spans as JSON lines.
+
+    Enabled with `SAQR_TRACING`; spans go to `SAQR_TRACE_FILE` (default
+    `saqr_traces.jsonl`). Client and server processes can share one file, and
+    their spans join into one trace through the `traceparent` carried in the MCP
+    request `_meta`. When disabled, `span()` returns a shared no-op context.
+    """
+
+    def __init__(self, service_name: str = "saqr-client", enabled: Optional[bool] = None):
+        self.service_name = service_name
+        self.enabled = env_bool("SAQR_TRACING", False) if enabled is None else enabled
+        self.path = env_str("SAQR_TRACE_FILE", "saqr_traces.jsonl")
+        self._lock = threading.Lock()
+
+    def span(self, name: str, kind: str = "internal", traceparent: Optional[str] = None, **attributes):
+        if not self.enabled:
+            return _NOOP
+        remote = parse_traceparent(traceparent)
+        parent = _current_span.get()
+        if remote:
+            trace_id, parent_id = remote
+        elif parent:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_span_id=parent_id,
+            kind=kind,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        return _SpanContext(self, span)
+
+    def current_traceparent(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.traceparent if span else None
+
+    def export(self, span: Span) -> None:
+        record = {"resource": {"service.name": self.service_name}, "span": span.to_otlp()}
+        line = json.dumps(record) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+tracer = Tracer()
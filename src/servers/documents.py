@@ -0,0 +1,203 @@
+import asyncio
+import functools
+import hashlib
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from src.core.config import env_int, env_str
+from src.core.executor import executor
+from src.core.logger import logger
+from src.core.shutdown import on_termination
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _prune(directory: str, keep: int) -> None:
+    entries = [os.path.join(directory, name) for name in os.listdir(directory)]
+    if len(entries) <= keep:
+        return
+    entries.sort(key=os.path.getmtime)
+    for path in entries[:len(entries) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def markdown_to_html(content: str, cache_dir: Optional[str] = None) -> str:
+    """Markdown to HTML, cached on disk by content hash"""
+    path = os.path.join(cache_dir, f"{_digest(content)}.html") if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    import markdown
+
+    html = markdown.markdown(content, extensions=['extra', 'tables'])
+    if path:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, path)
+    return html
+
+
+@functools.lru_cache(maxsize=None)
+def _html_parser_class():
+    from htmldocx import HtmlToDocx
+
+    class TableGridHtmlToDocx(HtmlToDocx):
+        """HtmlToDocx that resolves each table's cell grid once.
+
+        The stock `handle_table` calls `table.cell(row, col)`, which rebuilds the
+        whole grid on every call, so large tables render in quadratic time.
+        """
+
+        def handle_table(self):
+            table_soup = self.tables[self.table_no]
+            rows, cols = self.get_table_dimensions(table_soup)
+            self.table = self.doc.add_table(rows, cols)
+
+            if self.table_style:
+                try:
+                    self.table.style = self.table_style
+                except KeyError as e:
+                    raise ValueError(f"Unable to apply style {self.table_style}.") from e
+
+            # a freshly added table has no merged cells, so the grid is row-major
+            cells = self.table._cells
+            for cell_row, row in enumerate(self.get_table_rows(table_soup)):
+                for cell_col, col in enumerate(self.get_table_columns(row)):
+                    cell_html = self.get_cell_html(col)
+                    if col.name == 'th':
+                        cell_html = "<b>%s</b>" % cell_html
+                    child_parser = TableGridHtmlToDocx()
+                    child_parser.copy_settings_from(self)
+                    child_parser.add_html_to_cell(cell_html, cells[cell_row * cols + cell_col])
+
+            # skip all tags until corresponding closing tag
+            self.instances_to_skip = len(table_soup.find_all('table'))
+            self.skip_tag = 'table'
+            self.skip = True
+            self.table = None
+
+    return TableGridHtmlToDocx
+
+
+def render_word_file(filename: str, title: str, content: str, cache_dir: Optional[str] = None, cache_size: int = 128) -> bool:
+    """Render markdown to a .docx file; returns False when an identical document was reused.
+
+    Runs inside the worker processes, so it only takes picklable arguments and
+    imports the document libraries lazily.
+    """
+    cached = os.path.join(cache_dir, f"{_digest(title, content)}.docx") if cache_dir else None
+    if cached and os.path.exists(cached):
+        shutil.copyfile(cached, filename)
+        return False
+
+    from docx import Document
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    html = markdown_to_html(content, cache_dir)
+
+    doc = Document()
+    doc.add_heading(title, level=0)
+
+    new_parser = _html_parser_class()()
+
+    new_parser.add_html_to_document(html, doc)
+    doc.save(filename)
+
+    if cached:
+        shutil.copyfile(filename, f"{cached}.{os.getpid()}.tmp")
+        os.replace(f"{cached}.{os.getpid()}.tmp", cached)
+        _prune(cache_dir, cache_size)
+    return True
+
+
+def _init_worker(parent: int) -> None:
+    """Detach a worker from the server's stdio and end it when the server is gone.
+
+    A stdio server talks MCP over stdin/stdout; a worker holding the pipe open
+    keeps the client waiting for EOF after the server has exited.
+    """
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    def watch_parent():
+        while os.getppid() == parent:
+            time.sleep(1.0)
+        os._exit(0)
+
+    threading.Thread(target=watch_parent, name="saqr-parent-watch", daemon=True).start()
+
+
+class DocumentRenderer:
+    """Renders Word documents in a pool of worker processes.
+
+    Markdown parsing and docx generation are CPU bound, so a thread pool still
+    holds the GIL and stalls every other tool. Workers are started on first use,
+    detached from the server's stdio, and stopped with the server (SIGTERM or exit):
+
+        SAQR_DOCUMENT_WORKERS       worker processes (default: CPU count, max 4; 0 renders in the thread pool)
+        SAQR_DOCUMENT_CACHE_DIR     rendered documents and HTML by content hash (default .saqr/documents)
+        SAQR_DOCUMENT_CACHE_SIZE    cached files kept (default 128)
+    """
+
+    def __init__(self, workers: Optional[int] = None, cache_dir: Optional[str] = None, cache_size: Optional[int] = None):
+        self.workers = workers if workers is not None else env_int("SAQR_DOCUMENT_WORKERS", min(4, os.cpu_count() or 1))
+        self.cache_dir = cache_dir or env_str("SAQR_DOCUMENT_CACHE_DIR", os.path.join(".saqr", "documents"))
+        self.cache_size = cache_size or env_int("SAQR_DOCUMENT_CACHE_SIZE", 128)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._sigterm_hooked = False
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs threads can deadlock the child
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(os.getpid(),),
+            )
+            self._stop_on_sigterm()
+        return self._pool
+
+    def _stop_on_sigterm(self) -> None:
+        """Stop the workers before the default SIGTERM action ends the server"""
+        if not self._sigterm_hooked:
+            self._sigterm_hooked = on_termination(lambda: self.shutdown(wait=False))
+
+    async def render(self, filename: str, title: str, content: str) -> bool:
+        """Render one document; returns False when it was served from the cache"""
+        args = (filename, title, content, self.cache_dir, self.cache_size)
+        if self.workers <= 0:
+            return await executor.run_sync("word_file_generator", render_word_file, *args)
+        try:
+            # the tool's limit is taken before the job reaches the pool
+            return await executor.run_in_pool("word_file_generator", self.pool, render_word_file, *args)
+        except BrokenProcessPool:
+            logger.warning("Document worker pool died, restarting it")
+            self.shutdown(wait=False)
+            raise
+
+    async def render_many(self, documents: list[tuple[str, str, str]]) -> list[Optional[Exception]]:
+        """Render several documents in parallel; returns the error of each, or None"""
+        results = await asyncio.gather(*(self.render(*document) for document in documents), return_exceptions=True)
+        return [result if isinstance(result, Exception) else None for result in results]
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,547 @@
+import asyncio
+import atexit
+import base64
+import hashlib
+import json
+import os
+import random
+import signal
+import threading
+import time
+import uuid
+from typing import Optional
+import numpy as np
+from src.core.config import env_bool, env_float, env_int, env_str
+from src.core.embedding import HashingEmbedder
+from src.core.executor import executor
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.core.shutdown import on_termination
+
+DEFAULT_USER_ID = "saqr_mcp"
+CUSTOM_INSTRUCTIONS = """
+Extract the Following Information:
+
+- Memory Type: The category or type of the memory (e.g., "code", "note", "task").
+- Content: The main content of the memory.
+- Description: A brief description or summary of the memory.
+- Related Information: Any additional details, context, or references relevant to the memory.
+"""
+
+
+class MemoryBackend:
+    """Storage interface behind the memory tools.
+
+    Every method returns plain dicts with at least a `memory` key; `search` results
+    also carry a `score` where the backend provides one.
+    """
+
+    name = "base"
+
+    async def add(self, content: str, memory_type: str) -> None:
+        raise NotImplementedError
+
+    def add_batch(self, contents: list[str], memory_type: str) -> None:
+        """Store several memories of one type in a single blocking upstream call"""
+        raise NotImplementedError
+
+    async def get_all(self, memory_type: Optional[str] = None, page: int = 1, page_size: int = 50) -> list[dict]:
+        raise NotImplementedError
+
+    async def search(self, query: str, memory_type: Optional[str] = None, limit: int = 10) -> list[dict]:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Write any buffered memories to the store (blocking)"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class Mem0Backend(MemoryBackend):
+    """Hosted mem0 platform, called through the shared thread pool.
+
+    This uses the blocking `MemoryClient`, not mem0's `AsyncMemoryClient`. The
+    write-behind flusher and the project sync call mem0 from their own threads,
+    outside any event loop. The async client's httpx session is tied to the loop
+    that first used it, and it validates the API key with a blocking request as
+    well, so a second client would only add a start-up round trip. The
+    executor's limits still apply: a call that timed out keeps its slot until
+    its thread returns.
+    """
+
+    name = "mem0"
+
+    def __init__(self, api_key: Optional[str] = None, user_id: str = DEFAULT_USER_ID):
+        from mem0 import MemoryClient
+
+        self.user_id = user_id
+        self.client = MemoryClient(api_key=api_key or os.getenv("MEM0_API_KEY"), host=env_str("MEM0_HOST"))
+        self._sync_project_instructions()
+
+    def _sync_project_instructions(self) -> None:
+        """Push CUSTOM_INSTRUCTIONS once in the background.
+
+        The hash of the last pushed instructions is cached under `SAQR_STATE_DIR`
+        (default `.saqr`), so restarts skip the call unless the instructions change.
+        """
+        state_path = os.path.join(env_str("SAQR_STATE_DIR", ".saqr"), "mem0_project.json")
+        digest = hashlib.sha256(CUSTOM_INSTRUCTIONS.encode()).hexdigest()
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                if json.load(f).get("custom_instructions_sha256") == digest:
+                    return
+        except (OSError, ValueError):
+            pass
+
+        def sync():
+            try:
+                self.client.update_project(custom_instructions=CUSTOM_INSTRUCTIONS)
+                os.makedirs(os.path.dirname(state_path), exist_ok=True)
+                with open(state_path, "w", encoding="utf-8") as f:
+                    json.dump({"custom_instructions_sha256": digest}, f)
+            except Exception as e:
+                logger.warning(f"Could not update mem0 project instructions: {e}")
+
+        threading.Thread(target=sync, name="mem0-project-sync", daemon=True).start()
+
+    @staticmethod
+    def _filters(memory_type: Optional[str]) -> Optional[dict]:
+        return {"AND": [{"metadata.memory_type": memory_type}]} if memory_type else None
+
+    def add_batch(self, contents: list[str], memory_type: str) -> None:
+        messages = [{"role": "user", "content": content} for content in contents]
+        self.client.add(messages, user_id=self.user_id, output_format="v1.1", metadata={"memory_type": memory_type})
+
+    async def add(self, content: str, memory_type: str) -> None:
+        await executor.run_sync("add_memory", self.add_batch, [content], memory_type)
+
+    async def get_all(self, memory_type: Optional[str] = None, page: int = 1, page_size: int = 50) -> list[dict]:
+        memories = await executor.run_sync(
+            "get_all_memories", self.client.get_all,
+            user_id=self.user_id, page=page, page_size=page_size, filters=self._filters(memory_type),
+        )
+        return memories["results"]
+
+    async def search(self, query: str, memory_type: Optional[str] = None, limit: int = 10) -> list[dict]:
+        memories = await executor.run_sync(
+            "search_memories", self.client.search, query,
+            user_id=self.user_id, output_format="v1.1", filters=self._filters(memory_type),
+        )
+        return memories["results"][:limit]
+
+
+class VectorIndex:
+    """Normalized float32 matrix with amortized appends and per-type row indices"""
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.size = 0
+        self._types: dict[str, list[int]] = {}
+        self._type_arrays: dict[str, np.ndarray] = {}
+
+    def add(self, vectors: np.ndarray, memory_types: list[str]) -> None:
+        needed = self.size + len(vectors)
+        if needed > len(self._matrix):
+            grown = np.zeros((max(needed, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+            grown[:self.size] = self._matrix[:self.size]
+            self._matrix = grown
+        self._matrix[self.size:needed] = vectors
+        for row, memory_type in enumerate(memory_types, start=self.size):
+            self._types.setdefault(memory_type, []).append(row)
+            self._type_arrays.pop(memory_type, None)
+        self.size = needed
+
+    def rows_for(self, memory_type: str) -> np.ndarray:
+        if memory_type not in self._type_arrays:
+            self._type_arrays[memory_type] = np.asarray(self._types.get(memory_type, []), dtype=np.int64)
+        return self._type_arrays[memory_type]
+
+    def search(self, query: np.ndarray, limit: int, memory_type: Optional[str] = None) -> list[tuple[int, float]]:
+        if memory_type is None:
+            rows = None
+            scores = self._matrix[:self.size] @ query
+        else:
+            rows = self.rows_for(memory_type)
+            scores = self._matrix[rows] @ query if len(rows) else np.zeros(0, dtype=np.float32)
+        if not len(scores):
+            return []
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        ids = rows[top] if rows is not None else top
+        return [(int(i), float(scores[j])) for i, j in zip(ids, top)]
+
+
+class LocalMemoryBackend(MemoryBackend):
+    """On-disk memories with an in-process vectorized similarity index.
+
+    Memories are appended to `memories.jsonl` and their embeddings to `embeddings.f32`
+    inside `SAQR_MEMORY_DIR` (default `.saqr/memory`); both files are append-only and
+    are loaded back into the index on start.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Optional[str] = None, embedder: Optional[HashingEmbedder] = None):
+        self.directory = directory or env_str("SAQR_MEMORY_DIR", os.path.join(".saqr", "memory"))
+        self.embedder = embedder or HashingEmbedder(env_int("SAQR_MEMORY_EMBEDDING_DIM", 256))
+        self.records: list[dict] = []
+        self.index = VectorIndex(self.embedder.dim)
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._records_path = os.path.join(self.directory, "memories.jsonl")
+        self._vectors_path = os.path.join(self.directory, "embeddings.f32")
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self._records_path):
+            return
+        with open(self._records_path, encoding="utf-8") as f:
+            self.records = [json.loads(line) for line in f if line.strip()]
+        vectors = None
+        if os.path.exists(self._vectors_path):
+            vectors = np.fromfile(self._vectors_path, dtype=np.float32)
+            if vectors.size != len(self.records) * self.embedder.dim:
+                vectors = None
+        if vectors is None:
+            vectors = self.embedder.embed_many([r["memory"] for r in self.records])
+            vectors.astype(np.float32).tofile(self._vectors_path)
+        self.index.add(vectors.reshape(-1, self.embedder.dim), [r["memory_type"] for r in self.records])
+
+    def add_many(self, items: list[tuple[str, str]]) -> None:
+        """Store (content, memory_type) pairs in one append"""
+        vectors = self.embedder.embed_many([content for content, _ in items]).astype(np.float32)
+        now = time.time()
+        records = [
+            {"id": uuid.uuid4().hex, "memory": content, "memory_type": memory_type, "created_at": now}
+            for content, memory_type in items
+        ]
+        with self._lock:
+            with open(self._records_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+            with open(self._vectors_path, "ab") as f:
+                vectors.tofile(f)
+            self.records.extend(records)
+            self.index.add(vectors, [memory_type for _, memory_type in items])
+
+    def add_batch(self, contents: list[str], memory_type: str) -> None:
+        self.add_many([(content, memory_type) for content in contents])
+
+    def _page(self, memory_type: Optional[str], page: int, page_size: int) -> list[dict]:
+        rows = self.index.rows_for(memory_type) if memory_type else range(len(self.records))
+        start = (max(page, 1) - 1) * page_size
+        return [self.records[int(i)] for i in rows[start:start + page_size]]
+
+    def _search(self, query: str, memory_type: Optional[str], limit: int) -> list[dict]:
+        vector = self.embedder.embed(query)
+        with self._lock:
+            hits = self.index.search(vector, limit, memory_type)
+        return [{**self.records[i], "score": score} for i, score in hits if score > 0]
+
+    async def add(self, content: str, memory_type: str) -> None:
+        await executor.run_sync("add_memory", self.add_many, [(content, memory_type)])
+
+    async def get_all(self, memory_type: Optional[str] = None, page: int = 1, page_size: int = 50) -> list[dict]:
+        return await executor.run_sync("get_all_memories", self._page, memory_type, page, page_size)
+
+    async def search(self, query: str, memory_type: Optional[str] = None, limit: int = 10) -> list[dict]:
+        return await executor.run_sync("search_memories", self._search, query, memory_type, limit)
+
+
+class WriteBehindBackend(MemoryBackend):
+    """Buffers `add` calls in memory and writes them to the wrapped backend in batches.
+
+    `add` returns as soon as the memory is queued. A background thread groups
+    pending memories by type and flushes a group once it holds
+    `SAQR_MEMORY_BATCH_SIZE` memories or its oldest memory is
+    `SAQR_MEMORY_FLUSH_INTERVAL` seconds old. Failed flushes are retried with
+    jittered exponential backoff (`SAQR_MEMORY_FLUSH_RETRIES`,
+    `SAQR_MEMORY_FLUSH_BACKOFF`). `close` flushes everything; whatever still cannot
+    be written is spooled to `SAQR_STATE_DIR` and queued again on the next start.
+    It runs at exit and on SIGTERM/SIGINT, which is how an MCP client stops a
+    stdio server.
+
+    `search` merges the unflushed memories into the backend's results, so a memory
+    is found right after `add` returns. `get_all` only returns stored memories:
+    paging is positional, and queued memories in front of the first page would
+    shift every position as they are flushed. `fetch_memory_page` flushes before
+    the first page instead.
+    """
+
+    def __init__(
+        self,
+        backend: MemoryBackend,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+    ):
+        self.backend = backend
+        self.name = backend.name
+        self.batch_size = max(1, batch_size or env_int("SAQR_MEMORY_BATCH_SIZE", 20))
+        self.flush_interval = flush_interval if flush_interval is not None else env_float("SAQR_MEMORY_FLUSH_INTERVAL", 2.0)
+        self.retries = retries if retries is not None else env_int("SAQR_MEMORY_FLUSH_RETRIES", 5)
+        self.backoff = backoff if backoff is not None else env_float("SAQR_MEMORY_FLUSH_BACKOFF", 0.5)
+        self.spool_path = os.path.join(env_str("SAQR_STATE_DIR", ".saqr"), f"{self.name}_memory_spool.jsonl")
+        self._embedder = HashingEmbedder()
+        # memory_type -> queued records, oldest first; records being flushed stay readable in _inflight
+        self._pending: dict[str, list[dict]] = {}
+        self._inflight: list[dict] = []
+        # reentrant: `close` may run from a signal handler while the main thread holds it
+        self._lock = threading.RLock()
+        # notified whenever a batch stops being in flight
+        self._idle = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._closed = False
+        self._signals_hooked = False
+        self._load_spool()
+        self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        self._close_on_signal()
+
+    def _close_on_signal(self) -> None:
+        """Flush before SIGTERM/SIGINT ends the process; those skip `atexit` handlers.
+
+        Backends are usually built in a worker thread, where signal handlers cannot
+        be installed, so `add` tries again from the event loop.
+        """
+        if not self._signals_hooked:
+            self._signals_hooked = on_termination(self.close, (signal.SIGTERM, signal.SIGINT))
+
+    def _load_spool(self) -> None:
+        try:
+            with open(self.spool_path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            os.remove(self.spool_path)
+        except (OSError, ValueError):
+            return
+        for record in records:
+            self._pending.setdefault(record["memory_type"], []).append(record)
+        logger.info(f"Requeued {len(records)} memories spooled by a previous run")
+
+    def _unflushed(self, memory_type: Optional[str]) -> list[dict]:
+        with self._lock:
+            records = self._inflight + [r for batch in self._pending.values() for r in batch]
+        return [r for r in records if not memory_type or r["memory_type"] == memory_type]
+
+    def _due(self, now: float, force: bool) -> tuple[list[tuple[str, list[dict]]], Optional[float]]:
+        """Take the batches ready to flush and return them with the seconds until the next one is due"""
+        batches, next_due = [], None
+        with self._lock:
+            for memory_type, records in list(self._pending.items()):
+                due_at = records[0]["created_at"] + self.flush_interval
+                if force or len(records) >= self.batch_size or due_at <= now:
+                    batch = records[:self.batch_size]
+                    del records[:self.batch_size]
+                    if not records:
+                        del self._pending[memory_type]
+                    self._inflight.extend(batch)
+                    batches.append((memory_type, batch))
+                else:
+                    next_due = min(next_due or due_at - now, due_at - now)
+        return batches, next_due
+
+    def _write(self, memory_type: str, batch: list[dict]) -> bool:
+        for attempt in range(self.retries + 1):
+            try:
+                with metrics.timer("saqr_memory_flush_seconds", backend=self.name):
+                    self.backend.add_batch([r["memory"] for r in batch], memory_type)
+                metrics.inc("saqr_memory_writes_flushed_total", len(batch), backend=self.name)
+                return True
+            except Exception as e:
+                if attempt == self.retries:
+                    logger.error(f"Giving up on {len(batch)} {memory_type} memories after {attempt + 1} attempts: {e}")
+                    return False
+                delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+                logger.warning(f"Flushing {len(batch)} {memory_type} memories failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+        return False
+
+    def _write_all(self, batches: list[tuple[str, list[dict]]]) -> bool:
+        """Write batches taken by `_due`; returns False when one of them had to be queued again"""
+        written_all = True
+        for memory_type, batch in batches:
+            written = self._write(memory_type, batch)
+            ids = {r["id"] for r in batch}
+            with self._idle:
+                self._inflight = [r for r in self._inflight if r["id"] not in ids]
+                if not written:
+                    # keep the memories for the next flush (or the shutdown spool)
+                    self._pending.setdefault(memory_type, [])[:0] = batch
+                    written_all = False
+                self._idle.notify_all()
+        return written_all
+
+    def _flush(self, force: bool = False) -> Optional[float]:
+        """Flush due batches and return how long the flusher may sleep"""
+        batches, next_due = self._due(time.time(), force)
+        if not self._write_all(batches):
+            return self.flush_interval
+        return 0 if batches and self._pending else next_due
+
+    def _run(self) -> None:
+        timeout = 0 if self._pending else None
+        while not self._closed:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._closed:
+                break
+            timeout = self._flush()
+
+    def flush(self) -> None:
+        """Write every queued memory now and wait for the batches the flusher is writing (blocking)"""
+        batches, _ = self._due(time.time(), force=True)
+        written = self._write_all(batches)
+        with self._idle:
+            self._idle.wait_for(lambda: not self._inflight)
+        if not written:
+            raise RuntimeError("Some queued memories could not be written yet")
+
+    async def add(self, content: str, memory_type: str) -> None:
+        self._close_on_signal()
+        record = {"id": uuid.uuid4().hex, "memory": content, "memory_type": memory_type, "created_at": time.time()}
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("memory backend is closed")
+            queue = self._pending.setdefault(memory_type, [])
+            queue.append(record)
+            first = len(queue) == 1
+        if first or len(queue) >= self.batch_size:
+            # a new group needs a timer, a full one can go now
+            self._wake.set()
+
+    def add_batch(self, contents: list[str], memory_type: str) -> None:
+        self.backend.add_batch(contents, memory_type)
+
+    async def get_all(self, memory_type: Optional[str] = None, page: int = 1, page_size: int = 50) -> list[dict]:
+        return await self.backend.get_all(memory_type, page, page_size)
+
+    async def search(self, query: str, memory_type: Optional[str] = None, limit: int = 10) -> list[dict]:
+        memories = await self.backend.search(query, memory_type, limit)
+        unflushed = self._unflushed(memory_type)
+        if not unflushed:
+            return memories
+        stored = {m.get("memory") for m in memories}
+        vector = self._embedder.embed(query)
+        for record in unflushed:
+            score = float(self._embedder.embed(record["memory"]) @ vector)
+            if score > 0 and record["memory"] not in stored:
+                memories.append({**record, "score": score})
+        memories.sort(key=lambda m: m.get("score") or 0.0, reverse=True)
+        return memories[:limit]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._flush(force=True)
+        leftover = self._unflushed(None)
+        if leftover:
+            os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in leftover)
+            logger.warning(f"Spooled {len(leftover)} unwritten memories to {self.spool_path}")
+        self.backend.close()
+
+
+def encode_cursor(page: int, index: int, page_size: int, memory_type: Optional[str]) -> str:
+    raw = json.dumps({"p": page, "i": index, "s": page_size, "t": memory_type}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, memory_type: Optional[str]) -> tuple[int, int, int]:
+    """Return (page, index, page_size) from a cursor issued for the same memory_type"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        page, index, page_size = int(data["p"]), int(data["i"]), int(data["s"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if data.get("t") != memory_type:
+        raise ValueError("Cursor was issued for a different memory_type")
+    return page, index, page_size
+
+
+async def fetch_memory_page(
+    backend: MemoryBackend,
+    memory_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> tuple[list[str], Optional[str]]:
+    """Read one bounded slice of the store and the cursor of the next one.
+
+    The slice holds at most `limit` memories (`SAQR_MEMORY_PAGE_SIZE`, 0 for as
+    many as fit) and at most `max_chars` characters of encoded output
+    (`SAQR_MEMORY_PAGE_MAX_CHARS`). The upstream pages it spans
+    (`SAQR_MEMORY_UPSTREAM_PAGE_SIZE` each) are fetched concurrently, at most
+    `SAQR_MEMORY_PAGE_CONCURRENCY` at a time.
+
+    A cursor is a position in the store, so the first slice flushes buffered
+    writes first; memories added while paging land after the position and do not
+    shift it.
+    """
+    max_limit = env_int("SAQR_MEMORY_PAGE_MAX", 500)
+    limit = env_int("SAQR_MEMORY_PAGE_SIZE", 50) if limit is None else limit
+    limit = max_limit if limit <= 0 else min(limit, max_limit)
+    max_chars = max_chars or env_int("SAQR_MEMORY_PAGE_MAX_CHARS", 8000)
+    if cursor:
+        page, index, page_size = decode_cursor(cursor, memory_type)
+    else:
+        page, index, page_size = 1, 0, env_int("SAQR_MEMORY_UPSTREAM_PAGE_SIZE", 100)
+        await executor.run_sync("get_all_memories", backend.flush)
+
+    semaphore = asyncio.Semaphore(env_int("SAQR_MEMORY_PAGE_CONCURRENCY", 4))
+
+    async def fetch(number: int) -> list[dict]:
+        async with semaphore:
+            return await backend.get_all(memory_type, page=number, page_size=page_size)
+
+    count = -(-(index + limit) // page_size)
+    pages = await asyncio.gather(*(fetch(page + k) for k in range(count)), return_exceptions=True)
+    if isinstance(pages[0], BaseException):
+        raise pages[0]
+
+    memories, used = [], 0
+    for k, items in enumerate(pages):
+        if isinstance(items, BaseException):
+            # only an empty or short page ends the store; after a failure the caller resumes here
+            if not memories:
+                raise items
+            logger.warning(f"Stopping at memory page {page + k}: {items}")
+            return memories, encode_cursor(page + k, 0, page_size, memory_type)
+        for i in range(index if k == 0 else 0, len(items)):
+            text = items[i]["memory"]
+            size = len(json.dumps(text)) + 1
+            if len(memories) >= limit or (memories and used + size > max_chars):
+                return memories, encode_cursor(page + k, i, page_size, memory_type)
+            memories.append(text)
+            used += size
+        if len(items) < page_size:
+            return memories, None
+    return memories, encode_cursor(page + count, 0, page_size, memory_type)
+
+
+MEMORY_BACKENDS: dict[str, type[MemoryBackend]] = {
+    "mem0": Mem0Backend,
+    "local": LocalMemoryBackend,
+}
+
+
+def create_memory_backend(name: Optional[str] = None) -> MemoryBackend:
+    """Build the backend selected by `SAQR_MEMORY_BACKEND` (mem0 or local).
+
+    Writes go through a `WriteBehindBackend` unless `SAQR_MEMORY_WRITE_BEHIND=false`.
+    """
+    name = name or env_str("SAQR_MEMORY_BACKEND", "mem0")
+    if name not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend: {name}")
+    backend = MEMORY_BACKENDS[name]()
+    if env_bool("SAQR_MEMORY_WRITE_BEHIND", True):
+        backend = WriteBehindBackend(backend)
+    return backend
@@ -1,39 +1,119 @@
-from mcp.server.fastmcp import FastMCP
-import asyncio
-from tavily import TavilyClient
+from mcp.server.fastmcp import FastMCP, Context
+from pydantic import BaseModel, Field
+import argparse
+import functools
 import os
+import sys
+import weakref
 from dotenv import load_dotenv
-from docx import Document
-import markdown
-from htmldocx import HtmlToDocx
-from mem0 import MemoryClient
 import json
-import datetime
+
+# `mcp run` loads this file as a script, so make the project root importable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.core.executor import executor
+from src.core.cache import TTLCache, normalize_query
+from src.core.config import env_int, env_float, env_str
+from src.core.lazy import LazyResource
+from src.core.metrics import metrics
+from src.core.tracing import tracer
+from src.servers.search_providers import create_search_router
+from src.servers.thought_log import ThoughtLog
 
 _ = load_dotenv()
 
-mcp = FastMCP("Saqr Server")
+class SaqrMCP(FastMCP):
+    """FastMCP that records which transport it serves, however it was started (`main()` or `mcp run`)"""
+
+    transport: "str | None" = None
+
+    async def run_stdio_async(self) -> None:
+        self.transport = "stdio"
+        await super().run_stdio_async()
+
+    def sse_app(self):
+        self.transport = "sse"
+        return super().sse_app()
+
+
+mcp = SaqrMCP("Saqr Server")
+tracer.service_name = "saqr-server"
+
+
+def _request_traceparent():
+    try:
+        meta = mcp.get_context().request_context.meta
+    except ValueError:
+        return None
+    return getattr(meta, "traceparent", None) if meta else None
+
+
+def _instrumented(fn):
+    """Time a tool body and, when the client sent a traceparent, record it as a child span"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if not (metrics.enabled or tracer.enabled):
+            return await fn(*args, **kwargs)
+        traceparent = _request_traceparent() if tracer.enabled else None
+        with tracer.span(f"tool {fn.__name__}", kind="server", traceparent=traceparent, tool=fn.__name__), \
+                metrics.timer("saqr_server_tool_seconds", tool=fn.__name__):
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+def _create_memory_backend():
+    from src.servers.memory_backends import create_memory_backend
+
+    return create_memory_backend()
 
-search_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
 
-mem0_client = MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
-DEFAULT_USER_ID = "saqr_mcp"
-CUSTOM_INSTRUCTIONS = """
-Extract the Following Information:
+# clients are built on first use so the server starts without touching the network
+search_cache = TTLCache(
+    maxsize=env_int("SAQR_SEARCH_CACHE_SIZE", 256),
+    ttl=env_float("SAQR_SEARCH_CACHE_TTL", 900.0),
+    path=env_str("SAQR_SEARCH_CACHE_PATH"),
+)
+# providers and strategy behind web_search (SAQR_SEARCH_PROVIDERS, SAQR_SEARCH_STRATEGY)
+search_router = create_search_router()
+
+memory_backend = LazyResource("memory_backend", _create_memory_backend)
+
+
+# thoughts are kept per client connection, so clients sharing one server never see each other's logs
+_session_thoughts: "weakref.WeakKeyDictionary[object, ThoughtLog]" = weakref.WeakKeyDictionary()
+_default_thoughts: "ThoughtLog | None" = None
 
-- Memory Type: The category or type of the memory (e.g., "code", "note", "task").
-- Content: The main content of the memory.
-- Description: A brief description or summary of the memory.
-- Related Information: Any additional details, context, or references relevant to the memory.
-"""
-mem0_client.update_project(custom_instructions=CUSTOM_INSTRUCTIONS)
 
+def _thought_log_path(name: str) -> "str | None":
+    directory = env_str("SAQR_THOUGHTS_DIR")
+    return os.path.join(directory, name) if directory else None
 
-thoughts_log = []
+
+def thoughts_log(ctx: Context) -> ThoughtLog:
+    """Return the thought log of the session that issued the current request"""
+    global _default_thoughts
+    try:
+        session = ctx.session
+    except ValueError:
+        # called outside a request (e.g. in-process benchmarks)
+        session = None
+    # a stdio server has exactly one client, so its log is resumed after a restart;
+    # SSE sessions only spill to disk and their files are removed when they end
+    if session is None or mcp.transport == "stdio":
+        if _default_thoughts is None:
+            _default_thoughts = ThoughtLog(_thought_log_path("thoughts"))
+        return _default_thoughts
+    log = _session_thoughts.get(session)
+    if log is None:
+        log = ThoughtLog(_thought_log_path(f"thoughts-{os.getpid()}-{id(session):x}"))
+        weakref.finalize(session, log.close, True)
+        _session_thoughts[session] = log
+    return log
 
 
 # web search tool
 @mcp.tool()
+@_instrumented
 async def web_search(query: str):
     """
     This tool performs real-time web searches to retrieve up-to-date information from the internet
@@ -45,18 +125,64 @@ async def web_search(query: str):
     """
 
     try:
-        results = search_client.search(query)
+        results = await search_cache.get_or_fetch(
+            normalize_query(query), lambda: search_router.search(query)
+        )
         if results:
-            return results["results"]
+            return results
         else:
             return "No results found."
     except Exception as e:
         print(f"Error during web search: {e}")
-        return "An error occurred while performing the search."
+        # an outdated answer beats none while every provider is rate limiting or down
+        stale = search_cache.get_stale(normalize_query(query))
+        if stale:
+            return stale
+        return f"An error occurred while performing the search ({type(e).__name__}: {e})."
+
+
+@mcp.resource("stats://web_search_cache")
+def web_search_cache_stats() -> str:
+    """Hit, miss, coalescing and upstream latency counters for the web_search cache"""
+    return json.dumps(search_cache.stats.as_dict(), indent=2)
+
+
+@mcp.resource("stats://web_search_upstream")
+def web_search_upstream_stats() -> str:
+    """Strategy, wins, errors, retries and circuit breaker state of each search provider"""
+    return json.dumps(search_router.as_dict(), indent=2)
+
+
+@mcp.resource("metrics://prometheus")
+def metrics_prometheus() -> str:
+    """Server-side tool timings and executor wait times in Prometheus text format"""
+    return metrics.to_prometheus()
+
+
+@mcp.resource("metrics://json")
+def metrics_json() -> str:
+    """Server-side tool timings and executor wait times as JSON"""
+    return json.dumps(metrics.to_json(), indent=2)
+
+
+def _create_document_renderer():
+    from src.servers.documents import DocumentRenderer
+
+    return DocumentRenderer()
+
+
+document_renderer = LazyResource("word_file_generator", _create_document_renderer)
+
+
+class WordDocument(BaseModel):
+    filename: str = Field(description="The name of the Word file to be saved (e.g., 'output.docx').")
+    title: str = Field(description="The title to be added as a heading.")
+    content: str = Field(description="The main text content as a Markdown string.")
 
 
 # word files generator tool
 @mcp.tool()
+@_instrumented
 async def word_file_generator(filename: str, title: str, content: str) -> str:
     """
     This tool generates Microsoft Word (.docx) documents based on structured input
@@ -70,28 +196,46 @@ async def word_file_generator(filename: str, title: str, content: str) -> str:
     """
 
     try:
-        html = markdown.markdown(content, extensions=['extra', 'tables'])
-
-        doc = Document()
-        doc.add_heading(title, level=0)
-
-        new_parser = HtmlToDocx()
-        
-        new_parser.add_html_to_document(html, doc)
-        doc.save(filename)
-
+        renderer = await document_renderer.get()
+        await renderer.render(filename, title, content)
         return f"The word file created successfully with name: {filename}"
     except Exception as e:
         print(f"Error creating Word file: {e}")
         return f"An error occurred while creating the Word file: {e}"
 
 
+@mcp.tool()
+@_instrumented
+async def batch_word_file_generator(documents: list[WordDocument]) -> str:
+    """
+    This tool generates several Microsoft Word (.docx) documents in parallel
+
+    Args:
+        - documents (list): The documents to create, each with a filename, a title and Markdown content.
+    Return:
+        - One status line per document
+    """
+
+    try:
+        renderer = await document_renderer.get()
+        errors = await renderer.render_many([(d.filename, d.title, d.content) for d in documents])
+        return "\n".join(
+            f"The word file created successfully with name: {d.filename}" if error is None
+            else f"An error occurred while creating the Word file {d.filename}: {error}"
+            for d, error in zip(documents, errors)
+        )
+    except Exception as e:
+        print(f"Error creating Word files: {e}")
+        return f"An error occurred while creating the Word files: {e}"
+
+
 # memory tools
 @mcp.tool(
     description="""Add a new memory to mem0. This tool stores various types of information for future reference.
     Specify the memory type and the content to store.
     """
 )
+@_instrumented
 async def add_memory(memory_type: str, content: str) -> str:
     """Add a new memory to mem0.
 
@@ -100,8 +244,8 @@ async def add_memory(memory_type: str, content: str) -> str:
         content: The content of the memory to store.
     """
     try:
-        messages = [{"role": "user", "content": content}]
-        mem0_client.add(messages, user_id=DEFAULT_USER_ID, output_format="v1.1", metadata={"memory_type": memory_type})
+        backend = await memory_backend.get()
+        await backend.add(content, memory_type)
         return f"Successfully added memory of type {memory_type}: {content}"
     except Exception as e:
         print(f"Error adding memory: {str(e)}")
@@ -113,17 +257,24 @@ async def add_memory(memory_type: str, content: str) -> str:
     This tool is useful when you need complete context of all previously stored memories or specific types of memories.
     """
 )
-async def get_all_memories(memory_type: str = None) -> str:
+@_instrumented
+async def get_all_memories(memory_type: str = None, cursor: str = None, limit: int = None) -> str:
     """Get all memories for the default user, optionally filtered by memory type.
 
+    Results are paginated. Pass the returned `next_cursor` back to read the next page;
+    it is null once every memory has been returned.
+
     Args:
         memory_type: Optional. If provided, only memories of this type are returned.
+        cursor: Optional. The `next_cursor` of the previous page.
+        limit: Optional. Maximum memories to return, 0 for as many as fit in one response.
     """
     try:
-        filter_criteria = {"AND": [{"metadata.memory_type": memory_type}]} if memory_type else None
-        memories = mem0_client.get_all(user_id=DEFAULT_USER_ID, page=1, page_size=50, filters=filter_criteria)
-        flattened_memories = [memory["memory"] for memory in memories["results"]]
-        return json.dumps(flattened_memories, indent=2)
+        from src.servers.memory_backends import fetch_memory_page
+
+        backend = await memory_backend.get()
+        memories, next_cursor = await fetch_memory_page(backend, memory_type, cursor, limit)
+        return json.dumps({"memories": memories, "next_cursor": next_cursor}, separators=(",", ":"))
     except Exception as e:
         print(f"Error getting memories: {str(e)}")
         return f"Error getting memories: {str(e)}"
@@ -134,17 +285,22 @@ async def get_all_memories(memory_type: str = None) -> str:
     This tool should be called for EVERY user query to find relevant information.
     """
 )
-async def search_memories(query: str, memory_type: str = None) -> str:
+@_instrumented
+async def search_memories(query: str, memory_type: str = None, include_scores: bool = False) -> str:
     """Search memories using semantic search, optionally filtered by memory type.
 
     Args:
         query: Search query string describing what you're looking for.
         memory_type: Optional. If provided, only search within memories of this type.
+        include_scores: Optional. Return each memory with its relevance score.
     """
     try:
-        filter_criteria = {"AND": [{"metadata.memory_type": memory_type}]} if memory_type else None
-        memories = mem0_client.search(query, user_id=DEFAULT_USER_ID, output_format="v1.1", filters=filter_criteria)
-        flattened_memories = [memory["memory"] for memory in memories["results"]]
+        backend = await memory_backend.get()
+        memories = await backend.search(query, memory_type)
+        if include_scores:
+            scored = [{"memory": memory["memory"], "score": memory.get("score")} for memory in memories]
+            return json.dumps(scored, indent=2)
+        flattened_memories = [memory["memory"] for memory in memories]
         return json.dumps(flattened_memories, indent=2)
     except Exception as e:
         print(f"Error searching memories: {str(e)}")
@@ -153,7 +309,8 @@ async def search_memories(query: str, memory_type: str = None) -> str:
 
 # think tools
 @mcp.tool()
-async def think(thought: str) -> str:
+@_instrumented
+async def think(thought: str, ctx: Context) -> str:
     """Use this tool to think about something. It will not obtain new information or change anything, 
     but just append the thought to the log. Use it when complex reasoning or cache memory is needed.
 
@@ -161,73 +318,97 @@ async def think(thought: str) -> str:
         thought: A thought to think about. This can be structured reasoning, step-by-step analysis,
                 policy verification, or any other mental process that helps with problem-solving, with a strict requirement to record the source URL immediately after each piece of evidence that could be used as a reference citation for the final action.
     """
-    global thoughts_log
-    timestamp = datetime.datetime.now().isoformat()
-    thoughts_log.append({
-        "timestamp": timestamp,
-        "thought": thought
-    })
+    thoughts_log(ctx).append(thought)
             
     return thought
 
 
 @mcp.tool()
-async def get_thoughts() -> str:
-    """Retrieve all thoughts recorded in the current session.
+@_instrumented
+async def get_thoughts(ctx: Context, start: int = None, limit: int = None) -> str:
+    """Retrieve thoughts recorded in the current session, newest page first.
             
     This tool helps review the thinking process that has occurred so far.
+
+    Args:
+        start: Number of the first thought to return (1-based). Omit it to get the most recent thoughts.
+        limit: Maximum number of thoughts to return.
     """
-    global thoughts_log
-    if not thoughts_log:
+    thoughts = thoughts_log(ctx)
+    if not thoughts:
         return "No thoughts have been recorded yet."
-            
-    formatted_thoughts = []
-    for i, entry in enumerate(thoughts_log, 1):
-        formatted_thoughts.append(f"Thought #{i} ({entry['timestamp']}):\n{entry['thought']}\n")
+
+    limit = max(1, min(limit or env_int("SAQR_THOUGHTS_PAGE_SIZE", 20), env_int("SAQR_THOUGHTS_PAGE_MAX", 200)))
+    page = thoughts.range(start, limit) if start else thoughts.tail(limit)
+    if not page:
+        return f"No thoughts from #{start}; there are {len(thoughts)} recorded thoughts."
+
+    formatted_thoughts = [f"Thought #{i} ({entry['timestamp']}):\n{entry['thought']}\n" for i, entry in page]
+    first, last = page[0][0], page[-1][0]
+    if first > thoughts.first_available or last < len(thoughts):
+        more = []
+        if first > thoughts.first_available:
+            more.append(f"start={max(thoughts.first_available, first - limit)} for earlier ones")
+        if last < len(thoughts):
+            more.append(f"start={last + 1} for later ones")
+        formatted_thoughts.insert(0, f"Showing thoughts #{first}-#{last} of {len(thoughts)}; pass {' or '.join(more)}.\n")
             
     return "\n".join(formatted_thoughts)
 
 
 @mcp.tool()
-async def clear_thoughts() -> str:
+@_instrumented
+async def clear_thoughts(ctx: Context) -> str:
     """Clear all recorded thoughts from the current session.
             
     Use this to start fresh if the thinking process needs to be reset.
     """
-    global thoughts_log
-    count = len(thoughts_log)
-    thoughts_log = []
+    count = thoughts_log(ctx).clear()
     return f"Cleared {count} recorded thoughts."
 
 
 @mcp.tool()
-async def get_thought_stats() -> str:
+@_instrumented
+async def get_thought_stats(ctx: Context) -> str:
     """Get statistics about the thoughts recorded in the current session."""
-    global thoughts_log
-    if not thoughts_log:
+    thoughts = thoughts_log(ctx)
+    if not thoughts:
         return "No thoughts have been recorded yet."
             
-    total_thoughts = len(thoughts_log)
-    avg_length = sum(len(entry["thought"]) for entry in thoughts_log) / total_thoughts if total_thoughts else 0
-    longest_thought = max((len(entry["thought"]), i) for i, entry in enumerate(thoughts_log)) if thoughts_log else (0, -1)
-            
-    stats = {
-        "total_thoughts": total_thoughts,
-        "average_length": round(avg_length, 2),
-        "longest_thought_index": longest_thought[1] + 1 if longest_thought[1] >= 0 else None,
-        "longest_thought_length": longest_thought[0] if longest_thought[0] > 0 else None
-    }
-            
-    return json.dumps(stats, indent=2)
+    return json.dumps(thoughts.stats(), indent=2)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Saqr MCP server")
+    parser.add_argument(
+        "--transport", choices=["stdio", "sse"], default=env_str("SAQR_TRANSPORT", "stdio"),
+        help="stdio for a per-client subprocess, sse for a long-lived shared server",
+    )
+    parser.add_argument("--host", default=env_str("SAQR_HOST", mcp.settings.host))
+    parser.add_argument("--port", type=int, default=env_int("SAQR_PORT", mcp.settings.port))
+    args = parser.parse_args()
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
     try:
-        asyncio.run(mcp.run(transport="stdio"))
+        mcp.run(transport=args.transport)
     except KeyboardInterrupt:
         print("Server stopped")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    finally:
+        executor.shutdown(wait=False)
+        search_cache.close()
+        search_router.close()
+        if memory_backend.loaded:
+            memory_backend.value.close()
+        if document_renderer.loaded:
+            document_renderer.value.shutdown(wait=False)
+        if _default_thoughts is not None:
+            _default_thoughts.close()
+        server_metrics_file = env_str("SAQR_SERVER_METRICS_FILE")
+        if server_metrics_file:
+            metrics.dump(server_metrics_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
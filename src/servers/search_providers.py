@@ -0,0 +1,359 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from src.core.config import env_float, env_int, env_str
+from src.core.executor import executor
+from src.core.lazy import LazyResource
+from src.core.logger import logger
+from src.core.metrics import metrics
+from src.core.resilience import get_resilience
+
+STRATEGIES = ("fallback", "race", "fanout")
+# reciprocal rank fusion constant; larger values flatten the advantage of the top ranks
+RRF_K = 60
+
+
+@dataclass
+class SearchProviderStats:
+    calls: int = 0
+    errors: int = 0
+    empty: int = 0
+    cancelled: int = 0
+    wins: int = 0
+    seconds: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        finished = self.calls - self.cancelled
+        return self.seconds / finished if finished > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            **self.__dict__,
+            "seconds": round(self.seconds, 3),
+            "avg_latency": round(self.avg_latency, 4),
+        }
+
+
+class SearchProvider:
+    """One web search upstream behind the `web_search` tool.
+
+    Every call goes through the provider's `Resilience` (rate limit, retries, circuit
+    breaker, per-attempt timeout) and a semaphore, so each provider has its own
+    limits. Settings:
+
+        SAQR_<NAME>_TIMEOUT          seconds per attempt
+        SAQR_<NAME>_CONCURRENCY      in-flight searches
+        SAQR_<NAME>_RETRIES, ...     see `Resilience`
+
+    Results are plain dicts with `title`, `url` and `content`, plus `score` when
+    the upstream ranks them.
+    """
+
+    name = "base"
+
+    def __init__(self, timeout: float = 8.0, concurrency: int = 4, retries: int = 3):
+        self.resilience = get_resilience(self.name, timeout=timeout, retries=retries)
+        self.concurrency = env_int(f"SAQR_{self.name.upper()}_CONCURRENCY", concurrency)
+        self.stats = SearchProviderStats()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _search(self, query: str, limit: int) -> list[dict]:
+        """One attempt against the upstream"""
+        raise NotImplementedError
+
+    async def _limited(self, query: str, limit: int) -> list[dict]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await self._search(query, limit)
+
+    async def search(self, query: str, limit: int) -> list[dict]:
+        self.stats.calls += 1
+        start = time.perf_counter()
+        try:
+            results = await self.resilience.call(lambda: self._limited(query, limit))
+        except asyncio.CancelledError:
+            self.stats.cancelled += 1
+            raise
+        except Exception:
+            self.stats.errors += 1
+            self.stats.seconds += time.perf_counter() - start
+            metrics.inc("saqr_search_provider_errors_total", provider=self.name)
+            raise
+        elapsed = time.perf_counter() - start
+        self.stats.seconds += elapsed
+        if not results:
+            self.stats.empty += 1
+        metrics.observe("saqr_search_provider_seconds", elapsed, provider=self.name)
+        return results
+
+    def close(self) -> None:
+        pass
+
+
+def _create_tavily_client():
+    from tavily import AsyncTavilyClient
+
+    api_key = os.getenv("TAVILY_API_KEY")
+    client = AsyncTavilyClient(api_key=api_key)
+    base_url = env_str("TAVILY_BASE_URL")
+    if base_url:
+        import httpx
+
+        # the SDK hard-codes api.tavily.com; allow a compatible endpoint (local fakes, gateways)
+        client._client_creator = lambda: httpx.AsyncClient(
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+            base_url=base_url,
+        )
+    return client
+
+
+class TavilySearchProvider(SearchProvider):
+    """Tavily search API"""
+
+    name = "tavily"
+
+    def __init__(self):
+        super().__init__(timeout=8.0)
+        # built on first use so the server starts without touching the network
+        self.client = LazyResource("web_search", _create_tavily_client)
+
+    async def _search(self, query, limit):
+        client = await self.client.get()
+        response = await client.search(query, max_results=limit)
+        return (response or {}).get("results") or []
+
+
+class DuckDuckGoSearchProvider(SearchProvider):
+    """DuckDuckGo through `duckduckgo-search`; needs no API key, so it works as a local fallback"""
+
+    name = "duckduckgo"
+
+    def __init__(self):
+        super().__init__(timeout=6.0, concurrency=2, retries=1)
+
+    def _text(self, query: str, limit: int) -> list[dict]:
+        from duckduckgo_search import DDGS
+
+        hits = DDGS(timeout=max(1, int(self.resilience.timeout or 6))).text(query, max_results=limit)
+        return [{"title": hit.get("title", ""), "url": hit.get("href", ""), "content": hit.get("body", "")} for hit in hits or []]
+
+    async def _search(self, query, limit):
+        # the library is synchronous; run it on the shared pool
+        return await asyncio.get_running_loop().run_in_executor(executor.pool, self._text, query, limit)
+
+
+SEARCH_PROVIDERS: dict[str, type[SearchProvider]] = {
+    "tavily": TavilySearchProvider,
+    "duckduckgo": DuckDuckGoSearchProvider,
+}
+
+
+def canonical_url(url: str) -> str:
+    """Key under which results for the same page are merged: no scheme, `www.`, fragment or tracking parameters"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def merge_results(result_lists: list[list[dict]], limit: int) -> list[dict]:
+    """Deduplicate results by URL and rank them by reciprocal rank fusion.
+
+    A page found by several providers scores the sum of 1 / (RRF_K + rank) over
+    them, so agreement between providers moves it up. The longest snippet is kept.
+    """
+    merged: dict[str, dict] = {}
+    scores: dict[str, float] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            url = result.get("url") or ""
+            key = canonical_url(url) if url else f"#{id(result)}"
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            kept = merged.get(key)
+            if kept is None:
+                merged[key] = dict(result)
+            elif len(result.get("content") or "") > len(kept.get("content") or ""):
+                merged[key] = {**kept, "content": result["content"]}
+    ranked = sorted(merged, key=scores.__getitem__, reverse=True)[:limit]
+    return [{**merged[key], "score": round(scores[key], 6)} for key in ranked]
+
+
+@dataclass
+class SearchRouterStats:
+    searches: int = 0
+    fallbacks: int = 0
+    duplicates_merged: int = 0
+    failures: int = 0
+    deadline_cuts: int = 0
+
+
+class SearchRouter:
+    """Runs a `web_search` query against several providers with one of three strategies.
+
+        fallback   ask providers in order; the next one only when the previous failed or found nothing
+        race       ask all at once and take the first non-empty answer, cancelling the rest
+        fanout     ask all at once, wait for every one and merge the results by URL
+
+    `race` cuts tail latency when the primary is slow at the price of an upstream call
+    per provider; `fanout` trades latency for coverage. A provider that fails is
+    skipped; the search only fails when every provider failed.
+
+    `deadline` bounds a whole search, retries included. `fallback` gives each
+    provider an equal share of the time left, so a hanging primary is cancelled
+    in time for the next one to answer; `race` fails and `fanout` merges what
+    arrived once it is spent.
+    """
+
+    def __init__(
+        self, providers: list[SearchProvider], strategy: str = "fallback", max_results: int = 5, deadline: Optional[float] = None,
+    ):
+        if not providers:
+            raise ValueError("At least one search provider is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy {strategy!r}, expected one of: {', '.join(STRATEGIES)}")
+        self.providers = providers
+        self.strategy = strategy
+        self.max_results = max_results
+        self.deadline = deadline or None
+        self.stats = SearchRouterStats()
+
+    async def search(self, query: str) -> list[dict]:
+        self.stats.searches += 1
+        deadline = time.monotonic() + self.deadline if self.deadline else None
+        try:
+            if self.strategy == "race":
+                return await self._race(query, deadline)
+            if self.strategy == "fanout":
+                return await self._fanout(query, deadline)
+            return await self._fallback(query, deadline)
+        except Exception:
+            self.stats.failures += 1
+            raise
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _won(self, provider: SearchProvider) -> None:
+        provider.stats.wins += 1
+        metrics.inc("saqr_search_provider_wins_total", provider=provider.name, strategy=self.strategy)
+
+    async def _fallback(self, query: str, deadline: Optional[float]) -> list[dict]:
+        error: Optional[Exception] = None
+        for i, provider in enumerate(self.providers):
+            if i:
+                self.stats.fallbacks += 1
+            remaining = self._remaining(deadline)
+            # the providers still to come keep an equal share of what is left
+            budget = None if remaining is None else remaining / (len(self.providers) - i)
+            try:
+                async with asyncio.timeout(budget) as scope:
+                    results = await provider.search(query, self.max_results)
+            except Exception as e:
+                error = e
+                if scope.expired():
+                    self.stats.deadline_cuts += 1
+                    error = TimeoutError(f"cancelled after its {budget:.2f}s share of the search deadline")
+                logger.warning(f"{provider.name} search failed ({type(error).__name__}: {error})")
+                continue
+            if results:
+                self._won(provider)
+                return results[:self.max_results]
+        if error is not None:
+            raise error
+        return []
+
+    async def _race(self, query: str, deadline: Optional[float]) -> list[dict]:
+        tasks = {asyncio.ensure_future(p.search(query, self.max_results)): p for p in self.providers}
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=self._remaining(deadline), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.stats.deadline_cuts += 1
+                    raise TimeoutError(f"No search provider answered within {self.deadline}s")
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        logger.warning(f"{tasks[task].name} search failed ({type(error).__name__}: {error})")
+                    elif task.result():
+                        self._won(tasks[task])
+                        return task.result()[:self.max_results]
+        finally:
+            for task in pending:
+                task.cancel()
+        if error is not None:
+            raise error
+        return []
+
+    async def _fanout(self, query: str, deadline: Optional[float]) -> list[dict]:
+        tasks = [asyncio.ensure_future(p.search(query, self.max_results)) for p in self.providers]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self._remaining(deadline))
+        finally:
+            for task in tasks:
+                task.cancel()
+        if pending:
+            # merge what arrived in time
+            self.stats.deadline_cuts += 1
+            await asyncio.wait(pending)
+        result_lists = []
+        error: Optional[BaseException] = None
+        for provider, task in zip(self.providers, tasks):
+            if task in pending:
+                error = TimeoutError(f"cancelled at the {self.deadline}s search deadline")
+                logger.warning(f"{provider.name} search failed ({type(error).__name__}: {error})")
+            elif task.exception() is not None:
+                error = task.exception()
+                logger.warning(f"{provider.name} search failed ({type(error).__name__}: {error})")
+            elif task.result():
+                self._won(provider)
+                result_lists.append(task.result())
+        if not result_lists and error is not None:
+            raise error
+        urls = [result.get("url") for results in result_lists for result in results if result.get("url")]
+        self.stats.duplicates_merged += len(urls) - len({canonical_url(url) for url in urls})
+        return merge_results(result_lists, self.max_results)
+
+    def as_dict(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "deadline": self.deadline,
+            **self.stats.__dict__,
+            "providers": {
+                p.name: {**p.stats.as_dict(), "resilience": p.resilience.stats.as_dict(), "breaker": p.resilience.breaker.state}
+                for p in self.providers
+            },
+        }
+
+    def close(self) -> None:
+        for provider in self.providers:
+            provider.close()
+
+
+def create_search_router(names: Optional[str] = None, strategy: Optional[str] = None) -> SearchRouter:
+    """Build the router from `SAQR_SEARCH_PROVIDERS` (comma separated, in order), `SAQR_SEARCH_STRATEGY`
+    and `SAQR_SEARCH_DEADLINE` (seconds per search, 0 for none)"""
+    names = names or env_str("SAQR_SEARCH_PROVIDERS", "tavily,duckduckgo")
+    providers = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        if name not in SEARCH_PROVIDERS:
+            raise ValueError(f"Unknown search provider: {name}")
+        providers.append(SEARCH_PROVIDERS[name]())
+    return SearchRouter(
+        providers,
+        strategy=strategy or env_str("SAQR_SEARCH_STRATEGY", "fallback"),
+        max_results=env_int("SAQR_SEARCH_MAX_RESULTS", 5),
+        deadline=env_float("SAQR_SEARCH_DEADLINE", 15.0),
+    )
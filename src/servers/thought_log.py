@@ -0,0 +1,163 @@
+import datetime
+import json
+import mmap
+import os
+import struct
+from collections import deque
+from typing import Optional
+from src.core.config import env_int
+
+# one index record per thought: segment offset, encoded size, length in characters
+_RECORD = struct.Struct("<QII")
+
+
+class ThoughtLog:
+    """Append-only thought log with running aggregates and bounded memory.
+
+    Only the newest `SAQR_THOUGHTS_IN_MEMORY` thoughts (default 1000) are held in
+    RAM. With a `path`, every thought is also appended to `<path>.seg` (JSON lines)
+    and `<path>.idx` (fixed-size records). Older thoughts are read back through
+    `mmap`, and an existing log is reopened after a restart without loading it.
+    Without a path, thoughts that fall out of the window are dropped, but still
+    count towards the stats.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_in_memory: Optional[int] = None):
+        self.path = path
+        self.max_in_memory = max(1, max_in_memory or env_int("SAQR_THOUGHTS_IN_MEMORY", 1000))
+        self._recent: deque = deque(maxlen=self.max_in_memory)
+        self.count = 0
+        self.total_length = 0
+        self.max_length = 0
+        self.max_index: Optional[int] = None
+        self._segment = None
+        self._index = None
+        self._index_reader = None
+        self._map: Optional[mmap.mmap] = None
+        if path:
+            self._open()
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        index_path, segment_path = f"{self.path}.idx", f"{self.path}.seg"
+        if os.path.exists(index_path):
+            # drop a partial record (or unindexed segment tail) left by a crash
+            usable = os.path.getsize(index_path) // _RECORD.size * _RECORD.size
+            with open(index_path, "r+b") as f:
+                f.truncate(usable)
+            # only reopening a log needs numpy; the server imports this module on start
+            import numpy as np
+
+            record_dtype = np.dtype([("offset", "<u8"), ("size", "<u4"), ("length", "<u4")])
+            records = np.fromfile(index_path, dtype=record_dtype)
+            if len(records):
+                end = int(records["offset"][-1] + records["size"][-1])
+                with open(segment_path, "r+b") as f:
+                    f.truncate(end)
+                lengths = records["length"]
+                self.count = len(records)
+                self.total_length = int(lengths.sum(dtype=np.int64))
+                self.max_length = int(lengths.max())
+                self.max_index = int(lengths.argmax()) + 1
+        self._segment = open(segment_path, "ab")
+        self._index = open(index_path, "ab")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def first_available(self) -> int:
+        """1-based index of the oldest thought that can still be read"""
+        if self.path or self.count == 0:
+            return 1
+        return self.count - len(self._recent) + 1
+
+    def append(self, thought: str, timestamp: Optional[str] = None) -> int:
+        entry = {"timestamp": timestamp or datetime.datetime.now().isoformat(), "thought": thought}
+        if self._segment is not None:
+            data = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            offset = self._segment.tell()
+            self._segment.write(data)
+            self._segment.flush()
+            self._index.write(_RECORD.pack(offset, len(data), len(thought)))
+            self._index.flush()
+        self.count += 1
+        self.total_length += len(thought)
+        if self.max_index is None or len(thought) > self.max_length:
+            self.max_length = len(thought)
+            self.max_index = self.count
+        self._recent.append(entry)
+        return self.count
+
+    def _read_from_disk(self, index: int) -> dict:
+        if self._index_reader is None:
+            self._index_reader = open(f"{self.path}.idx", "rb", buffering=0)
+        # unbuffered: appends are flushed as they are written and `clear` rewrites records in place
+        self._index_reader.seek((index - 1) * _RECORD.size)
+        offset, size, _ = _RECORD.unpack(self._index_reader.read(_RECORD.size))
+        if self._map is None or offset + size > len(self._map):
+            if self._map is not None:
+                self._map.close()
+            with open(f"{self.path}.seg", "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return json.loads(self._map[offset:offset + size])
+
+    def get(self, index: int) -> dict:
+        """Thought number `index` (1-based)"""
+        if not self.first_available <= index <= self.count:
+            raise IndexError(index)
+        recent_start = self.count - len(self._recent) + 1
+        if index >= recent_start:
+            return self._recent[index - recent_start]
+        return self._read_from_disk(index)
+
+    def range(self, start: int, limit: int) -> list[tuple[int, dict]]:
+        """Up to `limit` (index, thought) pairs from `start` on"""
+        start = max(start, self.first_available)
+        end = min(self.count, start + max(0, limit) - 1)
+        return [(i, self.get(i)) for i in range(start, end + 1)]
+
+    def tail(self, limit: int) -> list[tuple[int, dict]]:
+        return self.range(self.count - limit + 1, limit)
+
+    def stats(self) -> dict:
+        return {
+            "total_thoughts": self.count,
+            "average_length": round(self.total_length / self.count, 2) if self.count else 0,
+            "longest_thought_index": self.max_index,
+            "longest_thought_length": self.max_length or None,
+        }
+
+    def clear(self) -> int:
+        count = self.count
+        self._recent.clear()
+        self.count = self.total_length = self.max_length = 0
+        self.max_index = None
+        if self._segment is not None:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._segment.truncate(0)
+            self._index.truncate(0)
+            self._segment.seek(0)
+            self._index.seek(0)
+        return count
+
+    def close(self, delete: bool = False) -> None:
+        if self._segment is None:
+            return
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._index_reader is not None:
+            self._index_reader.close()
+            self._index_reader = None
+        self._segment.close()
+        self._index.close()
+        self._segment = self._index = None
+        if delete:
+            for suffix in (".seg", ".idx"):
+                try:
+                    os.remove(f"{self.path}{suffix}")
+                except OSError:
+                    pass
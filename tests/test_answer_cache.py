@@ -0,0 +1,82 @@
+import time
+import numpy as np
+from src.clients.answer_cache import AnswerCache
+from src.core.embedding import HashingEmbedder
+
+
+class SynonymEmbedder:
+    """Semantic stand-in: a HashingEmbedder over a canonical vocabulary"""
+
+    semantic = True
+    synonyms = {"dose": "dosage", "grown-ups": "adults"}
+
+    def __init__(self):
+        self.hashing = HashingEmbedder()
+        self.dim = self.hashing.dim
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.hashing.embed(" ".join(self.synonyms.get(word, word) for word in text.split()))
+
+
+def test_exact_match_ignores_case_whitespace_and_trailing_punctuation():
+    cache = AnswerCache(enabled=True, path="")
+    cache.store("What is the capital of Australia?", "scope", "Canberra", [], 1.0)
+    hit = cache.lookup("  what is the capital   of australia ", "scope")
+    assert hit is not None and hit.answer == "Canberra" and hit.similarity == 1.0
+    assert cache.lookup("what is the capital of australia", "other scope") is None
+
+
+def test_near_miss_with_a_different_entity_or_number_does_not_hit():
+    cache = AnswerCache(enabled=True, path="")
+    cache.store("paracetamol dosage for adults", "scope", "500 mg to 1 g every 4 to 6 hours", [], 1.0)
+    cache.store("who won the 2019 world cup", "scope", "England", [], 1.0)
+    assert cache.lookup("warfarin dosage for adults", "scope") is None
+    assert cache.lookup("who won the 2024 world cup", "scope") is None
+    assert cache.stats.hits == 0
+
+
+def test_threshold_is_ignored_without_a_semantic_embedder():
+    cache = AnswerCache(enabled=True, path="", threshold=0.5, embedder=HashingEmbedder())
+    assert not cache.fuzzy
+    cache.store("paracetamol dosage for adults", "scope", "answer", [], 1.0)
+    assert cache.lookup("warfarin dosage for adults", "scope") is None
+
+
+def test_fuzzy_match_needs_the_same_numbers():
+    cache = AnswerCache(enabled=True, path="", threshold=0.9, embedder=SynonymEmbedder())
+    cache.store("paracetamol dosage for adults", "scope", "answer", [], 1.0)
+    cache.store("population of tokyo in 2019", "scope", "37 million", [], 1.0)
+    hit = cache.lookup("paracetamol dose for grown-ups", "scope")
+    assert hit is not None and hit.answer == "answer" and hit.similarity >= 0.9
+    assert cache.lookup("population of tokyo in 2024", "scope") is None
+
+
+def test_tool_answers_expire_after_the_tool_ttl():
+    cache = AnswerCache(enabled=True, path="", ttl=60.0, tool_ttl=0.05)
+    cache.store("latest news", "scope", "from the web", ["web_search"], 1.0)
+    cache.store("what is tcp", "scope", "a protocol", [], 1.0)
+    time.sleep(0.1)
+    assert cache.lookup("latest news", "scope") is None
+    assert cache.lookup("what is tcp", "scope") is not None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(enabled=True, path="", maxsize=2)
+    cache.store("first", "scope", "1", [], 1.0)
+    cache.store("second", "scope", "2", [], 1.0)
+    assert cache.lookup("first", "scope") is not None
+    cache.store("third", "scope", "3", [], 1.0)
+    assert cache.lookup("second", "scope") is None
+    assert [cache.lookup(q, "scope").answer for q in ("first", "third")] == ["1", "3"]
+    assert cache.stats.evictions == 1
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    cache = AnswerCache(enabled=True, path=path)
+    cache.store("what is udp", "scope", "a protocol", [], 2.0)
+    cache.close()
+    reopened = AnswerCache(enabled=True, path=path)
+    hit = reopened.lookup("What is UDP?", "scope")
+    assert hit is not None and hit.answer == "a protocol" and hit.latency == 2.0
+    reopened.close()
@@ -0,0 +1,105 @@
+import asyncio
+import time
+import pytest
+from src.core.cache import TTLCache, normalize_query
+
+
+class CountingFetch:
+    """Upstream stand-in that counts calls and answers after `delay` seconds"""
+
+    def __init__(self, value="result", delay: float = 0.0, error: Exception = None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  Latest   AI news\n") == "latest ai news"
+
+
+def test_entries_expire_after_the_ttl_but_stay_available_as_stale():
+    cache = TTLCache(ttl=0.05)
+    cache.set("a", "1")
+    cache.set("b", "2", ttl=60.0)
+    assert cache.get("a") == "1"
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+    assert cache.get_stale("a") == "1" and cache.stats.stale_hits == 1
+    assert cache.get_stale("missing") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2 and cache.stats.evictions == 1
+
+
+def test_overwriting_a_key_does_not_evict():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    assert (cache.get("a"), cache.get("b")) == (10, 2)
+    assert cache.stats.evictions == 0
+
+
+def test_entries_survive_a_restart_until_they_expire(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = TTLCache(ttl=60.0, path=path)
+    cache.set("kept", [{"title": "Everest"}])
+    cache.set("expired", ["old"], ttl=0.01)
+    cache.close()
+    time.sleep(0.05)
+
+    reopened = TTLCache(path=path)
+    assert reopened.get("kept") == [{"title": "Everest"}] and reopened.stats.disk_hits == 1
+    # expired rows are purged when the cache is opened
+    assert reopened.get("expired") is None and reopened.get_stale("expired") is None
+    reopened.close()
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    cache = TTLCache()
+    fetch = CountingFetch(delay=0.05)
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_fetch("q", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert fetch.calls == 1
+    assert (cache.stats.misses, cache.stats.coalesced) == (1, 4)
+    assert asyncio.run(cache.get_or_fetch("q", fetch)) == "result"
+    assert fetch.calls == 1 and cache.stats.hits == 1
+
+
+def test_empty_results_and_failures_are_not_cached():
+    cache = TTLCache()
+    empty = CountingFetch(value=[])
+    assert asyncio.run(cache.get_or_fetch("empty", empty)) == []
+    assert asyncio.run(cache.get_or_fetch("empty", empty)) == []
+    assert empty.calls == 2
+
+    failing = CountingFetch(error=ConnectionError("down"), delay=0.01)
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_fetch("down", failing) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(e, ConnectionError) for e in asyncio.run(main()))
+    assert failing.calls == 1
+    with pytest.raises(ConnectionError):
+        asyncio.run(cache.get_or_fetch("down", failing))
+    assert failing.calls == 2
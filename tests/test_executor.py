@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.core.executor import ToolExecutor
+
+
+class Tracker:
+    """Blocking call that records how many copies run at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, seconds: float) -> float:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(seconds)
+        with self.lock:
+            self.running -= 1
+        return seconds
+
+
+def test_run_sync_limits_concurrent_calls_per_tool():
+    executor = ToolExecutor(max_workers=8, concurrency=2, timeout=5.0)
+    tracker = Tracker()
+
+    async def main():
+        return await asyncio.gather(*(executor.run_sync("tracked", tracker, 0.05) for _ in range(6)))
+
+    try:
+        assert asyncio.run(main()) == [0.05] * 6
+    finally:
+        executor.shutdown()
+    assert tracker.peak == 2
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns():
+    executor = ToolExecutor(max_workers=8, concurrency=1, timeout=0.1)
+    tracker = Tracker()
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run_sync("tracked", tracker, 0.4)
+        start = time.perf_counter()
+        # the stuck thread still holds the only slot, so this call waits for it
+        executor.timeout = 5.0
+        await executor.run_sync("tracked", tracker, 0.0)
+        return time.perf_counter() - start
+
+    try:
+        waited = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert tracker.peak == 1
+    assert waited >= 0.2
+
+
+def test_cancelled_caller_does_not_free_the_slot_early():
+    executor = ToolExecutor(max_workers=8, concurrency=1, timeout=5.0)
+    tracker = Tracker()
+
+    async def main():
+        first = asyncio.ensure_future(executor.run_sync("tracked", tracker, 0.3))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await executor.run_sync("tracked", tracker, 0.0)
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert tracker.peak == 1
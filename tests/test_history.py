@@ -0,0 +1,105 @@
+from src.clients.history import ConversationHistory
+
+
+def tool_turn(n: int) -> list[dict]:
+    """One user turn in which the assistant calls two tools before answering"""
+    calls = [
+        {"id": f"call_{n}_{k}", "type": "function", "function": {"name": "web_search", "arguments": f'{{"query": "q{n}"}}'}}
+        for k in range(2)
+    ]
+    return [
+        {"role": "user", "content": f"question {n}"},
+        {"role": "assistant", "content": "", "tool_calls": calls},
+        *({"role": "tool", "tool_call_id": call["id"], "content": f"result {n} " * 50} for call in calls),
+        {"role": "assistant", "content": f"answer {n}"},
+    ]
+
+
+def build(turns: int, **options) -> ConversationHistory:
+    history = ConversationHistory(system_prompt="You are Saqr.", **options)
+    for n in range(turns):
+        for message in tool_turn(n):
+            history.append(message)
+    return history
+
+
+def assert_tool_replies_follow_their_call(messages: list[dict]) -> None:
+    pending: set[str] = set()
+    for message in messages:
+        if message["role"] == "tool":
+            assert message["tool_call_id"] in pending, f"orphaned tool reply {message['tool_call_id']}"
+            pending.discard(message["tool_call_id"])
+            continue
+        assert not pending, f"tool calls without replies: {sorted(pending)}"
+        pending = {call["id"] for call in message.get("tool_calls") or ()}
+    assert not pending
+
+
+class CountingFormat:
+    name = "counting"
+
+    def __init__(self):
+        self.converted = 0
+
+    def prepare_message(self, message: dict) -> dict:
+        self.converted += 1
+        return dict(message)
+
+
+def test_under_budget_history_is_left_alone():
+    history = build(3, budget=100_000)
+    before = list(history)
+    assert history.compact() == 0
+    assert list(history) == before
+
+
+def test_old_tool_outputs_are_shortened_before_turns_are_dropped():
+    history = build(4, budget=1000, pinned_turns=1, tool_chars=40)
+    saved = history.compact()
+    assert saved > 0 and history.total_tokens <= 1000
+    assert [m["content"] for m in history if m["role"] == "user"] == [f"question {n}" for n in range(4)]
+    tool_outputs = [m["content"] for m in history if m["role"] == "tool"]
+    shortened = ["...[truncated" in content for content in tool_outputs]
+    # oldest first, and only until the history fits
+    assert shortened[0] and shortened == sorted(shortened, reverse=True)
+    # the pinned turn keeps its tool outputs verbatim
+    assert tool_outputs[-2:] == ["result 3 " * 50] * 2
+
+
+def test_compaction_never_splits_tool_calls_from_their_replies():
+    for budget in range(150, 1500, 50):
+        history = build(8, budget=budget, pinned_turns=2, tool_chars=40)
+        history.compact()
+        assert_tool_replies_follow_their_call(history.messages)
+        assert history[0] == {"role": "system", "content": "You are Saqr."}
+        assert history.messages[-10:] == tool_turn(6) + tool_turn(7)
+
+
+def test_dropped_turns_are_folded_into_one_summary():
+    history = build(6, budget=400, pinned_turns=1, tool_chars=40)
+    history.compact()
+    summaries = [m for m in history if m["content"].startswith(ConversationHistory.summary_header)]
+    assert len(summaries) == 1 and history[1] is summaries[0]
+    assert "- user: question 0" in summaries[0]["content"]
+    assert "- assistant: answer 0" in summaries[0]["content"]
+    for message in tool_turn(6):
+        history.append(message)
+    history.compact()
+    assert sum(m["content"].startswith(ConversationHistory.summary_header) for m in history) == 1
+    assert history.total_tokens == sum(history.counter(m) for m in history)
+
+
+def test_render_converts_only_new_or_changed_messages():
+    history = build(3, budget=100_000)
+    provider = CountingFormat()
+    assert history.render(provider) == history.messages
+    assert provider.converted == len(history)
+    history.append({"role": "user", "content": "one more"})
+    assert history.render(provider)[-1] == {"role": "user", "content": "one more"}
+    assert provider.converted == len(history)
+
+    history.budget = 300
+    history.compact()
+    converted = provider.converted
+    assert history.render(provider) == history.messages
+    assert provider.converted > converted
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SPAWN_WORKER = """
+import multiprocessing
+import time
+
+if multiprocessing.current_process().name != "MainProcess":
+    # log file names carry the start second; make sure the worker's would differ
+    time.sleep(1.1)
+
+from src.core.logger import logger
+
+def work():
+    from src.core.logger import logger
+    logger.info("from the worker")
+
+if __name__ == "__main__":
+    logger.info("from the main process")
+    process = multiprocessing.get_context("spawn").Process(target=work)
+    process.start()
+    process.join()
+"""
+
+
+def run(tmp_path, env: dict) -> list[str]:
+    script = tmp_path / "spawn_worker.py"
+    script.write_text(SPAWN_WORKER)
+    env = {**{k: v for k, v in os.environ.items() if not k.startswith("SAQR_LOG")}, "PYTHONPATH": ROOT, **env}
+    subprocess.run([sys.executable, str(script)], cwd=tmp_path, env=env, check=True, capture_output=True)
+    logs = tmp_path / "logs"
+    return sorted(os.listdir(logs)) if logs.exists() else []
+
+
+def test_no_log_file_by_default(tmp_path):
+    assert run(tmp_path, {}) == []
+
+
+def test_only_the_main_process_writes_the_log_file(tmp_path):
+    files = run(tmp_path, {"SAQR_LOG_FILE": "true"})
+    assert len(files) == 1
+    with open(tmp_path / "logs" / files[0], encoding="utf-8") as f:
+        content = f.read()
+    assert "from the main process" in content
+    assert "from the worker" not in content
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import sys
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from src.servers.memory_backends import LocalMemoryBackend, WriteBehindBackend, fetch_memory_page
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _read_jsonl(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_queued_memory_survives_client_shutdown(tmp_path):
+    # the flush interval outlives the session, so the memory is still queued when
+    # the client stops the server with SIGTERM
+    env = {
+        **os.environ,
+        "SAQR_MEMORY_BACKEND": "local",
+        "SAQR_MEMORY_DIR": str(tmp_path / "memory"),
+        "SAQR_STATE_DIR": str(tmp_path / "state"),
+        "SAQR_MEMORY_FLUSH_INTERVAL": "600",
+    }
+    params = StdioServerParameters(
+        command=sys.executable, args=[os.path.join(ROOT, "src", "servers", "saqr_server.py")], env=env, cwd=str(tmp_path),
+    )
+
+    async def session():
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as client:
+                await client.initialize()
+                result = await client.call_tool("add_memory", {"memory_type": "note", "content": "the deploy key rotates on fridays"})
+                assert "Successfully added" in result.content[0].text
+
+    asyncio.run(session())
+
+    stored = _read_jsonl(str(tmp_path / "memory" / "memories.jsonl"))
+    spooled = _read_jsonl(str(tmp_path / "state" / "local_memory_spool.jsonl"))
+    assert [r["memory"] for r in stored + spooled] == ["the deploy key rotates on fridays"]
+
+
+def _write_behind(tmp_path, monkeypatch, **options) -> WriteBehindBackend:
+    monkeypatch.setenv("SAQR_STATE_DIR", str(tmp_path / "state"))
+    return WriteBehindBackend(LocalMemoryBackend(str(tmp_path / "memory")), **options)
+
+
+def test_paging_while_memories_are_queued_and_flushed(tmp_path, monkeypatch):
+    monkeypatch.setenv("SAQR_MEMORY_UPSTREAM_PAGE_SIZE", "50")
+    backend = _write_behind(tmp_path, monkeypatch, batch_size=7, flush_interval=0.01)
+
+    async def page_through() -> list[str]:
+        for i in range(230):
+            await backend.add(f"memory {i}", "note")
+        rows, cursor, added = [], None, 230
+        while True:
+            memories, cursor = await fetch_memory_page(backend, "note", cursor, limit=20)
+            rows.extend(memories)
+            if cursor is None:
+                return rows
+            # more writes land while the listing is in progress
+            for _ in range(5):
+                await backend.add(f"memory {added}", "note")
+                added += 1
+            await asyncio.sleep(0.02)
+
+    try:
+        rows = asyncio.run(page_through())
+    finally:
+        backend.close()
+    assert len(rows) == len(set(rows))
+    assert {f"memory {i}" for i in range(230)} <= set(rows)
+
+
+def test_fetch_memory_page_resumes_after_a_failed_page(tmp_path, monkeypatch):
+    monkeypatch.setenv("SAQR_MEMORY_UPSTREAM_PAGE_SIZE", "10")
+    backend = LocalMemoryBackend(str(tmp_path / "memory"))
+    backend.add_many([(f"memory {i}", "note") for i in range(30)])
+    get_all = backend.get_all
+    failing = {2}
+
+    async def flaky_get_all(memory_type=None, page=1, page_size=50):
+        if page in failing:
+            raise ConnectionError("upstream unavailable")
+        return await get_all(memory_type, page, page_size)
+
+    backend.get_all = flaky_get_all
+
+    async def read() -> tuple[list[str], list[str]]:
+        first, cursor = await fetch_memory_page(backend, "note", limit=0)
+        failing.clear()
+        rest, cursor = await fetch_memory_page(backend, "note", cursor, limit=0)
+        assert cursor is None
+        return first, rest
+
+    first, rest = asyncio.run(read())
+    assert first == [f"memory {i}" for i in range(10)]
+    assert rest == [f"memory {i}" for i in range(10, 30)]
@@ -0,0 +1,133 @@
+import asyncio
+import json
+from mcp import types
+from src.clients.prefetch import MEMORY_TOOL, MemoryPrefetcher
+from src.clients.tool_dispatch import ToolCall, ToolOutcome
+
+
+class RecordingDispatcher:
+    """Answers `search_memories` with `memories` after `delay` seconds and echoes other tools"""
+
+    def __init__(self, memories=(), delay: float = 0.0, error: str = None):
+        self.memories = list(memories)
+        self.delay = delay
+        self.error = error
+        self.calls: list[ToolCall] = []
+
+    async def dispatch(self, calls: list[ToolCall]) -> list[ToolOutcome]:
+        self.calls.extend(calls)
+        await asyncio.sleep(self.delay)
+        outcomes = []
+        for call in calls:
+            if call.name == MEMORY_TOOL and self.error:
+                outcomes.append(ToolOutcome(call=call, error=self.error))
+                continue
+            text = json.dumps(self.memories) if call.name == MEMORY_TOOL else f"{call.name} result"
+            outcomes.append(ToolOutcome(call=call, result=types.CallToolResult(content=[types.TextContent(type="text", text=text)])))
+        return outcomes
+
+
+def memory(text: str, score: float) -> dict:
+    return {"memory": text, "score": score}
+
+
+def search_call(query: str, id: str = "call_1", **arguments) -> ToolCall:
+    return ToolCall(id=id, name=MEMORY_TOOL, arguments={"query": query, **arguments})
+
+
+def test_disabled_prefetcher_does_nothing():
+    prefetcher = MemoryPrefetcher(enabled=False)
+    assert prefetcher.start(RecordingDispatcher(), "query") is None
+    assert asyncio.run(prefetcher.context_message(None, first_turn=True)) is None
+
+
+def test_relevant_memories_are_injected_before_the_first_call():
+    dispatcher = RecordingDispatcher([memory("prefers metric units", 0.8), memory("owns a cat", 0.1)])
+    prefetcher = MemoryPrefetcher(enabled=True, min_score=0.3, wait=1.0)
+
+    async def main():
+        prefetch = prefetcher.start(dispatcher, "how tall is everest")
+        message = await prefetcher.context_message(prefetch, first_turn=True)
+        # the prefetch is injected once per query
+        assert await prefetcher.context_message(prefetch, first_turn=False) is None
+        return message
+
+    message = asyncio.run(main())
+    assert message == {"role": "system", "content": "Relevant memories for the user's query:\n- prefers metric units"}
+    assert dispatcher.calls[0].arguments == {"query": "how tall is everest", "include_scores": True}
+    stats = prefetcher.stats.as_dict()
+    assert stats["ready_in_time"] == 1 and stats["memories_injected"] == 1 and stats["below_cutoff"] == 1
+
+
+def test_a_slow_prefetch_is_injected_on_a_later_turn():
+    prefetcher = MemoryPrefetcher(enabled=True, min_score=0.0, wait=0.01)
+
+    async def main():
+        prefetch = prefetcher.start(RecordingDispatcher([memory("lives in Riyadh", 0.9)], delay=0.1), "weather")
+        assert await prefetcher.context_message(prefetch, first_turn=True) is None
+        await asyncio.sleep(0.15)
+        return await prefetcher.context_message(prefetch, first_turn=False)
+
+    assert "- lives in Riyadh" in asyncio.run(main())["content"]
+    assert prefetcher.stats.ready_in_time == 0 and prefetcher.stats.injected == 1
+
+
+def test_a_failed_prefetch_is_counted_and_skipped():
+    prefetcher = MemoryPrefetcher(enabled=True, wait=1.0)
+
+    async def main():
+        prefetch = prefetcher.start(RecordingDispatcher(error="server unavailable"), "query")
+        return await prefetcher.context_message(prefetch, first_turn=True)
+
+    assert asyncio.run(main()) is None
+    assert prefetcher.stats.errors == 1 and prefetcher.stats.injected == 0
+
+
+def test_a_repeated_search_is_answered_from_the_prefetch():
+    dispatcher = RecordingDispatcher([memory("prefers metric units", 0.8)])
+    prefetcher = MemoryPrefetcher(enabled=True, wait=1.0)
+    calls = [
+        search_call("  How tall  is Everest "),
+        ToolCall(id="call_2", name="web_search", arguments={"query": "everest height"}),
+    ]
+
+    async def main():
+        prefetch = prefetcher.start(dispatcher, "how tall is everest")
+        await prefetch.task
+        return await prefetcher.dispatch(dispatcher, calls, prefetch)
+
+    outcomes = asyncio.run(main())
+    assert [outcome.call for outcome in outcomes] == calls
+    assert json.loads(outcomes[0].result.content[0].text) == ["prefers metric units"]
+    # only the prefetch itself and the web search reached the dispatcher
+    assert [call.name for call in dispatcher.calls] == [MEMORY_TOOL, "web_search"]
+    assert prefetcher.stats.served_from_prefetch == 1 and prefetcher.stats.model_requested == 1
+
+
+def test_a_different_memory_search_goes_to_the_server():
+    dispatcher = RecordingDispatcher([memory("prefers metric units", 0.8)])
+    prefetcher = MemoryPrefetcher(enabled=True, wait=1.0)
+    calls = [search_call("everest", memory_type="preference"), search_call("k2 height", id="call_2")]
+
+    async def main():
+        prefetch = prefetcher.start(dispatcher, "how tall is everest")
+        await prefetch.task
+        return await prefetcher.dispatch(dispatcher, calls, prefetch)
+
+    outcomes = asyncio.run(main())
+    assert [outcome.call for outcome in outcomes] == calls
+    assert dispatcher.calls[1:] == calls
+    assert prefetcher.stats.served_from_prefetch == 0 and prefetcher.stats.model_requested == 1
+
+
+def test_cancel_stops_an_unfinished_prefetch():
+    prefetcher = MemoryPrefetcher(enabled=True)
+
+    async def main():
+        prefetch = prefetcher.start(RecordingDispatcher(delay=5.0), "query")
+        await asyncio.sleep(0)
+        prefetcher.cancel(prefetch)
+        await asyncio.sleep(0)
+        return prefetch.task.cancelled()
+
+    assert asyncio.run(main())
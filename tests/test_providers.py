@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from benchmarks.fakes import FakeConfig, FakeServices, fake_env
+from src.clients.providers import OllamaProvider, _keep_alive, ollama_options
+
+LOAD = 0.2
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    with FakeServices(FakeConfig(model_load_latency=LOAD, llm_latency=0.0, answer_tokens=4)) as fakes:
+        for key, value in fake_env(fakes.base_url).items():
+            monkeypatch.setenv(key, value)
+        yield fakes
+
+
+def test_keep_alive_accepts_durations_and_seconds():
+    assert _keep_alive("30m") == "30m"
+    assert _keep_alive("600") == 600.0
+    assert _keep_alive("-1") == -1.0
+
+
+def test_ollama_options_merge_json_with_the_named_settings(monkeypatch):
+    assert ollama_options() == {}
+    monkeypatch.setenv("SAQR_OLLAMA_OPTIONS", '{"temperature": 0.2, "num_ctx": 2048}')
+    monkeypatch.setenv("SAQR_OLLAMA_NUM_CTX", "8192")
+    monkeypatch.setenv("SAQR_OLLAMA_NUM_THREAD", "4")
+    assert ollama_options() == {"temperature": 0.2, "num_ctx": 8192, "num_thread": 4}
+
+
+def chat(provider: OllamaProvider):
+    return provider.chat([{"role": "user", "content": "hello"}], [])
+
+
+def test_warm_up_loads_the_model_for_the_first_query(fake_ollama, monkeypatch):
+    monkeypatch.setenv("SAQR_OLLAMA_NUM_CTX", "4096")
+
+    async def main():
+        provider = OllamaProvider()
+        try:
+            loaded = await provider.warm_up()
+            reply = await chat(provider)
+        finally:
+            await provider.aclose()
+        return loaded, reply
+
+    loaded, reply = asyncio.run(main())
+    assert loaded == pytest.approx(LOAD, abs=0.05)
+    assert reply.tool_calls and reply.load_duration == 0.0
+
+
+def test_a_different_num_ctx_reloads_the_model(fake_ollama, monkeypatch):
+    async def main():
+        monkeypatch.setenv("SAQR_OLLAMA_NUM_CTX", "4096")
+        warm = OllamaProvider()
+        monkeypatch.setenv("SAQR_OLLAMA_NUM_CTX", "8192")
+        other = OllamaProvider()
+        try:
+            await warm.warm_up()
+            return await chat(other)
+        finally:
+            await warm.aclose()
+            await other.aclose()
+
+    assert asyncio.run(main()).load_duration == pytest.approx(LOAD, abs=0.05)
+
+
+def test_an_expired_keep_alive_pays_the_load_again(fake_ollama, monkeypatch):
+    monkeypatch.setenv("SAQR_OLLAMA_KEEP_ALIVE", "0.1")
+
+    async def main():
+        provider = OllamaProvider()
+        try:
+            await provider.warm_up()
+            await asyncio.sleep(0.2)
+            return await chat(provider)
+        finally:
+            await provider.aclose()
+
+    assert asyncio.run(main()).load_duration == pytest.approx(LOAD, abs=0.05)
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from mcp import types
+from src.clients.result_shaping import FULL_RESULT_TOOL, ResultShaper
+from src.clients.tool_dispatch import ToolCall, ToolOutcome
+
+
+def outcome(*texts: str, tool: str = "web_search", id: str = "call_1", is_error: bool = False) -> ToolOutcome:
+    result = types.CallToolResult(content=[types.TextContent(type="text", text=t) for t in texts], isError=is_error)
+    return ToolOutcome(call=ToolCall(id=id, name=tool, arguments={}), result=result)
+
+
+def read_full(shaper: ResultShaper, call_id: str, offset: int = 0) -> str:
+    return asyncio.run(shaper.read_full({"call_id": call_id, "offset": offset}))
+
+
+def test_json_is_re_encoded_without_indentation_or_empty_fields():
+    payload = [{"title": "Everest", "url": "https://example.com", "content": "8,849 m", "score": 0, "tags": [], "date": None}]
+    text, saved = ResultShaper(enabled=True, budget=0).shape(outcome(json.dumps(payload, indent=2)))
+    assert text == '[{"title":"Everest","url":"https://example.com","content":"8,849 m","score":0}]'
+    assert saved > 0
+
+
+def test_plain_text_and_broken_json_pass_through():
+    shaper = ResultShaper(enabled=True, budget=0)
+    assert shaper.shape(outcome("  Successfully added memory  "))[0] == "Successfully added memory"
+    assert shaper.shape(outcome('{"truncated": '))[0] == '{"truncated":'
+    assert shaper.shape(outcome('"quoted"', "[1, 2]"))[0] == 'quoted\n[1,2]'
+
+
+def test_errors_are_reported_without_shaping():
+    shaper = ResultShaper(enabled=True, budget=10)
+    failed = ToolOutcome(call=ToolCall(id="call_1", name="web_search", arguments={}), error="timed out")
+    assert shaper.shape(failed) == ("Error: timed out", 0)
+    text, _ = shaper.shape(outcome("x" * 1000, is_error=True))
+    assert text.startswith("Error: ")
+
+
+def test_disabled_shaper_returns_the_raw_result():
+    shaped = outcome('{"a": 1}')
+    assert ResultShaper(enabled=False).shape(shaped) == (str(shaped.result), 0)
+    assert ResultShaper(enabled=False).tool_payload() == []
+
+
+def test_long_results_are_cut_to_the_budget_with_a_notice():
+    results = [{"title": f"Result {i}", "content": "word " * 200} for i in range(5)]
+    shaper = ResultShaper(enabled=True, budget=100)
+    text, saved = shaper.shape(outcome(json.dumps(results)))
+    body, notice = text.rsplit("\n", 1)
+    assert len(body) <= 400
+    # long strings are shortened evenly before the text is cut
+    assert body.startswith('[{"title":"Result 0","content":"word word') and '…"},{"title":"Result 1"' in body
+    assert f'call {FULL_RESULT_TOOL} with call_id="call_1"' in notice
+    assert saved > 0
+
+
+def test_full_result_can_be_read_back_page_by_page():
+    shaper = ResultShaper(enabled=True, budget=250)
+    full = "".join(f"line {i:04d}\n" for i in range(300))
+    shaper.shape(outcome(full, id="call_7"))
+    pages, offset = [], 0
+    while True:
+        chunk = read_full(shaper, "call_7", offset)
+        body, _, notice = chunk.partition("\n…[continues at offset=")
+        pages.append(body)
+        if not notice:
+            break
+        offset = int(notice.split(" ", 1)[0])
+    assert "".join(pages) == full.strip()
+    assert read_full(shaper, "unknown") == "No stored result for this call_id."
+
+
+def test_reading_the_full_result_is_not_truncated_again():
+    shaper = ResultShaper(enabled=True, budget=10)
+    text, _ = shaper.shape(outcome("y" * 2000, tool=FULL_RESULT_TOOL))
+    assert text == "y" * 2000
+
+
+def test_only_the_latest_full_results_are_kept():
+    shaper = ResultShaper(enabled=True, budget=10, store_size=2)
+    for i in range(3):
+        shaper.shape(outcome("z" * 200, id=f"call_{i}"))
+    assert read_full(shaper, "call_0") == "No stored result for this call_id."
+    assert read_full(shaper, "call_2").startswith("z")
+
+
+def test_per_tool_budget_overrides_the_default(monkeypatch):
+    monkeypatch.setenv("SAQR_SEARCH_MEMORIES_RESULT_TOKENS", "0")
+    shaper = ResultShaper(enabled=True, budget=10)
+    assert shaper.shape(outcome("m" * 500, tool="search_memories"))[0] == "m" * 500
+    assert len(shaper.shape(outcome("m" * 500))[0].split("\n", 1)[0]) == 40
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import pytest
+from src.core import resilience
+from src.servers.search_providers import SearchProvider, SearchRouter, canonical_url, merge_results
+
+
+class ScriptedProvider(SearchProvider):
+    """Answers every search with `results` after `delay` seconds, or raises `error`"""
+
+    def __init__(self, name: str, results: list[dict] = (), delay: float = 0.0, error: Exception = None):
+        self.name = name
+        super().__init__(retries=0)
+        self.results = list(results)
+        self.delay = delay
+        self.error = error
+
+    async def _search(self, query, limit):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.results[:limit]
+
+
+def page(n: int, source: str = "", content: str = "") -> dict:
+    return {"title": f"Page {n}", "url": f"https://example.com/{n}{source}", "content": content or f"snippet {n}"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_resilience():
+    # providers share one Resilience per name across the process
+    resilience._instances.clear()
+    yield
+    resilience._instances.clear()
+
+
+def search(router: SearchRouter, query: str = "query") -> tuple[list[dict], float]:
+    start = time.perf_counter()
+    results = asyncio.run(router.search(query))
+    return results, time.perf_counter() - start
+
+
+def test_canonical_url_ignores_scheme_www_fragment_and_tracking():
+    assert canonical_url("https://www.Example.com/a/?utm_source=x&b=2&a=1#top") == "example.com/a?a=1&b=2"
+    assert canonical_url("http://example.com/a") == canonical_url("https://www.example.com/a/")
+    assert canonical_url("https://example.com/a?id=1") != canonical_url("https://example.com/a?id=2")
+
+
+def test_merge_results_ranks_pages_found_by_several_providers_first():
+    first = [page(1), page(2), page(3)]
+    second = [page(3, "/?utm_medium=feed", content="a longer snippet for page 3"), page(4)]
+    merged = merge_results([first, second], limit=10)
+    # equal scores keep the order the pages were first seen in
+    assert [result["title"] for result in merged] == ["Page 3", "Page 1", "Page 2", "Page 4"]
+    assert merged[0]["content"] == "a longer snippet for page 3"
+    assert merged[0]["score"] > merged[1]["score"]
+    assert len(merge_results([first, second], limit=2)) == 2
+
+
+def test_fallback_asks_the_next_provider_after_a_failure_or_no_results():
+    failing = ScriptedProvider("failing", error=ConnectionError("down"))
+    empty = ScriptedProvider("empty")
+    backup = ScriptedProvider("backup", [page(1)])
+    router = SearchRouter([failing, empty, backup], strategy="fallback")
+    results, _ = search(router)
+    assert results == [page(1)]
+    assert router.stats.fallbacks == 2
+    assert backup.stats.wins == 1 and failing.stats.errors == 1 and empty.stats.empty == 1
+
+
+def test_fallback_raises_the_last_error_when_every_provider_fails():
+    router = SearchRouter([ScriptedProvider("a", error=ConnectionError("a down")), ScriptedProvider("b", error=ValueError("b down"))])
+    with pytest.raises(ValueError):
+        search(router)
+    assert router.stats.failures == 1
+
+
+def test_fallback_deadline_cancels_a_hanging_provider_in_time_for_the_next():
+    hanging = ScriptedProvider("hanging", [page(1)], delay=30.0)
+    backup = ScriptedProvider("backup", [page(2)], delay=0.05)
+    router = SearchRouter([hanging, backup], strategy="fallback", deadline=0.6)
+    results, elapsed = search(router)
+    assert results == [page(2)]
+    # the hanging primary gets half of the deadline, the backup the rest
+    assert elapsed < 0.6
+    assert router.stats.deadline_cuts == 1 and hanging.stats.cancelled == 1
+
+
+def test_race_takes_the_first_non_empty_answer_and_cancels_the_rest():
+    slow = ScriptedProvider("slow", [page(1)], delay=5.0)
+    empty = ScriptedProvider("empty")
+    fast = ScriptedProvider("fast", [page(2)], delay=0.05)
+    router = SearchRouter([slow, empty, fast], strategy="race")
+    results, elapsed = search(router)
+    assert results == [page(2)] and elapsed < 1.0
+    assert fast.stats.wins == 1 and slow.stats.cancelled == 1
+
+
+def test_race_fails_at_the_deadline_when_nobody_answered():
+    router = SearchRouter([ScriptedProvider("a", [page(1)], delay=5.0), ScriptedProvider("b", [page(2)], delay=5.0)], strategy="race", deadline=0.2)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        search(router)
+    assert time.perf_counter() - start < 1.0
+    assert router.stats.deadline_cuts == 1
+
+
+def test_fanout_merges_every_provider_and_keeps_what_arrived_by_the_deadline():
+    first = ScriptedProvider("first", [page(1), page(2)])
+    second = ScriptedProvider("second", [page(2, "/"), page(3)], delay=0.05)
+    hanging = ScriptedProvider("hanging", [page(4)], delay=30.0)
+    failing = ScriptedProvider("failing", error=ConnectionError("down"))
+    router = SearchRouter([first, second, hanging, failing], strategy="fanout", deadline=0.5)
+    results, elapsed = search(router)
+    assert [result["title"] for result in results] == ["Page 2", "Page 1", "Page 3"]
+    assert elapsed < 1.0
+    assert router.stats.duplicates_merged == 1 and router.stats.deadline_cuts == 1
+    assert hanging.stats.cancelled == 1
+
+
+def test_router_rejects_an_unknown_strategy():
+    with pytest.raises(ValueError):
+        SearchRouter([ScriptedProvider("a")], strategy="broadcast")
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from src.servers.thought_log import ThoughtLog
+
+
+def test_importing_the_thought_log_does_not_load_numpy():
+    code = "import sys, src.servers.thought_log; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_old_thoughts_are_read_back_from_disk(tmp_path):
+    log = ThoughtLog(str(tmp_path / "thoughts"), max_in_memory=2)
+    for i in range(1, 6):
+        log.append(f"thought {i}" + "!" * i)
+    assert [entry["thought"] for _, entry in log.range(1, 5)] == [f"thought {i}" + "!" * i for i in range(1, 6)]
+    log.close()
+
+    reopened = ThoughtLog(str(tmp_path / "thoughts"), max_in_memory=2)
+    assert len(reopened) == 5
+    assert reopened.stats()["longest_thought_index"] == 5
+    assert reopened.get(2)["thought"] == "thought 2!!"
+    reopened.append("thought 6")
+    assert reopened.get(6)["thought"] == "thought 6"
+    reopened.close()
+
+
+def test_clear_starts_a_new_log(tmp_path):
+    log = ThoughtLog(str(tmp_path / "thoughts"), max_in_memory=1)
+    log.append("a long first thought")
+    log.append("second")
+    assert log.get(1)["thought"] == "a long first thought"
+    assert log.clear() == 2
+    log.append("x")
+    log.append("y")
+    assert [entry["thought"] for _, entry in log.range(1, 2)] == ["x", "y"]
+    log.close(delete=True)
+
+
+def test_without_a_path_only_the_window_is_kept():
+    log = ThoughtLog(max_in_memory=2)
+    for i in range(4):
+        log.append(str(i))
+    assert log.first_available == 3
+    assert [index for index, _ in log.tail(10)] == [3, 4]
+    assert log.stats()["total_thoughts"] == 4